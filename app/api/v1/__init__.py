@@ -1,3 +1,4 @@
 from .endpoints import dataset_router
+from .monitoring import monitoring_router
 
-__all__ = ['dataset_router']
\ No newline at end of file
+__all__ = ['dataset_router', 'monitoring_router']
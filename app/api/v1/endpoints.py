@@ -1,12 +1,28 @@
-from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+import asyncio
+import base64
 import json
+import logging
 import httpx
-from datetime import datetime
-import uuid
-from app.schemas.dataset import DatasetResponse, DatasetCreate, DatasetMetrics
+from app.core.config import get_settings
+from app.core.instrumentation import timed
+from app.core.serialization import dumps
+from app.schemas.dataset import CreateJobStatus, DatasetResponse, DatasetCreate, DatasetCreateRequest, DatasetHistory, FleetSummary
+from app.services.bulk_create import BulkCreator, InvalidItem
+from app.services.create_jobs import CreateJob, CreateJobQueue, CreateJobStore, JobConflictError, QueueFullError
 from app.services.dataset_service import DatasetService
+from app.services.deltas import DeltaTracker, compute_etag, encode_delta, etag_matches
+from app.services.enrichment import FULL_PLAN, EnrichmentEngine, EnrichmentPlan, Record
+from app.services.live_updates import UpdateHub
+from app.services.resilience import BackendUnavailableError
+from app.services.rollup import GROUP_KEYS, FleetRollup
+from app.services.shared_snapshot import SharedSnapshot
+from app.services.snapshot import IdleStop, SnapshotRefresher, SnapshotView
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 dataset_router = APIRouter(
     prefix="",  # Remove prefix as it's handled in main.py
@@ -14,96 +30,245 @@ dataset_router = APIRouter(
 )
 
 dataset_service = DatasetService()
+enrichment_engine = EnrichmentEngine(dataset_service)
+snapshot_refresher = SnapshotRefresher(dataset_service, enrichment_engine)
+shared_snapshot = SharedSnapshot(snapshot_refresher, settings.SNAPSHOT_SHARED_PATH) if settings.SNAPSHOT_SHARED_PATH else None
+bulk_creator = BulkCreator(dataset_service)
+create_jobs = CreateJobQueue(
+    dataset_service,
+    CreateJobStore(settings.CREATE_JOBS_PATH),
+    workers=settings.CREATE_JOB_WORKERS,
+    max_pending=settings.CREATE_JOB_MAX_PENDING,
+    max_attempts=settings.CREATE_JOB_MAX_ATTEMPTS,
+    retry_delay=settings.CREATE_JOB_RETRY_DELAY_SECONDS,
+    lease=settings.CREATE_JOB_LEASE_SECONDS,
+    poll_interval=settings.CREATE_JOB_POLL_INTERVAL_SECONDS,
+    retention=settings.CREATE_JOB_RETENTION_DAYS * 86400.0
+) if settings.CREATE_JOBS_PATH else None
+# Versions handed out for `?since=` and /datasets/stream; the shared
+# snapshot's versions are its file generations, the same in every worker
+snapshot_deltas = DeltaTracker("s" if shared_snapshot is not None else None)
+live_deltas = DeltaTracker()
+fleet_rollup = FleetRollup(snapshot_deltas)
+
+def _current_view() -> Optional[SnapshotView]:
+    return shared_snapshot.reader.current() if shared_snapshot is not None else snapshot_refresher.view
+
+# Outside snapshot mode the refresher (or the shared snapshot) only runs on
+# demand: while someone streams, and for SUMMARY_IDLE_SECONDS after the last
+# /datasets/summary call
+on_demand_refresh = IdleStop(
+    (shared_snapshot or snapshot_refresher).stop,
+    settings.SUMMARY_IDLE_SECONDS,
+    in_use=lambda: len(update_hub) > 0
+) if not settings.SNAPSHOT_MODE else None
+
+update_hub = UpdateHub(
+    snapshot_deltas,
+    _current_view,
+    (shared_snapshot or snapshot_refresher).start,
+    on_demand_refresh.stop_if_idle if on_demand_refresh is not None else None,
+    poll_interval=settings.STREAM_POLL_INTERVAL_SECONDS,
+    max_pending=settings.STREAM_MAX_PENDING_UPDATES
+)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-@dataset_router.get("/datasets/list", response_model=List[DatasetResponse])
-async def list_datasets():
+async def _ndjson(records: AsyncIterator[Record]) -> AsyncIterator[bytes]:
+    async for record in records:
+        yield dumps(record) + b"\n"
+
+async def _raw_ndjson(records: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for record in records:
+        yield bytes(record) + b"\n"
+
+def _select(view: SnapshotView, name: Optional[str], status: Optional[str]) -> List[int]:
+    positions = range(len(view))
+    if name:
+        positions = [position for position in positions if name.lower() in view.dataset(position).lower()]
+    if status:
+        positions = [position for position in positions if view.status(position) == status.lower()]
+    return list(positions)
+
+def _records(view: SnapshotView, positions: List[int], plan: EnrichmentPlan) -> Iterator[bytes]:
+    if plan == FULL_PLAN:
+        return (view.record(position) for position in positions)
+    # Only field selections need the records parsed
+    return (dumps(plan.project(view.parse(position))) for position in positions)
+
+def _delta(
+    view: SnapshotView,
+    deltas: DeltaTracker,
+    since: str,
+    name: Optional[str],
+    status: Optional[str],
+    plan: EnrichmentPlan
+) -> bytes:
+    version = deltas.parse(since)
+    delta = deltas.since(version) if version is not None else None
+    matching = _select(view, name, status)
+    if delta is None:
+        # Unknown or expired version: start over from the full list
+        positions, removed = matching, []
+    else:
+        changed, removed = delta
+        matched = set(matching)
+        positions = [position for position in matching if view.dataset_id(position) in changed]
+        # Removed datasets are listed by id whatever their name was, and
+        # changed ones that no longer match `status` leave the client's list
+        removed = removed + [
+            view.dataset_id(position) for position in _select(view, name, None)
+            if position not in matched and view.dataset_id(position) in changed
+        ]
+    return encode_delta(deltas.token, delta is None, _records(view, positions, plan), removed)
+
+async def _snapshot_view() -> SnapshotView:
+    # Starts the snapshot refresh if needed and waits for the first one
+    if shared_snapshot is not None:
+        shared_snapshot.start()
+        view = await shared_snapshot.reader.wait_ready(settings.SNAPSHOT_STARTUP_TIMEOUT_SECONDS)
+    else:
+        snapshot_refresher.start()
+        view = await snapshot_refresher.wait_ready(settings.SNAPSHOT_STARTUP_TIMEOUT_SECONDS)
+    if view is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Datasets snapshot is not available yet"
+        )
+    return view
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+def _decode_cursor(cursor: str) -> int:
     try:
-        payload = {
-            "id": "api.datasets.list",
-            "ver": "v2",
-            "ts": datetime.utcnow().isoformat(),
-            "params": {
-                "msgid": str(uuid.uuid4())
-            },
-            "request": {
-                "filters": {
-                    "status": "Live"
-                }
-            }
-        }
-        
-        async with httpx.AsyncClient() as client:
-            datasets_response = await client.post(
-                f'{dataset_service.base_url}/v2/datasets/list',
-                json=payload
-            )
-            print("Datasets list response:", datasets_response.json() if datasets_response.status_code == 200 else datasets_response.text)
-            if datasets_response.status_code != 200:
-                raise HTTPException(
-                    status_code=datasets_response.status_code,
-                    detail="Failed to fetch datasets list"
-                )
+        offset = int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        offset = -1
+    if offset < 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor"
+        )
+    return offset
 
-            datasets = datasets_response.json().get('result', {}).get('data', [])
-            enriched_datasets = []
-            time_intervals = dataset_service.get_time_intervals()
-
-            for dataset in datasets:
-                if not isinstance(dataset, dict):
-                    continue
-                    
-                dataset_id = dataset.get('dataset_id')
-                if not dataset_id:
-                    continue
-
-                # Get today's metrics
-                today_processed = await dataset_service.get_events_count(
-                    dataset_id,
-                    time_intervals['today'][0],
-                    time_intervals['today'][1]
-                )
-                today_failed = await dataset_service.get_failed_events_count(
-                    dataset_id,
-                    time_intervals['today'][0],
-                    time_intervals['today'][1]
-                )
-                today_total = today_processed + today_failed
+@dataset_router.get(
+    "/datasets/list",
+    response_model=List[DatasetResponse],
+    response_model_exclude_unset=True
+)
+async def list_datasets(
+    request: Request,
+    stream: bool = False,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated subset of: status, last_synced_time, metrics.today, metrics.yesterday"
+    ),
+    name: Optional[str] = Query(None, description="Case-insensitive substring of the dataset name"),
+    status: Optional[str] = Query(None, description="Dataset health status, e.g. healthy"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    since: Optional[str] = Query(
+        None,
+        description="X-Version of a previous response, or 0; returns only the datasets changed or removed since"
+    )
+):
+    stream = stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    if since is not None and (limit is not None or cursor or stream):
+        raise HTTPException(
+            status_code=400,
+            detail="since can't be combined with limit, cursor or stream"
+        )
+    try:
+        plan = EnrichmentPlan.from_fields(fields.split(",") if fields else None)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    offset = _decode_cursor(cursor) if cursor else 0
+    headers = {}
 
-                # Get yesterday's metrics
-                yesterday_processed = await dataset_service.get_events_count(
-                    dataset_id,
-                    time_intervals['yesterday'][0],
-                    time_intervals['yesterday'][1]
-                )
-                yesterday_failed = await dataset_service.get_failed_events_count(
-                    dataset_id,
-                    time_intervals['yesterday'][0],
-                    time_intervals['yesterday'][1]
-                )
-                yesterday_total = yesterday_processed + yesterday_failed
-
-                # Get dataset health
-                health_status = await dataset_service.get_dataset_health(dataset_id)
-                last_synced_time = await dataset_service.get_last_synced_time(dataset_id)
-
-                enriched_datasets.append(DatasetResponse(
-                    dataset=dataset.get('name', ''),
-                    status=health_status.lower(),
-                    last_synced_time=last_synced_time,
-                    metrics=DatasetMetrics(
-                        received=today_total,
-                        success=today_processed,
-                        failed=today_failed,
-                        yesterday={
-                            "received": yesterday_total,
-                            "success": yesterday_processed,
-                            "failed": yesterday_failed
-                        }
+    try:
+        deltas: Optional[DeltaTracker] = None
+        if settings.SNAPSHOT_MODE:
+            view = await _snapshot_view()
+            deltas = snapshot_deltas
+            deltas.observe(view.entries(), view.generation)
+            headers["X-Generated-At"] = view.generated_at.isoformat()
+            headers["X-Snapshot-Generation"] = str(view.generation)
+            positions = _select(view, name, status)
+        else:
+            datasets = await dataset_service.get_live_datasets()
+            full_list = not (name or status or limit or cursor)
+            if since is not None or (full_list and plan == FULL_PLAN and not stream):
+                # Everything is enriched, so the result also feeds the deltas
+                with timed("enrich"):
+                    enriched = await enrichment_engine.enrich(datasets, dataset_service.get_time_intervals())
+                view = SnapshotView.build(enriched)
+                deltas = live_deltas
+                deltas.observe(view.entries())
+                positions = _select(view, name, status)
+            else:
+                # Only the requested page is enriched, and only for the selected fields
+                page, next_offset = await enrichment_engine.select_page(datasets, name, status, offset, limit)
+                if next_offset is not None:
+                    headers["X-Next-Cursor"] = _encode_cursor(next_offset)
+                if stream:
+                    # Records are written as soon as each dataset is enriched
+                    return StreamingResponse(
+                        _ndjson(enrichment_engine.enrich_iter(page, dataset_service.get_time_intervals(), plan)),
+                        media_type=NDJSON_MEDIA_TYPE,
+                        headers=headers
                     )
-                ))
+                with timed("enrich"):
+                    enriched = await enrichment_engine.enrich(page, dataset_service.get_time_intervals(), plan)
+                # Already narrowed to the page and the selected fields
+                view = SnapshotView.build(enriched)
+                positions = list(range(len(view)))
+                plan, offset, limit = FULL_PLAN, 0, None
 
-            return enriched_datasets
+        if deltas is not None:
+            headers["X-Version"] = deltas.token
+            if since is not None:
+                return Response(
+                    content=_delta(view, deltas, since, name, status, plan),
+                    media_type="application/json",
+                    headers=headers
+                )
 
+        end = len(positions) if limit is None else offset + limit
+        selected = positions[offset:end]
+        if end < len(positions):
+            headers["X-Next-Cursor"] = _encode_cursor(end)
+        # The body only depends on the selected records and their projection
+        headers["ETag"] = compute_etag(plan, stream, hashes=(view.hash(position) for position in selected))
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        if stream:
+            return StreamingResponse(
+                _raw_ndjson(_records(view, selected, plan)),
+                media_type=NDJSON_MEDIA_TYPE,
+                headers=headers
+            )
+        if plan == FULL_PLAN and len(selected) == len(view):
+            body = view.body
+        else:
+            body = b"[" + b",".join(_records(view, selected, plan)) + b"]"
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail="Failed to fetch datasets list"
+        )
+    except BackendUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Metrics API unavailable: {str(e)}"
+        )
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=503,
@@ -115,22 +280,142 @@ async def list_datasets():
             detail=str(e)
         )
 
-class PIIField(BaseModel):
-    field: str
-    treatment: str
+@dataset_router.get("/datasets/summary", response_model=FleetSummary, response_model_exclude_unset=True)
+async def get_datasets_summary(
+    group_by: Optional[str] = Query(None, description="type, status or type,status"),
+    stale_after: float = Query(
+        settings.SUMMARY_STALE_AFTER_SECONDS,
+        ge=0,
+        description="Seconds since last_synced_time after which a dataset counts as stale"
+    )
+):
+    keys = [key.strip() for key in group_by.split(",") if key.strip()] if group_by else []
+    unknown = [key for key in keys if key not in GROUP_KEYS]
+    if unknown or len(set(keys)) != len(keys):
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by expects a subset of: {', '.join(GROUP_KEYS)}"
+        )
+    # Served from the snapshot; outside snapshot mode the first call starts
+    # its background refresh, which stops again once summaries go idle
+    if on_demand_refresh is not None:
+        on_demand_refresh.touch()
+    view = await _snapshot_view()
+    fleet_rollup.update(view)
+    return fleet_rollup.summary(keys, stale_after)
+
+async def _events(since: Optional[str]) -> AsyncIterator[bytes]:
+    subscription = update_hub.subscribe(since)
+    try:
+        while True:
+            try:
+                update = await subscription.next(settings.STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield b": keep-alive\n\n"
+                continue
+            if update is None:
+                if subscription.dropped:
+                    yield b'event: dropped\ndata: {"detail":"Client too slow, reconnect to catch up"}\n\n'
+                return
+            token, payload = update
+            yield b"id: " + token.encode() + b"\nevent: update\ndata: " + payload + b"\n\n"
+    finally:
+        update_hub.unsubscribe(subscription)
 
-class DatasetCreateRequest(BaseModel):
-    dataset_purpose: str
-    sample_event: str
-    data_location: str
-    dataset_name: str
-    pii_fields: List[PIIField]
-    dedup_key: str
-    timestamp_key: str
-    storage_option: str
+@dataset_router.get("/datasets/stream")
+async def stream_datasets(
+    request: Request,
+    since: Optional[str] = Query(None, description="Version to resume from; Last-Event-ID takes precedence")
+):
+    # Server-sent events: a first update with the full list (or the changes
+    # since `since`), then one update per refresh that changed anything
+    return StreamingResponse(
+        _events(request.headers.get("last-event-id") or since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@dataset_router.websocket("/datasets/stream")
+async def stream_datasets_ws(websocket: WebSocket, since: Optional[str] = None):
+    # Same updates as the SSE stream, one JSON text message each
+    await websocket.accept()
+    subscription = update_hub.subscribe(since)
+
+    async def send_updates() -> None:
+        async for _, payload in subscription:
+            await websocket.send_text(payload.decode())
+
+    async def wait_disconnect() -> None:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender = asyncio.ensure_future(send_updates())
+    receiver = asyncio.ensure_future(wait_disconnect())
+    try:
+        await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        update_hub.unsubscribe(subscription)
+        for task in (sender, receiver):
+            task.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+    if not sender.cancelled() and sender.exception() is None:
+        # The subscription ended: dropped (1013, try again later) or shutdown
+        await websocket.close(code=1013 if subscription.dropped else 1001)
+
+@dataset_router.get("/datasets/{dataset_id}/history", response_model=DatasetHistory)
+async def get_dataset_history(
+    dataset_id: str,
+    days: int = Query(30, ge=1, le=settings.HISTORY_MAX_DAYS, description="Number of days up to and including today")
+):
+    try:
+        history = await dataset_service.get_history(dataset_id, days)
+        return DatasetHistory(dataset=dataset_id, days=history)
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail="Failed to fetch dataset history"
+        )
+    except BackendUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Metrics API unavailable: {str(e)}"
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to connect to metrics API: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+def _job_response(job: CreateJob, status_code: int) -> JSONResponse:
+    body = CreateJobStatus(
+        id=job.id,
+        dataset_id=job.dataset_id,
+        status=job.status,
+        attempts=job.attempts,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        status_code=job.status_code,
+        result=job.result,
+        error=job.error
+    )
+    return JSONResponse(
+        body.model_dump(mode="json"),
+        status_code=status_code,
+        headers={"Location": f"/datasets/jobs/{job.id}"}
+    )
 
 @dataset_router.post("/datasets/create")
-async def create_dataset(request: DatasetCreateRequest):
+async def create_dataset(
+    request: DatasetCreateRequest,
+    run_async: bool = Query(False, alias="async"),
+    prefer: Optional[str] = Header(None)
+):
     try:
         # Parse the stringified sample event
         try:
@@ -141,114 +426,42 @@ async def create_dataset(request: DatasetCreateRequest):
                 detail="Invalid JSON format in sample_event"
             )
 
-        # Step 1: Get schema
-        schema_payload = {
-            "id": "api.datasets.dataschema",
-            "ver": "1.0",
-            "ts": datetime.utcnow().isoformat(),
-            "params": {
-                "msgid": str(uuid.uuid4())
-            },
-            "request": {
-                "data": [sample_event_json] if sample_event_json else [],
-                "config": {
-                    "dataset": request.dataset_name
-                }
-            }
-        }
-
-        async with httpx.AsyncClient() as client:
-            schema_response = await client.post(
-                f'{dataset_service.base_url}/v2/datasets/dataschema',
-                json=schema_payload
-            )
-            
-            print("Schema response:", schema_response.json() if schema_response.status_code == 200 else schema_response.text)
-            if schema_response.status_code != 200:
+        if create_jobs is not None and (run_async or "respond-async" in (prefer or "").lower()):
+            # 202 with a new job, 200 with the dataset's existing job for the
+            # same request, 409 if that job is for a different one
+            try:
+                job, created = await create_jobs.submit(request)
+            except JobConflictError as e:
+                raise HTTPException(
+                    status_code=409,
+                    detail=str(e),
+                    headers={"Location": f"/datasets/jobs/{e.job.id}"}
+                )
+            except QueueFullError as e:
                 raise HTTPException(
-                    status_code=schema_response.status_code,
-                    detail="Failed to get schema from API"
+                    status_code=503,
+                    detail=str(e),
+                    headers={"Retry-After": str(max(1, int(settings.CREATE_JOB_RETRY_DELAY_SECONDS)))}
                 )
+            return _job_response(job, 202 if created else 200)
 
-            schema_result = schema_response.json().get('result', {}).get('schema', {})
-            
-            if not schema_result:
-                schema_result = {
-                    "$schema": "https://json-schema.org/draft/2020-12/schema",
-                    "type": "object",
-                    "properties": {},
-                    "additionalProperties": True
-                }
-
-            formatted_dataset_id = dataset_service.format_dataset_id(request.dataset_name)
-            dataset_type = dataset_service.validate_type(request.dataset_purpose)
-            
-            transformations = []
-            for field in request.pii_fields:
-                transformations.append({
-                    "field_key": field.field,
-                    "transformation_function": {
-                        "type": "mask" if field.treatment == 'mask' else 'encrypt',
-                        "expr": field.field,
-                        "category": "pii"
-                    },
-                    "mode": "Strict"
-                })
-
-            # Create dataset payload
-            dataset_payload = {
-                "id": "api.datasets.create",
-                "ver": "1.0",
-                "ts": datetime.utcnow().isoformat(),
-                "params": {
-                    "msgid": str(uuid.uuid4())
-                },
-                "request": {
-                    "dataset_id": formatted_dataset_id,
-                    "type": dataset_type,
-                    "name": request.dataset_name,
-                    "validation_config": {
-                        "validate": True,
-                        "mode": "Strict"
-                    },
-                    "extraction_config": {
-                        "is_batch_event": True,
-                        "extraction_key": "events",
-                        "dedup_config": {
-                            "drop_duplicates": True,
-                            "dedup_key": request.dedup_key
-                        }
-                    },
-                    "dedup_config": {
-                        "drop_duplicates": True,
-                        "dedup_key": request.dedup_key
-                    },
-                    "data_schema": schema_result,
-                    "dataset_config": {
-                        "indexing_config": {
-                            "olap_store_enabled": request.storage_option.lower() == 'apache druid',
-                            "lakehouse_enabled": request.storage_option.lower() == 'hudi',
-                            "cache_enabled": False
-                        },
-                        "keys_config": {
-                            "timestamp_key": request.timestamp_key
-                        }
-                    },
-                    "transformations_config": transformations,
-                    "connectors_config": dataset_service.get_connector_config(request.data_location, request.dataset_name)
-                }
-            }
-
-            create_response = await client.post(
-                f'{dataset_service.base_url}/v2/datasets/create',
-                json=dataset_payload
-            )
-            print("Dataset create response:", create_response.json() if create_response.status_code == 200 else create_response.text)
-            return {
-                'schema_response': schema_response.json(),
-                'create_response': create_response.json()
-            }
+        # Step 1: Get schema
+        schema_body = await dataset_service.get_data_schema(request.dataset_name, sample_event_json)
 
+        # Step 2: Create the dataset with it
+        create_response = await dataset_service.create_dataset(request, schema_body)
+        return {
+            'schema_response': schema_body,
+            'create_response': create_response.json()
+        }
+
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail="Failed to get schema from API"
+        )
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=503,
@@ -258,4 +471,54 @@ async def create_dataset(request: DatasetCreateRequest):
         raise HTTPException(
             status_code=500,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+@dataset_router.get("/datasets/jobs/{job_id}", response_model=CreateJobStatus)
+async def get_create_job(job_id: str):
+    if create_jobs is None:
+        raise HTTPException(status_code=404, detail="Create jobs are disabled")
+    job = await create_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Create job {job_id} not found")
+    return _job_response(job, 200)
+
+def _decode_item(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return InvalidItem("Invalid JSON on NDJSON line")
+
+async def _read_batch(request: Request) -> List[Any]:
+    # A JSON list, or one item per line for NDJSON bodies
+    if "ndjson" in request.headers.get("content-type", ""):
+        items: List[Any] = []
+        buffer = b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            items.extend(_decode_item(line) for line in lines if line.strip())
+        if buffer.strip():
+            items.append(_decode_item(buffer))
+    else:
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON list of datasets")
+    if len(items) > settings.BATCH_CREATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BATCH_CREATE_MAX_ITEMS} datasets per batch"
+        )
+    return items
+
+async def _result_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for result in results:
+        yield json.dumps(result).encode() + b"\n"
+
+@dataset_router.post("/datasets/create/batch")
+async def create_datasets_batch(request: Request):
+    # Results are streamed as NDJSON, one line per item in completion order,
+    # with `index` pointing back at the item's position in the batch
+    items = await _read_batch(request)
+    return StreamingResponse(_result_lines(bulk_creator.create_iter(items)), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,170 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import registry
+from app.services.resilience import CLOSED, HALF_OPEN, OPEN
+from .endpoints import create_jobs, dataset_service, shared_snapshot, snapshot_refresher, update_hub
+
+monitoring_router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+BREAKER_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def _cache_stat(name: str):
+    return lambda: [({}, dataset_service.cache.stats()[name])]
+
+
+def _policy_stat(read):
+    return lambda: [
+        ({"endpoint": endpoint_id}, read(policy))
+        for endpoint_id, policy in list(dataset_service.policies.items())
+    ]
+
+
+def _scheduler_stat(name: str):
+    if dataset_service.scheduler is None:
+        return lambda: []
+    return lambda: [({}, dataset_service.scheduler.stats()[name])]
+
+
+def _snapshot_age():
+    snapshot = shared_snapshot.reader.current() if shared_snapshot is not None else snapshot_refresher.view
+    if snapshot is None:
+        return []
+    return [({}, time.time() - snapshot.generated_at.timestamp())]
+
+
+def _shared_snapshot_stat(read):
+    if shared_snapshot is None:
+        return lambda: []
+    return lambda: [({}, read(shared_snapshot))]
+
+
+registry.collect("dataset_api_cache_entries", "Entries in the metrics cache", _cache_stat("entries"))
+for stat, doc in (
+    ("hits", "Fresh metrics cache hits"),
+    ("stale_hits", "Metrics cache hits served stale while refreshing"),
+    ("misses", "Metrics cache misses"),
+    ("evictions", "Metrics cache LRU evictions"),
+    ("refresh_errors", "Failed background cache refreshes")
+):
+    registry.collect(f"dataset_api_cache_{stat}_total", doc, _cache_stat(stat), "counter")
+
+registry.collect("dataset_api_refresh_tracked", "Dataset reads kept fresh by the refresh scheduler", _scheduler_stat("tracked"))
+registry.collect("dataset_api_refresh_hot", "Scheduled reads refreshing at the minimum interval", _scheduler_stat("hot"))
+for stat, doc in (
+    ("refreshes", "Scheduled refreshes that completed"),
+    ("changes", "Scheduled refreshes that found a new value"),
+    ("errors", "Scheduled refreshes that failed")
+):
+    registry.collect(f"dataset_api_refresh_{stat}_total", doc, _scheduler_stat(stat), "counter")
+
+registry.collect(
+    "dataset_api_coalesced_calls_total",
+    "Backend reads started by the single-flight group",
+    lambda: [({}, dataset_service.single_flight.calls)],
+    "counter"
+)
+registry.collect(
+    "dataset_api_coalesced_waiters_total",
+    "Backend reads that joined an identical call already in flight",
+    lambda: [({}, dataset_service.single_flight.coalesced)],
+    "counter"
+)
+
+for stat, doc in (
+    ("hits", "Sample events whose schema came from the shape cache"),
+    ("misses", "Sample events whose schema was inferred"),
+    ("mismatches", "Local schemas that differed from the backend in verify mode")
+):
+    registry.collect(
+        f"dataset_api_schema_{stat}_total",
+        doc,
+        lambda stat=stat: [({}, dataset_service.schemas.stats()[stat])],
+        "counter"
+    )
+
+registry.collect(
+    "dataset_api_circuit_state",
+    "Circuit breaker state per backend endpoint (0 closed, 1 half open, 2 open)",
+    _policy_stat(lambda policy: BREAKER_STATES[policy.breaker.state])
+)
+registry.collect(
+    "dataset_api_backend_timeouts_total",
+    "Backend reads that missed their deadline",
+    _policy_stat(lambda policy: policy.timeouts),
+    "counter"
+)
+registry.collect(
+    "dataset_api_backend_rejected_total",
+    "Backend reads rejected by an open circuit",
+    _policy_stat(lambda policy: policy.rejected),
+    "counter"
+)
+registry.collect(
+    "dataset_api_backend_hedged_total",
+    "Backend reads that started a hedged attempt",
+    _policy_stat(lambda policy: policy.hedged),
+    "counter"
+)
+
+registry.collect(
+    "dataset_api_snapshot_refreshes_total",
+    "Completed snapshot refreshes",
+    lambda: [({}, snapshot_refresher.refresh_count)],
+    "counter"
+)
+registry.collect(
+    "dataset_api_snapshot_refresh_errors_total",
+    "Failed snapshot refreshes",
+    lambda: [({}, snapshot_refresher.refresh_errors)],
+    "counter"
+)
+registry.collect("dataset_api_snapshot_age_seconds", "Age of the served snapshot", _snapshot_age)
+registry.collect(
+    "dataset_api_snapshot_leader",
+    "1 if this worker refreshes the shared snapshot",
+    _shared_snapshot_stat(lambda shared: int(shared.is_leader))
+)
+registry.collect(
+    "dataset_api_snapshot_generation",
+    "Generation of the shared snapshot this worker serves",
+    _shared_snapshot_stat(lambda shared: getattr(shared.reader.current(), "generation", 0))
+)
+
+if create_jobs is not None:
+    for stat, doc in (
+        ("succeeded", "Create jobs that created their dataset"),
+        ("failed", "Create jobs that failed for good"),
+        ("retried", "Create job attempts scheduled again after a backend error")
+    ):
+        registry.collect(
+            f"dataset_api_create_jobs_{stat}_total",
+            doc,
+            lambda stat=stat: [({}, getattr(create_jobs, stat))],
+            "counter"
+        )
+
+registry.collect(
+    "dataset_api_stream_subscribers",
+    "Clients subscribed to /datasets/stream",
+    lambda: [({}, len(update_hub))]
+)
+registry.collect(
+    "dataset_api_stream_updates_total",
+    "Updates pushed to /datasets/stream subscribers",
+    lambda: [({}, update_hub.published)],
+    "counter"
+)
+registry.collect(
+    "dataset_api_stream_dropped_total",
+    "Stream subscribers dropped for falling behind",
+    lambda: [({}, update_hub.dropped)],
+    "counter"
+)
+
+
+@monitoring_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,203 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.metrics import ADMISSION_LIMIT, ADMISSION_QUEUED, ADMISSION_QUEUE_DELAY, ADMISSION_REJECTED
+
+CRITICAL = "critical"
+INTERACTIVE = "interactive"
+BULK = "bulk"
+# Lower goes first
+PRIORITIES = {CRITICAL: 0, INTERACTIVE: 1, BULK: 2}
+
+# (method, path prefix, route class); the first match wins. None and
+# unmatched requests (docs, long-lived streams) bypass admission.
+ROUTE_CLASSES: Sequence[Tuple[str, str, Optional[str]]] = (
+    ("POST", "/datasets/create/batch", BULK),
+    ("POST", "/datasets/create", CRITICAL),
+    ("GET", "/metrics", CRITICAL),
+    ("GET", "/datasets/stream", None),
+    ("GET", "/datasets/list", BULK),
+    ("GET", "/datasets/", INTERACTIVE),
+)
+
+
+# Backend calls of the request being served: [within target, slow or failed]
+_calls: ContextVar[Optional[List[int]]] = ContextVar("admission_calls", default=None)
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    for route_method, prefix, name in ROUTE_CLASSES:
+        if method == route_method and path.startswith(prefix):
+            return name
+    return None
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AIMDLimit:
+    """Concurrency limit driven by backend call latency.
+
+    A request whose backend calls all succeeded within `target` raises the
+    limit by 1/limit when it completes, about +1 per limit's worth of
+    requests however many calls each fans out to; a slower or failed call
+    multiplies it by `backoff`, at most once per `target` so one slow wave
+    of calls only counts once.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, target: float, backoff: float = 0.9):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target = target
+        self.backoff = backoff
+        self.value = float(min(max(initial, min_limit), max_limit))
+        self._decreased_at = 0.0
+        ADMISSION_LIMIT.set(self.value)
+
+    def __int__(self) -> int:
+        return int(self.value)
+
+    def observe(self, seconds: float, ok: bool) -> None:
+        # Called for every backend call, in or outside a request
+        good = ok and seconds <= self.target
+        calls = _calls.get()
+        if calls is not None:
+            calls[0 if good else 1] += 1
+        if good:
+            return
+        now = time.monotonic()
+        if now - self._decreased_at < self.target:
+            return
+        self.value = max(self.min_limit, self.value * self.backoff)
+        self._decreased_at = now
+        ADMISSION_LIMIT.set(self.value)
+
+    @contextmanager
+    def request(self) -> Iterator[None]:
+        # Collects the backend calls made while serving one request
+        calls = [0, 0]
+        token = _calls.set(calls)
+        try:
+            yield
+        finally:
+            _calls.reset(token)
+            if calls[0] and not calls[1]:
+                self.value = min(self.max_limit, self.value + 1 / self.value)
+                ADMISSION_LIMIT.set(self.value)
+
+
+class AdmissionController:
+    """Admits at most `limit` requests at a time.
+
+    Requests beyond the limit wait in a bounded FIFO queue per route class
+    and free slots go to the highest priority class first. A request is
+    rejected with 429 when its queue is full and with 503 after waiting
+    `max_queue_delay`, or right away while the last request of its class
+    had to wait longer than `queue_delay_target`.
+    """
+
+    def __init__(self, limit: AIMDLimit, max_queue: int, queue_delay_target: float, max_queue_delay: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_delay_target = queue_delay_target
+        self.max_queue_delay = max_queue_delay
+        self.in_flight = 0
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {name: deque() for name in PRIORITIES}
+        # How long the last admitted request of each class waited
+        self._delays: Dict[str, float] = {name: 0.0 for name in PRIORITIES}
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _queued_ahead(self, name: str) -> bool:
+        return any(self._queues[other] for other, priority in PRIORITIES.items() if priority <= PRIORITIES[name])
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> Rejected:
+        return Rejected(status_code, reason, detail, max(1, math.ceil(self.max_queue_delay)))
+
+    async def acquire(self, name: str) -> None:
+        if self._has_capacity() and not self._queued_ahead(name):
+            self.in_flight += 1
+            self._delays[name] = 0.0
+            return
+        queue = self._queues[name]
+        if len(queue) >= self.max_queue:
+            raise self._reject(429, "queue_full", "Too many requests queued, retry later")
+        if self._delays[name] > self.queue_delay_target:
+            raise self._reject(503, "queue_delay", "Service overloaded, retry later")
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        entry = (loop.create_future(), now)
+        waiter = entry[0]
+        queue.append(entry)
+        ADMISSION_QUEUED.inc(route_class=name)
+        try:
+            await asyncio.wait((waiter,), timeout=self.max_queue_delay)
+        except asyncio.CancelledError:
+            # Given a slot just as the client went away
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            ADMISSION_QUEUED.dec(route_class=name)
+            if not waiter.done():
+                waiter.cancel()
+                queue.remove(entry)
+        delay = loop.time() - now
+        ADMISSION_QUEUE_DELAY.observe(delay, route_class=name)
+        self._delays[name] = delay
+        if waiter.cancelled():
+            raise self._reject(503, "queue_delay", "Service overloaded, retry later")
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        for name in sorted(PRIORITIES, key=PRIORITIES.get):
+            queue = self._queues[name]
+            while queue and self._has_capacity():
+                waiter, _ = queue.popleft()
+                waiter.set_result(None)
+                self.in_flight += 1
+
+
+class AdmissionMiddleware:
+    """Runs HTTP requests through an AdmissionController by route class."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        name = route_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.controller.acquire(name)
+        except Rejected as e:
+            ADMISSION_REJECTED.inc(route_class=name, reason=e.reason)
+            response = JSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            with self.controller.limit.request():
+                await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
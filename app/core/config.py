@@ -1,3 +1,4 @@
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,10 +6,150 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Dataset API"
     BACKEND_URL: str = "http://localhost:3005"
 
+    # Enrichment fan-out for /datasets/list
+    ENRICHMENT_MAX_CONCURRENCY: int = 64
+    ENRICHMENT_MAX_CONCURRENCY_PER_ENDPOINT: int = 16
+    # Per backend endpoint overrides, e.g. {"health": 8}
+    ENRICHMENT_ENDPOINT_CONCURRENCY: Dict[str, int] = {}
+
+    # Shared backend HTTP client
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 0  # 0 disables the per-host cap
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 10.0
+    HTTP_HTTP2: bool = False
+
+    # Batched backend queries for /datasets/list
+    ENRICHMENT_BATCH_QUERIES: bool = True
+    # Datasets per batched Prometheus failed events query
+    PROMETHEUS_BATCH_SIZE: int = 25
+
+    # Last synced time lookups. Datasets without a known watermark are searched
+    # over these lookbacks (days) before falling back to the full history.
+    LAST_SYNCED_LOOKBACK_DAYS: List[int] = [1, 7, 30, 365]
+    LAST_SYNCED_WATERMARK_OVERLAP_SECONDS: int = 300
+
+    # In-process metrics cache. Today's metrics and health expire after the
+    # TTL and are then served stale while a background refresh runs;
+    # completed days are kept until evicted.
+    METRICS_CACHE_ENABLED: bool = True
+    METRICS_CACHE_MAX_ENTRIES: int = 50000
+    METRICS_CACHE_TTL_SECONDS: float = 30.0
+    METRICS_CACHE_STALE_SECONDS: float = 60.0
+
+    # Per-dataset refresh scheduler for health and last synced time. Each
+    # dataset's reads are refreshed in the background, every
+    # REFRESH_MIN_INTERVAL_SECONDS while its values or today's counts keep
+    # changing, backing off (doubling) up to REFRESH_MAX_INTERVAL_SECONDS
+    # while they don't. Datasets nobody asked about for
+    # REFRESH_FORGET_AFTER_SECONDS are no longer refreshed.
+    REFRESH_SCHEDULER: bool = True
+    REFRESH_MIN_INTERVAL_SECONDS: float = 5.0
+    REFRESH_MAX_INTERVAL_SECONDS: float = 600.0
+    REFRESH_MAX_CALLS_PER_SECOND: float = 20.0
+    REFRESH_FORGET_AFTER_SECONDS: float = 3600.0
+
+    # SQLite file keeping completed days' metrics across restarts, also
+    # backing /datasets/{id}/history; empty disables it
+    METRICS_STORE_PATH: str = "metrics.sqlite3"
+    HISTORY_MAX_DAYS: int = 90
+
+    # Share one in-flight backend call between concurrent identical reads
+    COALESCE_BACKEND_CALLS: bool = True
+
+    # Backend read deadlines (seconds), per endpoint id with a default
+    BACKEND_TIMEOUT_SECONDS: float = 5.0
+    BACKEND_TIMEOUTS: Dict[str, float] = {
+        "failedEventsCountPerDataset": 5.0,
+        "totalProcessedEventsCount": 5.0,
+        "lastSyncedTime": 10.0,
+        "health": 3.0
+    }
+    # Consecutive failures before an endpoint's circuit opens, and how long
+    # it stays open before a trial call is let through
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 30.0
+    # Hedged metric reads: a second attempt starts once the first has run
+    # longer than this latency percentile
+    HEDGE_REQUESTS: bool = False
+    HEDGE_PERCENTILE: float = 95.0
+    HEDGE_MIN_SAMPLES: int = 20
+
+    # Snapshot mode: /datasets/list serves an in-memory snapshot rebuilt by a
+    # background task instead of enriching on every request
+    SNAPSHOT_MODE: bool = False
+    SNAPSHOT_REFRESH_INTERVAL_SECONDS: float = 30.0
+    SNAPSHOT_REFRESH_JITTER: float = 0.1  # fraction of the interval
+    SNAPSHOT_STARTUP_TIMEOUT_SECONDS: float = 30.0
+    # Memory-mapped snapshot file shared by all uvicorn workers, e.g.
+    # /dev/shm/dataset-api-snapshot; only the worker holding its lock
+    # refreshes it. Empty keeps a snapshot per worker.
+    SNAPSHOT_SHARED_PATH: str = ""
+
+    # GET /datasets/stream: how often each worker looks for a new snapshot,
+    # updates buffered per subscriber before it is dropped, and the SSE
+    # keep-alive interval
+    STREAM_POLL_INTERVAL_SECONDS: float = 1.0
+    STREAM_MAX_PENDING_UPDATES: int = 16
+    STREAM_HEARTBEAT_SECONDS: float = 15.0
+
+    # GET /datasets/summary: default staleness threshold for last_synced_time,
+    # and outside snapshot mode how long the snapshot keeps refreshing after
+    # the last summary request
+    SUMMARY_STALE_AFTER_SECONDS: float = 3600.0
+    SUMMARY_IDLE_SECONDS: float = 300.0
+
+    # Schema inference for /datasets/create: "local" infers the schema in
+    # process, "backend" always asks /v2/datasets/dataschema, "verify" asks
+    # the backend and compares it with the local schema. Sample events that
+    # aren't JSON objects always go to the backend.
+    SCHEMA_INFERENCE_MODE: str = "local"
+    SCHEMA_CACHE_MAX_ENTRIES: int = 1024
+
+    # POST /datasets/create/batch
+    BATCH_CREATE_MAX_CONCURRENCY: int = 16
+    BATCH_CREATE_MAX_ITEMS: int = 1000
+
+    # Asynchronous POST /datasets/create (?async=true or Prefer: respond-async).
+    # Jobs are kept in this SQLite file, one per dataset id, and run by a pool
+    # of workers; backend failures are retried with exponential backoff. A
+    # job whose worker died is taken over once its lease expires. Empty
+    # disables async mode.
+    CREATE_JOBS_PATH: str = "create_jobs.sqlite3"
+    CREATE_JOB_WORKERS: int = 4
+    CREATE_JOB_MAX_PENDING: int = 1000
+    CREATE_JOB_MAX_ATTEMPTS: int = 5
+    CREATE_JOB_RETRY_DELAY_SECONDS: float = 2.0
+    CREATE_JOB_LEASE_SECONDS: float = 120.0
+    CREATE_JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    CREATE_JOB_RETENTION_DAYS: int = 7
+
+    # Admission control. Requests are served up to a concurrency limit that
+    # grows while backend calls stay within the latency target and shrinks
+    # when they don't; the rest wait in a bounded queue per route class
+    # (creates first, listing last) and get 429 (queue full) or 503 with
+    # Retry-After, either after the max delay or up front while requests of
+    # their class wait longer than the target.
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_INITIAL_LIMIT: int = 32
+    ADMISSION_MIN_LIMIT: int = 4
+    ADMISSION_MAX_LIMIT: int = 256
+    ADMISSION_BACKEND_LATENCY_TARGET_SECONDS: float = 1.0
+    ADMISSION_MAX_QUEUE: int = 100
+    ADMISSION_QUEUE_DELAY_TARGET_SECONDS: float = 0.5
+    ADMISSION_MAX_QUEUE_DELAY_SECONDS: float = 2.0
+
+    # Logging ("json" or "text") and per-request Server-Timing headers
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    SERVER_TIMING: bool = False
+
     class Config:
         case_sensitive = True
         env_file = ".env"
         env_file_encoding = 'utf-8'
 
 def get_settings() -> Settings:
-    return Settings(_env_file='.env', _env_file_encoding='utf-8')
\ No newline at end of file
+    return Settings(_env_file='.env', _env_file_encoding='utf-8')
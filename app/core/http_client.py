@@ -0,0 +1,81 @@
+import asyncio
+from typing import Callable, Dict, Optional, Tuple
+import httpx
+from app.core.config import Settings, get_settings
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    # httpx only limits connections per pool, so cap concurrent requests per
+    # (scheme, host, port) here. The slot is held until the response is closed.
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_connections_per_host: int):
+        self._transport = transport
+        self._max_connections_per_host = max_connections_per_host
+        self._limits: Dict[Tuple[bytes, bytes, Optional[int]], asyncio.Semaphore] = {}
+
+    def _limit(self, url: httpx.URL) -> asyncio.Semaphore:
+        key = (url.raw_scheme, url.raw_host, url.port)
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = asyncio.Semaphore(self._max_connections_per_host)
+            self._limits[key] = limit
+        return limit
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limit = self._limit(request.url)
+        await limit.acquire()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                limit.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client(settings: Optional[Settings] = None) -> httpx.AsyncClient:
+    settings = settings or get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+    # HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        limits=limits,
+        http2=settings.HTTP_HTTP2
+    )
+    if settings.HTTP_MAX_CONNECTIONS_PER_HOST > 0:
+        transport = HostLimitedTransport(transport, settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON for the dataset records served by /datasets/list. Records are plain
+# dicts built from trusted backend values, encoded byte for byte like
+# pydantic's model_dump_json: compact separators, non-ASCII left as UTF-8,
+# datetimes in ISO 8601 with a Z suffix.
+
+_EPOCH = datetime(1970, 1, 1)
+_TIMESTAMP = TypeAdapter(Optional[datetime])
+# pydantic reads larger Unix timestamps as milliseconds
+_MAX_SECONDS = 20_000_000_000
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def format_timestamp(value: Any) -> Optional[str]:
+    # Same output as a `datetime | None` pydantic field given `value`
+    if value is None:
+        return None
+    if type(value) is int:
+        try:
+            if -_MAX_SECONDS <= value <= _MAX_SECONDS:
+                moment = _EPOCH + timedelta(seconds=value)
+            else:
+                moment = _EPOCH + timedelta(milliseconds=value)
+            return moment.isoformat() + "Z"
+        except OverflowError:
+            pass
+    return _TIMESTAMP.dump_python(_TIMESTAMP.validate_python(value), mode="json")
@@ -1,10 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from app.core.admission import AdmissionController, AdmissionMiddleware, AIMDLimit
 from app.core.config import get_settings
-from app.api.v1.endpoints import dataset_router
+from app.core.http_client import create_http_client
+from app.core.instrumentation import InstrumentationMiddleware
+from app.core.logging import configure_logging
+from app.api.v1 import monitoring_router
+from app.api.v1.endpoints import create_jobs, dataset_router, dataset_service, on_demand_refresh, shared_snapshot, snapshot_refresher, update_hub
 
 settings = get_settings()
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for every backend call made while the app is running
+    http_client = create_http_client(settings)
+    dataset_service.use_client(http_client)
+    await dataset_service.warm_cache()
+    if create_jobs is not None:
+        create_jobs.start()
+    if settings.SNAPSHOT_MODE:
+        (shared_snapshot or snapshot_refresher).start()
+    try:
+        yield
+    finally:
+        await update_hub.aclose()
+        if on_demand_refresh is not None:
+            await on_demand_refresh.aclose()
+        if create_jobs is not None:
+            await create_jobs.stop()
+        if shared_snapshot is not None:
+            await shared_snapshot.stop()
+        await snapshot_refresher.stop()
+        await dataset_service.aclose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -12,9 +42,26 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
+if settings.ADMISSION_CONTROL:
+    admission = AdmissionController(
+        AIMDLimit(
+            settings.ADMISSION_INITIAL_LIMIT,
+            settings.ADMISSION_MIN_LIMIT,
+            settings.ADMISSION_MAX_LIMIT,
+            settings.ADMISSION_BACKEND_LATENCY_TARGET_SECONDS
+        ),
+        settings.ADMISSION_MAX_QUEUE,
+        settings.ADMISSION_QUEUE_DELAY_TARGET_SECONDS,
+        settings.ADMISSION_MAX_QUEUE_DELAY_SECONDS
+    )
+    dataset_service.subscribe_calls(lambda endpoint_id, seconds, ok: admission.limit.observe(seconds, ok))
+    # Innermost, so rejections still get CORS headers and request metrics
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,9 +70,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(InstrumentationMiddleware, server_timing=settings.SERVER_TIMING)
 
 # Include routers without prefix
 app.include_router(dataset_router)
+app.include_router(monitoring_router)
 
 # Global exception handler
 @app.exception_handler(Exception)
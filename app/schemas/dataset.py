@@ -15,10 +15,62 @@ class DatasetMetrics(BaseModel):
     )
 
 class DatasetResponse(BaseModel):
+    # status and metrics are only left out when not selected with `fields=`
     dataset: str
-    status: str
+    dataset_id: str
+    status: Optional[str] = None
+    last_synced_time: datetime | None = None
+    metrics: Optional[DatasetMetrics] = None
+    # Fields served with a default value because their backend was unavailable
+    degraded: Optional[List[str]] = None
+
+class DailyMetrics(BaseModel):
+    date: str
+    received: int = 0
+    success: int = 0
+    failed: int = 0
     last_synced_time: datetime | None = None
-    metrics: DatasetMetrics
+    # False for today, whose counts are still growing
+    final: bool = True
+
+class DatasetHistory(BaseModel):
+    dataset: str
+    days: List[DailyMetrics]
+
+class SummaryTotals(BaseModel):
+    datasets: int = 0
+    received: int = 0
+    success: int = 0
+    failed: int = 0
+    failure_rate: float = 0.0
+    # Not synced within `stale_after_seconds`, or never
+    stale: int = 0
+    degraded: int = 0
+
+class SummaryGroup(SummaryTotals):
+    # Only the keys selected with `group_by` are set
+    type: Optional[str] = None
+    status: Optional[str] = None
+
+class FleetSummary(SummaryTotals):
+    generation: Optional[int] = None
+    generated_at: Optional[datetime] = None
+    stale_after_seconds: float
+    status: Dict[str, int] = Field(default_factory=dict)
+    groups: Optional[List[SummaryGroup]] = None
+
+class CreateJobStatus(BaseModel):
+    id: str
+    dataset_id: str
+    # queued, running, succeeded or failed
+    status: str
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+    # Of the last attempt; result has the synchronous create response body
+    status_code: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
 
 class TransformationField(BaseModel):
     field: str
@@ -69,4 +121,18 @@ class DatasetCreate(BaseModel):
                     "status": "active"
                 }
             }
-        }
\ No newline at end of file
+        }
+
+class PIITreatment(BaseModel):
+    field: str
+    treatment: str
+
+class DatasetCreateRequest(BaseModel):
+    dataset_purpose: str
+    sample_event: str
+    data_location: str
+    dataset_name: str
+    pii_fields: List[PIITreatment]
+    dedup_key: str
+    timestamp_key: str
+    storage_option: str
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+import httpx
+from pydantic import ValidationError
+from app.core.config import get_settings
+from app.schemas.dataset import DatasetCreateRequest
+from app.services.dataset_service import DatasetService
+from app.services.resilience import BackendUnavailableError
+from app.services.schema_inference import fingerprint, shape_of
+
+settings = get_settings()
+
+
+class InvalidItem:
+    # A batch item that couldn't be decoded, reported in place of the item
+    def __init__(self, error: str):
+        self.error = error
+
+
+class BulkCreator:
+    """Creates a batch of datasets with at most `max_concurrency` in flight.
+
+    Each item goes through schema inference and then creation. Items with
+    the same dataset name and sample event shape share one schema lookup;
+    the name is part of the key because the backend's dataschema request
+    carries it. Local inference is shared across names through its shape
+    cache. Failed items are reported and the batch carries on.
+    """
+
+    def __init__(self, service: DatasetService, max_concurrency: Optional[int] = None):
+        self.service = service
+        self.max_concurrency = max(1, max_concurrency or settings.BATCH_CREATE_MAX_CONCURRENCY)
+
+    async def _schema(self, schemas: Dict[Tuple[str, str], asyncio.Task], request: DatasetCreateRequest, sample_event: Any) -> Dict[str, Any]:
+        key = (request.dataset_name, fingerprint(shape_of(sample_event)))
+        task = schemas.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.service.get_data_schema(request.dataset_name, sample_event))
+            schemas[key] = task
+        # Shielded so a cancelled item doesn't cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    async def create_item(self, index: int, item: Any, schemas: Dict[Tuple[str, str], asyncio.Task]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index}
+        try:
+            if isinstance(item, InvalidItem):
+                return {**result, "ok": False, "status_code": 400, "error": item.error}
+            request = DatasetCreateRequest.model_validate(item)
+            result["dataset_id"] = self.service.format_dataset_id(request.dataset_name)
+            try:
+                sample_event = json.loads(request.sample_event)
+            except json.JSONDecodeError:
+                return {**result, "ok": False, "status_code": 400, "error": "Invalid JSON format in sample_event"}
+
+            schema_body = await self._schema(schemas, request, sample_event)
+            response = await self.service.create_dataset(request, schema_body)
+            try:
+                create_response = response.json()
+            except ValueError:
+                create_response = response.text
+            return {
+                **result,
+                "ok": response.status_code < 400,
+                "status_code": response.status_code,
+                "create_response": create_response
+            }
+        except ValidationError as e:
+            return {**result, "ok": False, "status_code": 422, "error": e.errors(include_url=False, include_context=False)}
+        except httpx.HTTPStatusError as e:
+            return {**result, "ok": False, "status_code": e.response.status_code, "error": "Failed to get schema from API"}
+        except (BackendUnavailableError, httpx.RequestError) as e:
+            return {**result, "ok": False, "status_code": 503, "error": f"Failed to connect to API: {str(e)}"}
+        except Exception as e:
+            return {**result, "ok": False, "status_code": 500, "error": str(e)}
+
+    async def create_iter(self, items: Iterable[Any]) -> AsyncIterator[Dict[str, Any]]:
+        # Yields one result per item in completion order; `index` is the
+        # item's position in the batch
+        schemas: Dict[Tuple[str, str], asyncio.Task] = {}
+        remaining = enumerate(items)
+        pending: Set[asyncio.Task] = set()
+        try:
+            for index, item in remaining:
+                pending.add(asyncio.ensure_future(self.create_item(index, item, schemas)))
+                if len(pending) >= self.max_concurrency:
+                    break
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    next_item = next(remaining, None)
+                    if next_item is not None:
+                        pending.add(asyncio.ensure_future(self.create_item(*next_item, schemas)))
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            for task in schemas.values():
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Failures were reported per item
+                    task.exception()
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, expires_at: Optional[float], stale_until: Optional[float]):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class MetricsCache:
+    """In-process LRU cache for backend metrics.
+
+    Entries either expire after a TTL and may then be served stale for a
+    while (stale-while-revalidate), or are immutable and only leave the
+    cache through LRU eviction.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0, stale_ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> Tuple[str, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS, None
+        now = time.monotonic()
+        if entry.expires_at is None or now < entry.expires_at:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return FRESH, entry.value
+        if entry.stale_until is not None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return STALE, entry.value
+        del self._entries[key]
+        self.misses += 1
+        return MISS, None
+
+    def lookup_many(self, keys: Dict[Any, Hashable]) -> Tuple[Dict[Any, Any], List[Any], List[Any]]:
+        # Returns (values, missing names, stale names) for a {name: key} mapping
+        values: Dict[Any, Any] = {}
+        missing: List[Any] = []
+        stale: List[Any] = []
+        for name, key in keys.items():
+            state, value = self.lookup(key)
+            if state == MISS:
+                missing.append(name)
+                continue
+            values[name] = value
+            if state == STALE:
+                stale.append(name)
+        return values, missing, stale
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, immutable: bool = False) -> None:
+        if self.max_entries <= 0:
+            return
+        if immutable:
+            entry = _Entry(value, None, None)
+        else:
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            entry = _Entry(value, expires_at, expires_at + self.stale_ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set_many(self, items: Iterable[Tuple[Hashable, Any]], ttl: Optional[float] = None, immutable: bool = False) -> None:
+        for key, value in items:
+            self.set(key, value, ttl=ttl, immutable=immutable)
+
+    def refresh(
+        self,
+        refresh_key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        store: Callable[[Any], None]
+    ) -> None:
+        # Run `loader` in the background unless a refresh for the same key is
+        # already in flight; `store` puts the result back into the cache.
+        if refresh_key in self._refreshing:
+            return
+
+        async def run() -> None:
+            try:
+                store(await loader())
+                self.refreshes += 1
+            except Exception:
+                self.refresh_errors += 1
+            finally:
+                self._refreshing.pop(refresh_key, None)
+
+        self._refreshing[refresh_key] = asyncio.ensure_future(run())
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        immutable: bool = False
+    ) -> Any:
+        state, value = self.lookup(key)
+        if state == FRESH:
+            return value
+        store = lambda result: self.set(key, result, ttl=ttl, immutable=immutable)
+        if state == STALE:
+            self.refresh(key, loader, store)
+            return value
+        value = await loader()
+        store(value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors
+        }
+
+    async def aclose(self) -> None:
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshing.clear()
@@ -0,0 +1,70 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers of the same key.
+
+    Callers wait on a shielded task, so a cancelled caller never cancels the
+    call for the others; the call itself is only cancelled once every caller
+    waiting on it is gone.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved when nobody is left to await it
+            task.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done, key=key: self._done(key, done))
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0:
+                    # Callers arriving before the task finishes cancelling
+                    # start a new call instead of joining this one
+                    del self._inflight[key]
+                    del self._waiters[key]
+                    task.cancel()
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight)
+        }
+
+
+def request_key(path: str, payload: Dict[str, Any]) -> str:
+    # Per-request envelope fields don't change what the backend returns
+    canonical = {key: value for key, value in payload.items() if key != "ts"}
+    params = canonical.get("params")
+    if isinstance(params, dict) and "msgid" in params:
+        canonical["params"] = {key: value for key, value in params.items() if key != "msgid"}
+    return path + "\n" + json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
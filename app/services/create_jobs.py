@@ -0,0 +1,370 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import httpx
+from app.core.config import get_settings
+from app.schemas.dataset import DatasetCreateRequest
+from app.services.dataset_service import DatasetService
+from app.services.resilience import BackendUnavailableError
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+COLUMNS = "id, dataset_id, status, attempts, request, status_code, result, error, created_at, updated_at"
+
+
+class QueueFullError(Exception):
+    """Too many create jobs are waiting to run."""
+
+
+class JobConflictError(Exception):
+    """The dataset already has a job for a different request."""
+
+    def __init__(self, job: "CreateJob"):
+        super().__init__(f"Dataset {job.dataset_id} already has create job {job.id} for a different request")
+        self.job = job
+
+
+class CreateJob(NamedTuple):
+    id: str
+    dataset_id: str
+    status: str
+    attempts: int
+    request: Dict[str, Any]
+    status_code: Optional[int]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+
+
+class CreateJobStore:
+    """Dataset creation jobs in a local SQLite database.
+
+    There is at most one job per dataset id. Queued jobs become due at
+    `run_at`; a claimed job is leased until `run_at` and is claimed again
+    if its worker went away without finishing it, so jobs survive restarts
+    and can be shared by several processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS create_jobs ("
+                " id TEXT PRIMARY KEY,"
+                " dataset_id TEXT NOT NULL UNIQUE,"
+                " status TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " request TEXT NOT NULL,"
+                " status_code INTEGER,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " run_at REAL NOT NULL"
+                ")"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS create_jobs_due ON create_jobs (status, run_at)")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        def run() -> Any:
+            with self._lock:
+                return func(self._connect())
+        return await asyncio.to_thread(run)
+
+    async def _transaction(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        def run(conn: sqlite3.Connection) -> Any:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+        return await self._run(run)
+
+    @staticmethod
+    def _job(row: Optional[Tuple]) -> Optional[CreateJob]:
+        if row is None:
+            return None
+        return CreateJob(
+            row[0], row[1], row[2], row[3], json.loads(row[4]), row[5],
+            json.loads(row[6]) if row[6] is not None else None, row[7], row[8], row[9]
+        )
+
+    async def get(self, job_id: str) -> Optional[CreateJob]:
+        return self._job(await self._run(lambda conn: conn.execute(
+            f"SELECT {COLUMNS} FROM create_jobs WHERE id = ?", (job_id,)
+        ).fetchone()))
+
+    async def submit(self, dataset_id: str, request: Dict[str, Any], max_pending: Optional[int] = None) -> Tuple[CreateJob, bool]:
+        # Returns (job, created). A dataset with a queued, running or
+        # succeeded job for the same request keeps it, and one for another
+        # request raises JobConflictError; a failed job is queued again with
+        # the new request. QueueFullError once `max_pending` jobs are queued
+        # or running.
+        def submit(conn: sqlite3.Connection) -> Tuple[CreateJob, bool]:
+            existing = self._job(conn.execute(
+                f"SELECT {COLUMNS} FROM create_jobs WHERE dataset_id = ?", (dataset_id,)
+            ).fetchone())
+            if existing is not None and existing.status != FAILED:
+                if existing.request != request:
+                    raise JobConflictError(existing)
+                return existing, False
+            if max_pending is not None:
+                pending = conn.execute(
+                    "SELECT COUNT(*) FROM create_jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+                ).fetchone()[0]
+                if pending >= max_pending:
+                    raise QueueFullError(f"{max_pending} create jobs already pending")
+            now = time.time()
+            body = json.dumps(request)
+            if existing is None:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO create_jobs (id, dataset_id, status, request, created_at, updated_at, run_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, dataset_id, QUEUED, body, now, now, now)
+                )
+            else:
+                job_id = existing.id
+                conn.execute(
+                    "UPDATE create_jobs SET status = ?, attempts = 0, request = ?, status_code = NULL,"
+                    " result = NULL, error = NULL, updated_at = ?, run_at = ? WHERE id = ?",
+                    (QUEUED, body, now, now, job_id)
+                )
+            return self._job(conn.execute(f"SELECT {COLUMNS} FROM create_jobs WHERE id = ?", (job_id,)).fetchone()), True
+        return await self._transaction(submit)
+
+    async def claim(self, lease: float, max_attempts: Optional[int] = None) -> Optional[CreateJob]:
+        # The next due job, leased for `lease` seconds; expired leases of
+        # running jobs are taken over. Due jobs that already had
+        # `max_attempts` attempts, e.g. ones whose worker kept dying, are
+        # failed instead of leased again.
+        def claim(conn: sqlite3.Connection) -> Optional[CreateJob]:
+            now = time.time()
+            while True:
+                row = conn.execute(
+                    "SELECT id, attempts FROM create_jobs WHERE status IN (?, ?) AND run_at <= ? ORDER BY run_at LIMIT 1",
+                    (QUEUED, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                if max_attempts is None or row[1] < max_attempts:
+                    break
+                conn.execute(
+                    "UPDATE create_jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (FAILED, f"Gave up after {row[1]} attempts", now, row[0])
+                )
+            conn.execute(
+                "UPDATE create_jobs SET status = ?, attempts = attempts + 1, updated_at = ?, run_at = ? WHERE id = ?",
+                (RUNNING, now, now + lease, row[0])
+            )
+            return self._job(conn.execute(f"SELECT {COLUMNS} FROM create_jobs WHERE id = ?", (row[0],)).fetchone())
+        return await self._transaction(claim)
+
+    async def finish(
+        self,
+        job_id: str,
+        status: str,
+        status_code: Optional[int],
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        delay: Optional[float] = None
+    ) -> None:
+        # `status` QUEUED with a `delay` schedules another attempt
+        now = time.time()
+        await self._run(lambda conn: conn.execute(
+            "UPDATE create_jobs SET status = ?, status_code = ?, result = ?, error = ?, updated_at = ?, run_at = ?"
+            " WHERE id = ?",
+            (status, status_code, json.dumps(result) if result is not None else None, error, now, now + (delay or 0), job_id)
+        ))
+
+    async def purge(self, older_than: float) -> int:
+        # Drops finished jobs last updated more than `older_than` seconds ago
+        return await self._run(lambda conn: conn.execute(
+            "DELETE FROM create_jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (SUCCEEDED, FAILED, time.time() - older_than)
+        ).rowcount)
+
+    async def aclose(self) -> None:
+        def close(conn: sqlite3.Connection) -> None:
+            conn.close()
+            self._conn = None
+        if self._conn is not None:
+            await self._run(close)
+
+
+class CreateJobQueue:
+    """Runs dataset creation jobs from a CreateJobStore on a pool of workers.
+
+    Each job infers the schema and creates the dataset, like a synchronous
+    POST /datasets/create. Backend errors (5xx, timeouts, connection
+    failures) are retried with exponential backoff up to `max_attempts`;
+    other failures are final. A 409 from a retry counts as success, since
+    the attempt before it may have created the dataset. Jobs are keyed by
+    formatted dataset id, so submitting the same dataset again returns its
+    existing job.
+    """
+
+    def __init__(
+        self,
+        service: DatasetService,
+        store: CreateJobStore,
+        workers: int = 4,
+        max_pending: int = 1000,
+        max_attempts: int = 5,
+        retry_delay: float = 2.0,
+        lease: float = 120.0,
+        poll_interval: float = 1.0,
+        retention: float = 7 * 86400.0
+    ):
+        self.service = service
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._purged_at = 0.0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def submit(self, request: DatasetCreateRequest) -> Tuple[CreateJob, bool]:
+        job, created = await self.store.submit(
+            self.service.format_dataset_id(request.dataset_name),
+            request.model_dump(),
+            self.max_pending
+        )
+        if created:
+            self._wakeup.set()
+        return job, created
+
+    async def get(self, job_id: str) -> Optional[CreateJob]:
+        return await self.store.get(job_id)
+
+    async def _create(self, job: CreateJob) -> Tuple[str, int, Optional[Dict[str, Any]], Optional[str], bool]:
+        # (status, status code, result, error, retryable)
+        try:
+            request = DatasetCreateRequest.model_validate(job.request)
+            sample_event = json.loads(request.sample_event)
+            schema_body = await self.service.get_data_schema(request.dataset_name, sample_event)
+            response = await self.service.create_dataset(request, schema_body)
+        except httpx.HTTPStatusError as e:
+            return FAILED, e.response.status_code, None, "Failed to get schema from API", e.response.status_code >= 500
+        except (BackendUnavailableError, httpx.RequestError) as e:
+            return FAILED, 503, None, f"Failed to connect to API: {str(e)}", True
+        except Exception as e:
+            return FAILED, 500, None, str(e), False
+        try:
+            create_response = response.json()
+        except ValueError:
+            create_response = response.text
+        result = {"schema_response": schema_body, "create_response": create_response}
+        if response.status_code < 400:
+            return SUCCEEDED, response.status_code, result, None, False
+        if response.status_code == 409 and job.attempts > 1:
+            # An earlier attempt that timed out or got a 5xx may have
+            # created the dataset before failing
+            return SUCCEEDED, response.status_code, result, None, False
+        return FAILED, response.status_code, result, "Failed to create dataset", response.status_code >= 500
+
+    async def _process(self, job: CreateJob) -> None:
+        try:
+            status, status_code, result, error, retryable = await self._create(job)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job to the next worker right away
+            await asyncio.shield(self.store.finish(job.id, QUEUED, None))
+            raise
+        if status == FAILED and retryable and job.attempts < self.max_attempts:
+            self.retried += 1
+            delay = self.retry_delay * 2 ** (job.attempts - 1)
+            logger.info(
+                "create job retry",
+                extra={"job_id": job.id, "dataset_id": job.dataset_id, "status_code": status_code, "error": error, "delay": delay}
+            )
+            await self.store.finish(job.id, QUEUED, status_code, result, error, delay=delay)
+            return
+        if status == SUCCEEDED:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+            logger.warning(
+                "create job failed",
+                extra={"job_id": job.id, "dataset_id": job.dataset_id, "status_code": status_code, "error": error}
+            )
+        await self.store.finish(job.id, status, status_code, result, error)
+
+    async def _purge(self) -> None:
+        if time.monotonic() - self._purged_at < 3600:
+            return
+        self._purged_at = time.monotonic()
+        await self.store.purge(self.retention)
+
+    async def _worker(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self.store.claim(self.lease, self.max_attempts)
+            except Exception:
+                logger.exception("create job claim failed")
+                job = None
+            if job is not None:
+                try:
+                    await self._process(job)
+                except Exception:
+                    # Left running; another worker takes it over once the
+                    # lease expires
+                    logger.exception("create job processing failed", extra={"job_id": job.id, "dataset_id": job.dataset_id})
+                continue
+            try:
+                await self._purge()
+            except Exception:
+                logger.exception("create job purge failed")
+            # Jobs submitted to other workers' processes, and retries, are
+            # picked up on the next poll. asyncio.wait rather than wait_for,
+            # which can swallow a cancellation that arrives as the timeout
+            # expires; the event is shared, so no timer may set it.
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait((waiter,), timeout=self.poll_interval)
+            finally:
+                waiter.cancel()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.store.aclose()
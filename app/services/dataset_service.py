@@ -1,18 +1,570 @@
-from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
 import httpx
 import uuid
 import re
-from typing import List, Dict, Any, Tuple
+import sqlite3
+from typing import Awaitable, Callable, List, Dict, Any, Iterable, Optional, Set, Tuple
 from app.core.config import get_settings
+from app.core.http_client import create_http_client
+from app.core.instrumentation import add_timing
+from app.core.metrics import BACKEND_ERRORS, BACKEND_REQUEST_DURATION, BACKEND_REQUESTS_IN_FLIGHT, outcome
+from app.schemas.dataset import DatasetCreateRequest
+from app.services.cache import MISS, MetricsCache
+from app.services.coalescing import SingleFlight, request_key
+from app.services.metrics_store import DailyRow, MetricsStore
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.resilience import BackendPolicy, CircuitBreaker
+from app.services.schema_inference import SchemaInference
+from app.services.watermarks import LastSyncedWatermarks
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Backend endpoint ids, as used in the `?id=` query of /v2/data/metrics
+EVENTS_COUNT = "totalProcessedEventsCount"
+FAILED_EVENTS_COUNT = "failedEventsCountPerDataset"
+LAST_SYNCED_TIME = "lastSyncedTime"
+HEALTH = "health"
+
+# Read-only backend calls; concurrent callers may share them and they run
+# under a per-endpoint deadline and circuit breaker
+COALESCED_PATHS = ("/v2/datasets/list", "/v2/data/metrics", "/v2/datasets/health")
+# Idempotent metric reads that may be hedged
+HEDGED_ENDPOINTS = (EVENTS_COUNT, FAILED_EVENTS_COUNT, LAST_SYNCED_TIME, HEALTH)
+
+# (job, counter) pairs summed into the failed events count of a dataset. The
+# flink metric name is `flink_taskmanager_job_task_operator_{job}_{dataset}_{counter}`
+# with dashes in the dataset id replaced by underscores.
+FAILED_EVENT_METRICS = [
+    ("PipelinePreprocessorJob", "dedup_failed_count"),
+    ("PipelinePreprocessorJob", "validator_failed_count"),
+    ("ExtractorJob", "extractor_failed_count"),
+    ("ExtractorJob", "extractor_duplicate_count"),
+    ("TransformerJob", "transform_failed_count"),
+    ("DruidRouterJob", "failed_event_count"),
+]
 
 class DatasetService:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = settings.BACKEND_URL
+        self._client = client
+        self.watermarks = LastSyncedWatermarks(settings.LAST_SYNCED_WATERMARK_OVERLAP_SECONDS * 1000)
+        self.cache = MetricsCache(
+            max_entries=settings.METRICS_CACHE_MAX_ENTRIES if settings.METRICS_CACHE_ENABLED else 0,
+            ttl=settings.METRICS_CACHE_TTL_SECONDS,
+            stale_ttl=settings.METRICS_CACHE_STALE_SECONDS
+        )
+        self.scheduler = RefreshScheduler(
+            self.cache,
+            initial_interval=settings.METRICS_CACHE_TTL_SECONDS,
+            min_interval=settings.REFRESH_MIN_INTERVAL_SECONDS,
+            max_interval=settings.REFRESH_MAX_INTERVAL_SECONDS,
+            max_rate=settings.REFRESH_MAX_CALLS_PER_SECOND,
+            forget_after=settings.REFRESH_FORGET_AFTER_SECONDS
+        ) if settings.REFRESH_SCHEDULER and settings.METRICS_CACHE_ENABLED else None
+        self.single_flight = SingleFlight()
+        self.policies: Dict[str, BackendPolicy] = {}
+        self.schemas = SchemaInference(settings.SCHEMA_CACHE_MAX_ENTRIES)
+        self.store = MetricsStore(settings.METRICS_STORE_PATH) if settings.METRICS_STORE_PATH else None
+        self._writes: Set[asyncio.Task] = set()
+        self._call_listeners: List[Callable[[str, float, bool], None]] = []
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # The application lifespan installs the shared client; this fallback
+        # keeps the service usable outside of it (scripts, shells).
+        if self._client is None or self._client.is_closed:
+            self._client = create_http_client(settings)
+        return self._client
+
+    def use_client(self, client: httpx.AsyncClient) -> None:
+        self._client = client
+
+    def subscribe_calls(self, listener: Callable[[str, float, bool], None]) -> None:
+        # Called with (endpoint id, seconds, ok) after every backend call that
+        # wasn't cancelled; failures and 5xx responses aren't ok
+        self._call_listeners.append(listener)
+
+    async def aclose(self) -> None:
+        if self.scheduler is not None:
+            await self.scheduler.aclose()
+        await self.cache.aclose()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        if self.store is not None:
+            await self.store.aclose()
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    @staticmethod
+    def endpoint_id(path: str) -> str:
+        # `?id=` for the metrics proxy, the last path segment otherwise
+        url = httpx.URL(path)
+        return url.params.get('id') or url.path.rstrip('/').rsplit('/', 1)[-1]
+
+    def policy(self, endpoint_id: str) -> BackendPolicy:
+        policy = self.policies.get(endpoint_id)
+        if policy is None:
+            policy = BackendPolicy(
+                endpoint_id,
+                timeout=settings.BACKEND_TIMEOUTS.get(endpoint_id, settings.BACKEND_TIMEOUT_SECONDS),
+                breaker=CircuitBreaker(
+                    settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                    settings.CIRCUIT_BREAKER_RESET_SECONDS
+                ),
+                hedge_percentile=settings.HEDGE_PERCENTILE if settings.HEDGE_REQUESTS and endpoint_id in HEDGED_ENDPOINTS else None,
+                hedge_min_samples=settings.HEDGE_MIN_SAMPLES,
+                is_failure=lambda response: response.status_code >= 500
+            )
+            self.policies[endpoint_id] = policy
+        return policy
+
+    async def _send(self, endpoint_id: str, url: str, payload: Dict) -> httpx.Response:
+        # One actual HTTP call to the backend (hedged reads make several)
+        BACKEND_REQUESTS_IN_FLIGHT.inc(endpoint=endpoint_id)
+        started = time.perf_counter()
+        result = "error"
+        try:
+            response = await self.client.post(url, json=payload)
+            result = outcome(response.status_code)
+            if response.status_code >= 300:
+                BACKEND_ERRORS.inc(endpoint=endpoint_id, kind=f"http_{response.status_code}")
+            return response
+        except asyncio.CancelledError:
+            result = "cancelled"
+            raise
+        except Exception as e:
+            BACKEND_ERRORS.inc(endpoint=endpoint_id, kind=type(e).__name__)
+            logger.warning("backend call failed", extra={"endpoint": endpoint_id, "error": str(e)})
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            BACKEND_REQUESTS_IN_FLIGHT.dec(endpoint=endpoint_id)
+            BACKEND_REQUEST_DURATION.observe(elapsed, endpoint=endpoint_id, outcome=result)
+            add_timing(f"backend_{endpoint_id}", elapsed)
+            if result != "cancelled":
+                for listener in self._call_listeners:
+                    listener(endpoint_id, elapsed, result not in ("error", "5xx"))
+            logger.debug(
+                "backend call",
+                extra={"endpoint": endpoint_id, "outcome": result, "duration_ms": round(elapsed * 1000, 1)}
+            )
+
+    async def post(self, path: str, payload: Dict) -> httpx.Response:
+        url = f'{self.base_url}{path}'
+        endpoint_id = self.endpoint_id(path)
+        if not path.startswith(COALESCED_PATHS):
+            return await self._send(endpoint_id, url, payload)
+
+        policy = self.policy(endpoint_id)
+        send = lambda: policy.call(
+            lambda: self._send(endpoint_id, url, payload),
+            hedge=policy.hedge_percentile is not None
+        )
+        if settings.COALESCE_BACKEND_CALLS:
+            return await self.single_flight.do(request_key(path, payload), send)
+        return await send()
+
+    async def get_live_datasets(self) -> List[Dict[str, Any]]:
+        payload = {
+            "id": "api.datasets.list",
+            "ver": "v2",
+            "ts": datetime.utcnow().isoformat(),
+            "params": {
+                "msgid": str(uuid.uuid4())
+            },
+            "request": {
+                "filters": {
+                    "status": "Live"
+                }
+            }
+        }
+        response = await self.post('/v2/datasets/list', payload)
+        if response.status_code != 200:
+            logger.warning("datasets list failed", extra={"status_code": response.status_code})
+        response.raise_for_status()
+        return response.json().get('result', {}).get('data', [])
+
+    async def get_data_schema(self, dataset_name: str, sample_event: Any) -> Dict[str, Any]:
+        # Body of a /v2/datasets/dataschema response for the sample event
+        mode = settings.SCHEMA_INFERENCE_MODE
+        key, schema = self.schemas.infer(sample_event) if mode != "backend" else (None, None)
+        if schema is not None and mode == "local":
+            return {
+                "id": "api.datasets.dataschema",
+                "ver": "1.0",
+                "ts": datetime.utcnow().isoformat(),
+                "params": {"status": "SUCCESS", "msgid": str(uuid.uuid4())},
+                "responseCode": "OK",
+                "result": {"schema": schema}
+            }
+
+        payload = {
+            "id": "api.datasets.dataschema",
+            "ver": "1.0",
+            "ts": datetime.utcnow().isoformat(),
+            "params": {
+                "msgid": str(uuid.uuid4())
+            },
+            "request": {
+                "data": [sample_event] if sample_event else [],
+                "config": {
+                    "dataset": dataset_name
+                }
+            }
+        }
+        response = await self.post('/v2/datasets/dataschema', payload)
+        if response.status_code != 200:
+            logger.warning("dataschema failed", extra={"status_code": response.status_code})
+        response.raise_for_status()
+        result = response.json()
+        if schema is not None:
+            self.schemas.verify(key, schema, result.get('result', {}).get('schema'))
+        return result
+
+    def build_create_payload(self, request: DatasetCreateRequest, schema_body: Dict[str, Any]) -> Dict[str, Any]:
+        schema_result = schema_body.get('result', {}).get('schema', {})
+        
+        if not schema_result:
+            schema_result = {
+                "$schema": "https://json-schema.org/draft/2020-12/schema",
+                "type": "object",
+                "properties": {},
+                "additionalProperties": True
+            }
+
+        formatted_dataset_id = self.format_dataset_id(request.dataset_name)
+        dataset_type = self.validate_type(request.dataset_purpose)
+        
+        transformations = []
+        for field in request.pii_fields:
+            transformations.append({
+                "field_key": field.field,
+                "transformation_function": {
+                    "type": "mask" if field.treatment == 'mask' else 'encrypt',
+                    "expr": field.field,
+                    "category": "pii"
+                },
+                "mode": "Strict"
+            })
+
+        # Create dataset payload
+        dataset_payload = {
+            "id": "api.datasets.create",
+            "ver": "1.0",
+            "ts": datetime.utcnow().isoformat(),
+            "params": {
+                "msgid": str(uuid.uuid4())
+            },
+            "request": {
+                "dataset_id": formatted_dataset_id,
+                "type": dataset_type,
+                "name": request.dataset_name,
+                "validation_config": {
+                    "validate": True,
+                    "mode": "Strict"
+                },
+                "extraction_config": {
+                    "is_batch_event": True,
+                    "extraction_key": "events",
+                    "dedup_config": {
+                        "drop_duplicates": True,
+                        "dedup_key": request.dedup_key
+                    }
+                },
+                "dedup_config": {
+                    "drop_duplicates": True,
+                    "dedup_key": request.dedup_key
+                },
+                "data_schema": schema_result,
+                "dataset_config": {
+                    "indexing_config": {
+                        "olap_store_enabled": request.storage_option.lower() == 'apache druid',
+                        "lakehouse_enabled": request.storage_option.lower() == 'hudi',
+                        "cache_enabled": False
+                    },
+                    "keys_config": {
+                        "timestamp_key": request.timestamp_key
+                    }
+                },
+                "transformations_config": transformations,
+                "connectors_config": self.get_connector_config(request.data_location, request.dataset_name)
+            }
+        }
+        return dataset_payload
+
+    async def create_dataset(self, request: DatasetCreateRequest, schema_body: Dict[str, Any]) -> httpx.Response:
+        response = await self.post('/v2/datasets/create', self.build_create_payload(request, schema_body))
+        logger.info(
+            "dataset create",
+            extra={"dataset_id": self.format_dataset_id(request.dataset_name), "status_code": response.status_code}
+        )
+        return response
+
+    def _persist(self, rows: Iterable[Tuple[str, date, Dict[str, Optional[int]]]]) -> None:
+        # Write completed days to the metrics store in the background
+        if self.store is None:
+            return
+        task = asyncio.ensure_future(self.store.update(list(rows)))
+        self._writes.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._writes.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning("metrics store write failed", extra={"error": str(task.exception())})
+        task.add_done_callback(done)
+
+    @staticmethod
+    def _completed_day(start_time: datetime, end_time: datetime) -> Optional[date]:
+        # The day an interval covers, if it is a whole day that has ended
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        whole_day = (
+            start_time.time() == datetime.min.time()
+            and end_time.date() == start_time.date()
+            and end_time.time() >= datetime.max.time().replace(second=59, microsecond=0)
+        )
+        if whole_day and end_time < today_start:
+            return start_time.date()
+        return None
+
+    async def warm_cache(self) -> None:
+        # Seed yesterday's counts from the metrics store, so a restart doesn't
+        # query them again
+        if self.store is None:
+            return
+        start_time, end_time = self.get_time_intervals()['yesterday']
+        interval, immutable = self._interval_key(start_time, end_time)
+        day = self._completed_day(start_time, end_time)
+        if day is None or not immutable:
+            return
+        try:
+            rows = await self.store.get_day(day)
+        except sqlite3.Error as e:
+            # The store is an optimization; serve without it
+            logger.warning("metrics store read failed", extra={"error": str(e)})
+            return
+        self.cache.set_many((
+            ((dataset_id, EVENTS_COUNT, interval), row.processed)
+            for dataset_id, row in rows.items() if row.processed is not None
+        ), immutable=True)
+        self.cache.set_many((
+            ((dataset_id, FAILED_EVENTS_COUNT, interval), row.failed)
+            for dataset_id, row in rows.items() if row.failed is not None
+        ), immutable=True)
+
+    @staticmethod
+    def _interval_key(start_time: datetime, end_time: datetime) -> Tuple[Tuple[str, str], bool]:
+        # Completed days (as split by get_time_intervals) never change and are
+        # cached as immutable; the open interval of today is keyed by its start.
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if end_time < today_start:
+            return (start_time.isoformat(), end_time.isoformat()), True
+        return (start_time.isoformat(), "open"), False
+
+    async def get_events_count(self, dataset_id: str, start_time: datetime, end_time: datetime) -> int:
+        interval, immutable = self._interval_key(start_time, end_time)
+        return await self.cache.get_or_load(
+            (dataset_id, EVENTS_COUNT, interval),
+            lambda: self._fetch_events_count(dataset_id, start_time, end_time),
+            immutable=immutable
+        )
 
     async def get_failed_events_count(self, dataset_id: str, start_time: datetime, end_time: datetime) -> int:
-        updated_dataset_id = dataset_id.replace("-", "_")
+        interval, immutable = self._interval_key(start_time, end_time)
+        return await self.cache.get_or_load(
+            (dataset_id, FAILED_EVENTS_COUNT, interval),
+            lambda: self._fetch_failed_events_count(dataset_id, start_time, end_time),
+            immutable=immutable
+        )
+
+    async def get_failed_events_counts(self, dataset_ids: List[str], start_time: datetime, end_time: datetime) -> Dict[str, int]:
+        interval, immutable = self._interval_key(start_time, end_time)
+        keys = {dataset_id: (dataset_id, FAILED_EVENTS_COUNT, interval) for dataset_id in dataset_ids}
+        day = self._completed_day(start_time, end_time)
+
+        def store(counts: Dict[str, int]) -> None:
+            self.cache.set_many(
+                ((keys[dataset_id], count) for dataset_id, count in counts.items() if dataset_id in keys),
+                immutable=immutable
+            )
+            if not immutable:
+                self._observe(FAILED_EVENTS_COUNT, counts)
+            if day is not None:
+                self._persist((dataset_id, day, {"failed": count}) for dataset_id, count in counts.items())
+
+        counts, missing, stale = self.cache.lookup_many(keys)
+        if not missing:
+            if stale:
+                self.cache.refresh(
+                    ("*", FAILED_EVENTS_COUNT, interval),
+                    lambda: self._fetch_failed_events_counts(dataset_ids, start_time, end_time),
+                    store
+                )
+            return counts
+        # The batched query costs the same for one or all datasets
+        counts = await self._fetch_failed_events_counts(dataset_ids, start_time, end_time)
+        store(counts)
+        return counts
+
+    async def get_failed_events_counts_by_interval(
+        self,
+        dataset_ids: List[str],
+        time_intervals: Dict[str, Tuple[datetime, datetime]]
+    ) -> Dict[str, Dict[str, int]]:
+        names = list(time_intervals)
+        results = await asyncio.gather(*(
+            self.get_failed_events_counts(dataset_ids, *time_intervals[name])
+            for name in names
+        ))
+        return dict(zip(names, results))
+
+    async def get_events_summary(
+        self,
+        dataset_ids: List[str],
+        time_intervals: Dict[str, Tuple[datetime, datetime]]
+    ) -> Dict[str, Dict[str, Any]]:
+        today, today_immutable = self._interval_key(*time_intervals['today'])
+        yesterday, yesterday_immutable = self._interval_key(*time_intervals['yesterday'])
+        today_keys = {dataset_id: (dataset_id, EVENTS_COUNT, today) for dataset_id in dataset_ids}
+        yesterday_keys = {dataset_id: (dataset_id, EVENTS_COUNT, yesterday) for dataset_id in dataset_ids}
+        yesterday_day = self._completed_day(*time_intervals['yesterday'])
+
+        def store(summary: Dict[str, Dict[str, Any]], include_yesterday: bool = True) -> None:
+            self.cache.set_many(
+                ((today_keys[dataset_id], entry["today"]) for dataset_id, entry in summary.items() if dataset_id in today_keys),
+                immutable=today_immutable
+            )
+            if not today_immutable:
+                self._observe(EVENTS_COUNT, {dataset_id: entry["today"] for dataset_id, entry in summary.items()})
+            if include_yesterday:
+                self.cache.set_many(
+                    ((yesterday_keys[dataset_id], entry["yesterday"]) for dataset_id, entry in summary.items() if dataset_id in yesterday_keys),
+                    immutable=yesterday_immutable
+                )
+                if yesterday_day is not None:
+                    self._persist(
+                        (dataset_id, yesterday_day, {"processed": entry["yesterday"]})
+                        for dataset_id, entry in summary.items()
+                    )
+
+        today_counts, today_missing, today_stale = self.cache.lookup_many(today_keys)
+        yesterday_counts, yesterday_missing, _ = self.cache.lookup_many(yesterday_keys)
+        if not today_missing and not yesterday_missing:
+            if today_stale:
+                self.cache.refresh(
+                    ("*", EVENTS_COUNT, today),
+                    lambda: self._fetch_events_summary(dataset_ids, time_intervals, include_yesterday=False),
+                    lambda summary: store(summary, include_yesterday=False)
+                )
+            return {
+                dataset_id: {
+                    "today": today_counts[dataset_id],
+                    "yesterday": yesterday_counts[dataset_id],
+                    "last_synced_time": self.watermarks.get(dataset_id)
+                }
+                for dataset_id in dataset_ids
+            }
+
+        # Only scan yesterday again when some of its counts are not cached
+        include_yesterday = bool(yesterday_missing)
+        summary = await self._fetch_events_summary(dataset_ids, time_intervals, include_yesterday=include_yesterday)
+        store(summary, include_yesterday=include_yesterday)
+        if not include_yesterday:
+            for dataset_id, entry in summary.items():
+                entry["yesterday"] = yesterday_counts.get(dataset_id, 0)
+        for dataset_id, entry in summary.items():
+            if entry["last_synced_time"] is None:
+                entry["last_synced_time"] = self.watermarks.get(dataset_id)
+        return summary
+
+    def _observe(self, signal: str, values: Dict[str, Any]) -> None:
+        # Today's batched counts tell the scheduler which datasets are active
+        if self.scheduler is not None:
+            for dataset_id, value in values.items():
+                self.scheduler.observe(dataset_id, signal, value)
+
+    async def _scheduled(self, dataset_id: str, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # Per-dataset reads refreshed by the scheduler instead of on expiry
+        if self.scheduler is None:
+            return await self.cache.get_or_load(key, loader)
+        state, value = self.cache.lookup(key)
+        if state == MISS:
+            value = await loader()
+        elif self.scheduler.touch(key):
+            return value
+        self.scheduler.track(key, dataset_id, loader, value)
+        return value
+
+    async def get_last_synced_time(self, dataset_id: str) -> int:
+        return await self._scheduled(
+            dataset_id,
+            (dataset_id, LAST_SYNCED_TIME, None),
+            lambda: self._fetch_last_synced_time(dataset_id)
+        )
+
+    async def get_dataset_health(self, dataset_id: str) -> str:
+        return await self._scheduled(
+            dataset_id,
+            (dataset_id, HEALTH, None),
+            lambda: self._fetch_dataset_health(dataset_id)
+        )
+
+    async def get_history(self, dataset_id: str, days: int) -> List[Dict[str, Any]]:
+        # Daily metrics for the last `days` days up to today. Completed days
+        # come from the metrics store when it has them; everything else is
+        # read with one daily query per backend and stored for next time.
+        today = date.today()
+        first_day = today - timedelta(days=days - 1)
+        stored: Dict[date, DailyRow] = {}
+        if self.store is not None and days > 1:
+            try:
+                stored = await self.store.get_days(dataset_id, first_day, today - timedelta(days=1))
+            except sqlite3.Error as e:
+                logger.warning("metrics store read failed", extra={"dataset_id": dataset_id, "error": str(e)})
+        all_days = [first_day + timedelta(days=offset) for offset in range(days)]
+        missing = [day for day in all_days if day not in stored or not stored[day].complete]
+
+        events, failed = await asyncio.gather(
+            self._fetch_daily_events(dataset_id, missing[0]),
+            self._fetch_daily_failed(dataset_id, missing[0], today)
+        )
+        for day in missing:
+            processed, last_synced_time = events.get(day, (0, None))
+            # Days without a Prometheus sample (no series, or past its
+            # retention) are served as 0 but left unset in the store, so
+            # they're asked for again instead of kept as final
+            stored[day] = DailyRow(day, processed, failed.get(day), last_synced_time)
+        self._persist(
+            (dataset_id, day, stored[day]._asdict())
+            for day in missing if day < today
+        )
+
+        history = []
+        for day in all_days:
+            row = stored[day]
+            history.append({
+                "date": day.isoformat(),
+                "received": row.processed + (row.failed or 0),
+                "success": row.processed,
+                "failed": row.failed or 0,
+                "last_synced_time": row.last_synced_time,
+                "final": day < today
+            })
+        return history
+
+    @staticmethod
+    def _failed_events_query(metric_key: str, window: int) -> str:
+        # Sum of the raw samples of a dataset's failed event counters
+        return " + ".join(
+            f"sum(sum_over_time(flink_taskmanager_job_task_operator_{job}_{metric_key}_{counter}[{window}s]))"
+            for job, counter in FAILED_EVENT_METRICS
+        )
+
+    async def _fetch_failed_events_count(self, dataset_id: str, start_time: datetime, end_time: datetime) -> int:
         payload = {
             "query": {
                 "type": "api",
@@ -20,13 +572,9 @@ class DatasetService:
                 "url": "/prom/api/v1/query",
                 "method": "GET",
                 "params": {
-                    "query": (
-                        f"sum(sum_over_time(flink_taskmanager_job_task_operator_PipelinePreprocessorJob_{updated_dataset_id}_dedup_failed_count[{int(end_time.timestamp() - start_time.timestamp())}s])) + "
-                        f"sum(sum_over_time(flink_taskmanager_job_task_operator_PipelinePreprocessorJob_{updated_dataset_id}_validator_failed_count[{int(end_time.timestamp() - start_time.timestamp())}s])) + "
-                        f"sum(sum_over_time(flink_taskmanager_job_task_operator_ExtractorJob_{updated_dataset_id}_extractor_failed_count[{int(end_time.timestamp() - start_time.timestamp())}s])) + "
-                        f"sum(sum_over_time(flink_taskmanager_job_task_operator_ExtractorJob_{updated_dataset_id}_extractor_duplicate_count[{int(end_time.timestamp() - start_time.timestamp())}s])) + "
-                        f"sum(sum_over_time(flink_taskmanager_job_task_operator_TransformerJob_{updated_dataset_id}_transform_failed_count[{int(end_time.timestamp() - start_time.timestamp())}s])) + "
-                        f"sum(sum_over_time(flink_taskmanager_job_task_operator_DruidRouterJob_{updated_dataset_id}_failed_event_count[{int(end_time.timestamp() - start_time.timestamp())}s]))"
+                    "query": self._failed_events_query(
+                        dataset_id.replace("-", "_"),
+                        int(end_time.timestamp() - start_time.timestamp())
                     ),
                     "time": int(end_time.timestamp())
                 },
@@ -37,66 +585,241 @@ class DatasetService:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f'{self.base_url}/v2/data/metrics?id=failedEventsCountPerDataset',
-                json=payload
-            )
-            print("get_failed_events_count response:", response.json())  # Print statement added
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('status') == 'success' and isinstance(result.get('data', {}).get('result'), list):
-                    results = result['data']['result']
-                    if results and len(results) > 0 and 'value' in results[0]:
-                        try:
-                            return int(float(results[0]['value'][1]))
-                        except (IndexError, ValueError):
-                            pass
-                return 0
-            return 0
+        response = await self.post('/v2/data/metrics?id=failedEventsCountPerDataset', payload)
+        results = self._prometheus_result(response)
+        if results and 'value' in results[0]:
+            try:
+                return int(float(results[0]['value'][1]))
+            except (IndexError, ValueError):
+                pass
+        return 0
 
-    async def get_events_count(self, dataset_id: str, start_time: datetime, end_time: datetime) -> int:
+    async def _fetch_failed_events_counts(self, dataset_ids: List[str], start_time: datetime, end_time: datetime) -> Dict[str, int]:
+        # The per-dataset query for up to PROMETHEUS_BATCH_SIZE datasets per
+        # call, each result tagged with its dataset. A regex over all metric
+        # names can't be used: sum_over_time drops the name that holds the
+        # dataset, and a subquery would sum evaluation steps instead of samples.
+        window = int(end_time.timestamp() - start_time.timestamp())
+        metric_keys: Dict[str, List[str]] = {}
+        for dataset_id in dataset_ids:
+            metric_keys.setdefault(dataset_id.replace("-", "_"), []).append(dataset_id)
+        keys = list(metric_keys)
+        size = max(1, settings.PROMETHEUS_BATCH_SIZE)
+
+        def tagged(key: str) -> str:
+            label = key.replace("\\", "\\\\").replace('"', '\\"')
+            return f'label_replace({self._failed_events_query(key, window)}, "dataset_key", "{label}", "", "")'
+
+        async def fetch(chunk: List[str]) -> Dict[str, int]:
+            query = " or ".join(tagged(key) for key in chunk)
+            payload = {
+                "query": {
+                    "type": "api",
+                    "id": "failedEventsCountPerDataset",
+                    "url": "/prom/api/v1/query",
+                    "method": "GET",
+                    "params": {
+                        "query": query,
+                        "time": int(end_time.timestamp())
+                    },
+                    "time": int(end_time.timestamp()),
+                    "master": False,
+                    "metadata": {}
+                }
+            }
+            response = await self.post('/v2/data/metrics?id=failedEventsCountPerDataset', payload)
+            values: Dict[str, int] = {}
+            for series in self._prometheus_result(response):
+                try:
+                    key = series['metric']['dataset_key']
+                    value = int(float(series['value'][1]))
+                except (KeyError, IndexError, TypeError, ValueError):
+                    continue
+                if key in chunk:
+                    values[key] = value
+            return values
+
+        counts = {dataset_id: 0 for dataset_id in dataset_ids}
+        chunks = await asyncio.gather(*(fetch(keys[index:index + size]) for index in range(0, len(keys), size)))
+        for values in chunks:
+            for key, value in values.items():
+                for dataset_id in metric_keys[key]:
+                    counts[dataset_id] = value
+        return counts
+
+    async def _fetch_events_count(self, dataset_id: str, start_time: datetime, end_time: datetime) -> int:
         payload = self._build_events_count_payload(dataset_id, start_time, end_time)
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f'{self.base_url}/v2/data/metrics?id=totalProcessedEventsCount',
-                json=payload
-            )
-            print("get_events_count response:", response.json())  # Print statement added
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('result'):
-                    results = result['result']
-                    if results and len(results) > 0 and 'result' in results[0]:
-                        try:
-                            count = results[0]['result']['count']
-                            return count if isinstance(count, (int, float)) else 0
-                        except (IndexError, ValueError):
-                            pass
-                return 0
-            return 0
+        response = await self.post('/v2/data/metrics?id=totalProcessedEventsCount', payload)
+        results = self._druid_result(response)
+        if results and 'result' in results[0]:
+            try:
+                count = results[0]['result']['count']
+                return count if isinstance(count, (int, float)) else 0
+            except (KeyError, TypeError):
+                pass
+        return 0
 
-    async def get_last_synced_time(self, dataset_id: str) -> int:
-        payload = self._build_last_synced_time_payload(dataset_id)
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f'{self.base_url}/v2/data/metrics?id=lastSyncedTime',
-                json=payload
-            )
-            print("get_last_synced_time response:", response.json())  # Print statement added
-            if response.status_code == 200:
-                result = response.json()
-                if result:
-                    if result:
-                        try:
-                            return result["result"][0]['event']['last_synced_time']
-                        except Exception as e:
-                            print("Error parsing last synced time:", e)
-                            pass
-                return 0
-            return 0
+    async def _fetch_last_synced_time(self, dataset_id: str) -> int:
+        now = datetime.now()
+        since = self.watermarks.since(dataset_id)
+        last_synced_time = 0
+        if since is not None:
+            last_synced_time = await self._query_last_synced_time(dataset_id, self._druid_time(since))
+        else:
+            # Unknown dataset: widen the lookback step by step and only scan
+            # the full history when none of the windows has an event
+            for days in settings.LAST_SYNCED_LOOKBACK_DAYS:
+                start = (now - timedelta(days=days)).strftime("%Y-%m-%dT00:00:00+05:30")
+                last_synced_time = await self._query_last_synced_time(dataset_id, start)
+                if last_synced_time != 0:
+                    break
+            if last_synced_time == 0:
+                last_synced_time = await self._query_last_synced_time(dataset_id)
 
-    async def get_dataset_health(self, dataset_id: str) -> str:
+        if last_synced_time == 0:
+            self.watermarks.mark_checked(dataset_id, int(now.timestamp() * 1000))
+            return self.watermarks.get(dataset_id) or 0
+        self.watermarks.update(dataset_id, last_synced_time)
+        return last_synced_time
+
+    async def _query_last_synced_time(self, dataset_id: str, start: str = "2000-01-01") -> int:
+        # 0 when there is no event since `start`; a failed call raises
+        payload = self._build_last_synced_time_payload(dataset_id, start)
+        response = await self.post('/v2/data/metrics?id=lastSyncedTime', payload)
+        results = self._druid_result(response)
+        try:
+            return results[0]['event']['last_synced_time'] or 0
+        except (IndexError, KeyError, TypeError) as e:
+            # An empty result just means no event since `start`
+            logger.debug("no last synced time in response", extra={"dataset_id": dataset_id, "error": str(e)})
+        return 0
+
+    @staticmethod
+    def _prometheus_result(response: httpx.Response) -> List[Dict[str, Any]]:
+        # Series of a successful Prometheus query. Anything else raises, so a
+        # failed query is never cached or stored as zero failed events.
+        response.raise_for_status()
+        result = response.json()
+        data = result.get('data') if isinstance(result, dict) else None
+        if not isinstance(data, dict) or result.get('status') != 'success' or not isinstance(data.get('result'), list):
+            raise ValueError("Unexpected Prometheus response")
+        return data['result']
+
+    @staticmethod
+    def _druid_result(response: httpx.Response) -> List[Dict[str, Any]]:
+        # Rows of a successful Druid query; raises like _prometheus_result
+        response.raise_for_status()
+        result = response.json()
+        rows = result.get('result') if isinstance(result, dict) else None
+        if not isinstance(rows, list):
+            raise ValueError("Unexpected Druid response")
+        return rows
+
+    @staticmethod
+    def _druid_time(epoch_ms: int) -> str:
+        return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+    async def _fetch_events_summary(
+        self,
+        dataset_ids: List[str],
+        time_intervals: Dict[str, Tuple[datetime, datetime]],
+        include_yesterday: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        today_start = time_intervals['today'][0]
+        yesterday_start = time_intervals['yesterday'][0]
+        payload = self._build_events_summary_payload(
+            dataset_ids,
+            yesterday_start if include_yesterday else today_start,
+            time_intervals['today'][1]
+        )
+        summary: Dict[str, Dict[str, Any]] = {
+            dataset_id: {"today": 0, "yesterday": 0, "last_synced_time": None}
+            for dataset_id in dataset_ids
+        }
+        response = await self.post('/v2/data/metrics?id=totalProcessedEventsCount', payload)
+        for row in self._druid_result(response):
+            try:
+                event = row['event']
+                entry = summary.get(event['ctx_dataset'])
+                bucket = datetime.fromisoformat(row['timestamp'].replace('Z', '+00:00')).date()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if entry is None:
+                continue
+            count = event.get('count')
+            if isinstance(count, (int, float)):
+                if bucket == today_start.date():
+                    entry["today"] += count
+                elif bucket == yesterday_start.date():
+                    entry["yesterday"] += count
+            last_synced_time = event.get('last_synced_time')
+            if isinstance(last_synced_time, (int, float)) and (
+                entry["last_synced_time"] is None or last_synced_time > entry["last_synced_time"]
+            ):
+                entry["last_synced_time"] = last_synced_time
+        for dataset_id, entry in summary.items():
+            if entry["last_synced_time"] is not None:
+                self.watermarks.update(dataset_id, entry["last_synced_time"])
+        return summary
+
+    async def _fetch_daily_events(self, dataset_id: str, first_day: date) -> Dict[date, Tuple[int, Optional[int]]]:
+        # (processed count, last synced time) per day since `first_day`
+        start_time = datetime.combine(first_day, datetime.min.time())
+        payload = self._build_events_summary_payload([dataset_id], start_time, datetime.now())
+        response = await self.post('/v2/data/metrics?id=totalProcessedEventsCount', payload)
+        daily: Dict[date, Tuple[int, Optional[int]]] = {}
+        for row in self._druid_result(response):
+            try:
+                event = row['event']
+                day = datetime.fromisoformat(row['timestamp'].replace('Z', '+00:00')).date()
+            except (KeyError, TypeError, ValueError):
+                continue
+            count, last_synced_time = daily.get(day, (0, None))
+            if isinstance(event.get('count'), (int, float)):
+                count += int(event['count'])
+            if isinstance(event.get('last_synced_time'), (int, float)):
+                last_synced_time = max(last_synced_time or 0, int(event['last_synced_time']))
+                self.watermarks.update(dataset_id, last_synced_time)
+            daily[day] = (count, last_synced_time)
+        return daily
+
+    async def _fetch_daily_failed(self, dataset_id: str, first_day: date, last_day: date) -> Dict[date, int]:
+        # Failed events count per day, evaluated at the midnight ending each day
+        key = re.escape(dataset_id.replace("-", "_")).replace("\\", "\\\\")
+        name_regex = "flink_taskmanager_job_task_operator_(?:" + "|".join(
+            f"{job}_{key}_{counter}" for job, counter in FAILED_EVENT_METRICS
+        ) + ")"
+        day_seconds = int(timedelta(days=1).total_seconds())
+        start = datetime.combine(first_day + timedelta(days=1), datetime.min.time())
+        end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+        payload = {
+            "query": {
+                "type": "api",
+                "id": "failedEventsCountPerDataset",
+                "url": "/prom/api/v1/query_range",
+                "method": "GET",
+                "params": {
+                    "query": f'sum(sum_over_time({{__name__=~"{name_regex}"}}[{day_seconds}s]))',
+                    "start": int(start.timestamp()),
+                    "end": int(end.timestamp()),
+                    "step": day_seconds
+                },
+                "dataset": dataset_id,
+                "master": False,
+                "metadata": {}
+            }
+        }
+        response = await self.post('/v2/data/metrics?id=failedEventsCountPerDataset', payload)
+        daily: Dict[date, int] = {}
+        for series in self._prometheus_result(response):
+            for timestamp, value in series.get('values', []):
+                try:
+                    daily[datetime.fromtimestamp(float(timestamp) - 1).date()] = int(float(value))
+                except (TypeError, ValueError):
+                    continue
+        return daily
+
+    async def _fetch_dataset_health(self, dataset_id: str) -> str:
         payload = {
             "id": "api.datasets.health",
             "ver": "v2",
@@ -108,19 +831,12 @@ class DatasetService:
             }
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f'{self.base_url}/v2/datasets/health',
-                json=payload
-            )
-            print("get_dataset_health response:", response.json())  # Print statement added
-            if response.status_code == 200:
-                result = response.json()
-                print(result)
-                if isinstance(result, dict):
-                    return result.get('result', {}).get('status', 'Unknown')
-                return str(result) if result else 'Unknown'
-            return 'Unknown'
+        response = await self.post('/v2/datasets/health', payload)
+        response.raise_for_status()
+        result = response.json()
+        if isinstance(result, dict):
+            return result.get('result', {}).get('status', 'Unknown')
+        return str(result) if result else 'Unknown'
 
     def _build_events_count_payload(self, dataset_id: str, start_time: datetime, end_time: datetime) -> Dict:
         return {
@@ -156,7 +872,7 @@ class DatasetService:
             }
         }
 
-    def _build_last_synced_time_payload(self, dataset_id: str) -> Dict:
+    def _build_last_synced_time_payload(self, dataset_id: str, start: str = "2000-01-01") -> Dict:
         return {
             "query": {
                 "id": "lastSyncedTime",
@@ -168,7 +884,7 @@ class DatasetService:
                     "query": {
                         "queryType": "groupBy",
                         "dataSource": "system-events",
-                        "intervals": "2000-01-01/" + (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%dT00:00:00+05:30"),
+                        "intervals": f"{start}/" + (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%dT00:00:00+05:30"),
                         "granularity": {
                             "type": "all",
                             "timeZone": "Asia/Kolkata"
@@ -189,6 +905,46 @@ class DatasetService:
             }
         }
 
+    def _build_events_summary_payload(self, dataset_ids: List[str], start_time: datetime, end_time: datetime) -> Dict:
+        return {
+            "query": {
+                "id": "totalProcessedEventsCount",
+                "type": "api",
+                "url": "/config/v2/data/metrics",
+                "method": "POST",
+                "body": {
+                    "context": {"dataSource": "system-events"},
+                    "query": {
+                        "queryType": "groupBy",
+                        "dataSource": "system-events",
+                        "intervals": f"{start_time.strftime('%Y-%m-%d')}T{start_time.strftime('%H:%M:%S')}/{end_time.strftime('%Y-%m-%d')}T{end_time.strftime('%H:%M:%S')}",
+                        "granularity": {
+                            "type": "period",
+                            "period": "P1D",
+                            "timeZone": "Asia/Kolkata"
+                        },
+                        "dimensions": ["ctx_dataset"],
+                        "filter": {
+                            "type": "and",
+                            "fields": [
+                                {"type": "selector", "dimension": "ctx_module", "value": "processing"},
+                                {"type": "in", "dimension": "ctx_dataset", "values": dataset_ids},
+                                {"type": "selector", "dimension": "ctx_pdata_pid", "value": "router"}
+                            ]
+                        },
+                        "aggregations": [
+                            {
+                                "type": "filtered",
+                                "filter": {"type": "selector", "dimension": "error_code", "value": None},
+                                "aggregator": {"type": "longSum", "name": "count", "fieldName": "count"}
+                            },
+                            {"type": "longMax", "name": "last_synced_time", "fieldName": "__time"}
+                        ]
+                    }
+                }
+            }
+        }
+
     @staticmethod
     def get_time_intervals() -> Dict[str, Tuple[datetime, datetime]]:
         now = datetime.now()
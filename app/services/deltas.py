@@ -0,0 +1,103 @@
+import hashlib
+import json
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def compute_etag(*parts: object, hashes: Iterable[str] = ()) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(parts).encode())
+    for value in hashes:
+        digest.update(value.encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match calls for
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+def encode_delta(token: Optional[str], full: bool, records: Iterable[bytes], removed: List[str]) -> bytes:
+    # `records` are already serialized
+    return b"".join((
+        b'{"version":', json.dumps(token).encode(),
+        b',"full":', b"true" if full else b"false",
+        b',"changed":[', b",".join(records),
+        b'],"removed":', json.dumps(removed, separators=(",", ":")).encode(), b"}"
+    ))
+
+
+class DeltaTracker:
+    """Versions of the enriched datasets list, for `?since=` deltas.
+
+    Each observation of the full list compares the content hash of every
+    dataset with the previous one, by dataset id; datasets that changed or
+    disappeared are stamped with the new version. Versions are handed to clients as
+    `<instance>.<version>` so a token from another process (or from before a
+    restart) is recognised and answered with the full list instead.
+    """
+
+    def __init__(self, instance: Optional[str] = None, max_removed: int = 10000):
+        self.instance = instance or uuid.uuid4().hex[:8]
+        self.max_removed = max_removed
+        self.version = 0
+        self._oldest: Optional[int] = None
+        self._hashes: Dict[str, str] = {}
+        self._changed: Dict[str, int] = {}
+        self._removed: Dict[str, int] = {}
+
+    @property
+    def token(self) -> Optional[str]:
+        return self.format(self.version) if self._oldest is not None else None
+
+    def format(self, version: int) -> str:
+        return f"{self.instance}.{version}"
+
+    def parse(self, token: str) -> Optional[int]:
+        instance, _, version = token.rpartition(".")
+        if instance != self.instance or not version.isdigit():
+            return None
+        return int(version)
+
+    def observe(self, entries: Iterable[Tuple[str, str]], generation: Optional[int] = None) -> int:
+        # `entries` are (dataset id, hash) pairs of the full list. With a
+        # `generation` that was already observed, nothing is compared.
+        if generation is not None and self._oldest is not None and generation <= self.version:
+            return self.version
+        hashes = dict(entries)
+        changed = [dataset_id for dataset_id, value in hashes.items() if self._hashes.get(dataset_id) != value]
+        removed = [dataset_id for dataset_id in self._hashes if dataset_id not in hashes]
+        if self._oldest is not None and generation is None and not changed and not removed:
+            return self.version
+
+        self.version = generation if generation is not None else self.version + 1
+        if self._oldest is None:
+            self._oldest = self.version
+        for dataset_id in changed:
+            self._changed[dataset_id] = self.version
+            self._removed.pop(dataset_id, None)
+        for dataset_id in removed:
+            self._changed.pop(dataset_id, None)
+            self._removed[dataset_id] = self.version
+        self._hashes = hashes
+
+        if len(self._removed) > self.max_removed:
+            # Forget the oldest tombstones; older versions get the full list
+            for dataset_id, version in sorted(self._removed.items(), key=lambda item: item[1])[:len(self._removed) - self.max_removed]:
+                del self._removed[dataset_id]
+                self._oldest = max(self._oldest, version)
+        return self.version
+
+    def since(self, version: int) -> Optional[Tuple[Set[str], List[str]]]:
+        # (changed, removed) dataset ids after `version`, or None when that
+        # version can't be answered with a delta
+        if self._oldest is None or version < self._oldest or version > self.version:
+            return None
+        changed = {dataset_id for dataset_id, stamp in self._changed.items() if stamp > version}
+        removed = [dataset_id for dataset_id, stamp in self._removed.items() if stamp > version]
+        return changed, removed
@@ -0,0 +1,367 @@
+import asyncio
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from app.core.config import get_settings
+from app.core.instrumentation import timed
+from app.core.serialization import format_timestamp
+from app.services.dataset_service import (
+    DatasetService,
+    EVENTS_COUNT,
+    FAILED_EVENTS_COUNT,
+    LAST_SYNCED_TIME,
+    HEALTH
+)
+
+settings = get_settings()
+
+LIST_FIELDS = ("status", "last_synced_time", "metrics.today", "metrics.yesterday")
+
+# An enriched dataset: the JSON form of a DatasetResponse, keys in field
+# order and only those that were computed. Built without pydantic validation
+# as every value comes from the service's own backend calls.
+Record = Dict[str, Any]
+
+
+class EnrichmentPlan(NamedTuple):
+    """Which parts of a dataset record to compute."""
+    status: bool = True
+    last_synced_time: bool = True
+    today: bool = True
+    yesterday: bool = True
+
+    @classmethod
+    def from_fields(cls, fields: Optional[List[str]]) -> "EnrichmentPlan":
+        if not fields:
+            return FULL_PLAN
+        selected = set()
+        for field in fields:
+            field = field.strip()
+            if field == "metrics":
+                selected.update(("metrics.today", "metrics.yesterday"))
+            elif field in LIST_FIELDS:
+                selected.add(field)
+            elif field:
+                raise ValueError(f"Unknown field '{field}', expected one of: {', '.join(LIST_FIELDS)}")
+        if not selected:
+            return FULL_PLAN
+        return cls(
+            status="status" in selected,
+            last_synced_time="last_synced_time" in selected,
+            today="metrics.today" in selected,
+            yesterday="metrics.yesterday" in selected
+        )
+
+    def project(self, record: Record) -> Record:
+        # Narrow an already enriched record down to the selected fields
+        if self == FULL_PLAN:
+            return record
+        projected: Record = {"dataset": record["dataset"], "dataset_id": record["dataset_id"]}
+        if self.status:
+            projected["status"] = record.get("status")
+        if self.last_synced_time:
+            projected["last_synced_time"] = record.get("last_synced_time")
+        source = record.get("metrics")
+        metrics: Dict[str, Any] = {}
+        if self.today and source is not None:
+            metrics.update(
+                received=source.get("received", 0),
+                success=source.get("success", 0),
+                failed=source.get("failed", 0)
+            )
+        if self.yesterday and source is not None:
+            metrics["yesterday"] = source.get("yesterday", {"received": 0, "success": 0, "failed": 0})
+        if metrics:
+            projected["metrics"] = metrics
+        degraded = [field for field in record.get("degraded") or [] if self.selects(field)]
+        if degraded:
+            projected["degraded"] = degraded
+        return projected
+
+    def selects(self, field: str) -> bool:
+        return {
+            "status": self.status,
+            "last_synced_time": self.last_synced_time,
+            "metrics.today": self.today,
+            "metrics.yesterday": self.yesterday
+        }.get(field, False)
+
+
+FULL_PLAN = EnrichmentPlan()
+
+
+class EnrichmentEngine:
+    """Concurrent metrics/health enrichment for the datasets list.
+
+    Every backend call acquires its endpoint semaphore and then the global
+    one, so neither a single slow backend nor the whole fan-out can exceed
+    its configured cap. A failing call only falls back to that field's
+    default value for that dataset.
+    """
+
+    def __init__(
+        self,
+        service: DatasetService,
+        max_concurrency: Optional[int] = None,
+        max_concurrency_per_endpoint: Optional[int] = None,
+        endpoint_concurrency: Optional[Dict[str, int]] = None
+    ):
+        self.service = service
+        self.max_concurrency = max_concurrency or settings.ENRICHMENT_MAX_CONCURRENCY
+        self.max_concurrency_per_endpoint = max_concurrency_per_endpoint or settings.ENRICHMENT_MAX_CONCURRENCY_PER_ENDPOINT
+        self.endpoint_concurrency = dict(settings.ENRICHMENT_ENDPOINT_CONCURRENCY)
+        if endpoint_concurrency:
+            self.endpoint_concurrency.update(endpoint_concurrency)
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _endpoint_limit(self, endpoint_id: str) -> asyncio.Semaphore:
+        limit = self._endpoint_limits.get(endpoint_id)
+        if limit is None:
+            limit = asyncio.Semaphore(
+                self.endpoint_concurrency.get(endpoint_id, self.max_concurrency_per_endpoint)
+            )
+            self._endpoint_limits[endpoint_id] = limit
+        return limit
+
+    async def _call(
+        self,
+        endpoint_id: str,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        default: Any = 0,
+        on_error: Optional[Callable[[], None]] = None
+    ) -> Any:
+        async with self._endpoint_limit(endpoint_id):
+            async with self._global_limit:
+                try:
+                    return await func(*args)
+                except Exception:
+                    if on_error is not None:
+                        on_error()
+                    return default
+
+    async def prefetch(
+        self,
+        dataset_ids: List[str],
+        time_intervals: Dict[str, Tuple[datetime, datetime]],
+        plan: Optional["EnrichmentPlan"] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        plan = plan or FULL_PLAN
+        if not settings.ENRICHMENT_BATCH_QUERIES or not dataset_ids:
+            return {}
+        service = self.service
+        failed_intervals = {
+            name: time_intervals[name]
+            for name, needed in (('today', plan.today), ('yesterday', plan.yesterday))
+            if needed
+        }
+
+        async def no_result(default: Any) -> Any:
+            return default
+
+        with timed("prefetch"):
+            summary, failed = await asyncio.gather(
+                self._call(EVENTS_COUNT, service.get_events_summary, dataset_ids, time_intervals, default=None)
+                if plan.today or plan.yesterday or plan.last_synced_time else no_result(None),
+                self._call(
+                    FAILED_EVENTS_COUNT,
+                    service.get_failed_events_counts_by_interval,
+                    dataset_ids,
+                    failed_intervals,
+                    default={}
+                ) if failed_intervals else no_result({})
+            )
+        prefetched: Dict[str, Optional[Dict[str, Any]]] = {
+            'today_failed': failed.get('today'),
+            'yesterday_failed': failed.get('yesterday')
+        }
+        if summary is not None:
+            prefetched['today_processed'] = {
+                dataset_id: entry["today"] for dataset_id, entry in summary.items()
+            }
+            prefetched['yesterday_processed'] = {
+                dataset_id: entry["yesterday"] for dataset_id, entry in summary.items()
+            }
+            # Datasets idle since yesterday are left to the per-dataset lookup
+            prefetched['last_synced_time'] = {
+                dataset_id: entry["last_synced_time"]
+                for dataset_id, entry in summary.items()
+                if entry["last_synced_time"] is not None
+            }
+        return prefetched
+
+    async def get_status(self, dataset_id: str, on_error: Optional[Callable[[], None]] = None) -> str:
+        health_status = await self._call(
+            HEALTH,
+            self.service.get_dataset_health,
+            dataset_id,
+            default='Unknown',
+            on_error=on_error
+        )
+        return health_status.lower()
+
+    async def enrich_dataset(
+        self,
+        dataset: Dict[str, Any],
+        time_intervals: Dict[str, Tuple[datetime, datetime]],
+        prefetched: Optional[Dict[str, Optional[Dict[str, Any]]]] = None,
+        plan: Optional["EnrichmentPlan"] = None
+    ) -> Record:
+        dataset_id = dataset['dataset_id']
+        today_start, today_end = time_intervals['today']
+        yesterday_start, yesterday_end = time_intervals['yesterday']
+        service = self.service
+        prefetched = prefetched or {}
+        plan = plan or FULL_PLAN
+
+        # Fields whose backend call failed, timed out or hit an open circuit
+        # are returned with their default value and listed in `degraded`
+        degraded: List[str] = []
+
+        def mark(field: str) -> Callable[[], None]:
+            def on_error() -> None:
+                if field not in degraded:
+                    degraded.append(field)
+            return on_error
+
+        # Only the backend calls needed by the selected fields are issued.
+        # Batched results are used as they are; the rest is awaited together.
+        values: Dict[str, Any] = {}
+        calls: Dict[str, Awaitable[Any]] = {}
+
+        def metric(key: str, endpoint_id: str, func: Callable[..., Awaitable[Any]], *args, on_error: Callable[[], None]) -> None:
+            batch = prefetched.get(key)
+            if batch is not None and dataset_id in batch:
+                values[key] = batch[dataset_id]
+            else:
+                calls[key] = self._call(endpoint_id, func, dataset_id, *args, on_error=on_error)
+
+        if plan.today:
+            metric('today_processed', EVENTS_COUNT, service.get_events_count, today_start, today_end, on_error=mark("metrics.today"))
+            metric('today_failed', FAILED_EVENTS_COUNT, service.get_failed_events_count, today_start, today_end, on_error=mark("metrics.today"))
+        if plan.yesterday:
+            metric('yesterday_processed', EVENTS_COUNT, service.get_events_count, yesterday_start, yesterday_end, on_error=mark("metrics.yesterday"))
+            metric('yesterday_failed', FAILED_EVENTS_COUNT, service.get_failed_events_count, yesterday_start, yesterday_end, on_error=mark("metrics.yesterday"))
+        if plan.status:
+            calls['status'] = self.get_status(dataset_id, on_error=mark("status"))
+        if plan.last_synced_time:
+            metric('last_synced_time', LAST_SYNCED_TIME, service.get_last_synced_time, on_error=mark("last_synced_time"))
+        if len(calls) == 1:
+            # Usually just the health check; no need for a task
+            key, call = calls.popitem()
+            values[key] = await call
+        elif calls:
+            values.update(zip(calls, await asyncio.gather(*calls.values())))
+
+        record: Record = {"dataset": dataset.get('name', ''), "dataset_id": dataset_id}
+        if plan.status:
+            record["status"] = values['status']
+        if plan.last_synced_time:
+            record["last_synced_time"] = format_timestamp(values['last_synced_time'])
+        metrics: Dict[str, Any] = {}
+        if plan.today:
+            metrics.update(
+                received=values['today_processed'] + values['today_failed'],
+                success=values['today_processed'],
+                failed=values['today_failed']
+            )
+        if plan.yesterday:
+            metrics["yesterday"] = {
+                "received": values['yesterday_processed'] + values['yesterday_failed'],
+                "success": values['yesterday_processed'],
+                "failed": values['yesterday_failed']
+            }
+        if metrics:
+            record["metrics"] = metrics
+        if degraded:
+            record["degraded"] = sorted(degraded)
+        return record
+
+    async def select_page(
+        self,
+        datasets: List[Any],
+        name: Optional[str] = None,
+        status: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        # Returns the datasets of the requested page and the offset of the
+        # next one (None on the last page). Offsets index the name-filtered list.
+        candidates = self._valid_datasets(datasets)
+        if name:
+            needle = name.lower()
+            candidates = [
+                dataset for dataset in candidates
+                if needle in str(dataset.get('name', '')).lower()
+            ]
+        if status is None:
+            end = len(candidates) if limit is None else offset + limit
+            return candidates[offset:end], (end if end < len(candidates) else None)
+
+        # Status needs the health of each candidate; check one page-sized
+        # chunk at a time and stop as soon as the page is full
+        wanted = status.lower()
+        page: List[Dict[str, Any]] = []
+        position = offset
+        chunk_size = limit or len(candidates) or 1
+        while position < len(candidates):
+            chunk = candidates[position:position + chunk_size]
+            statuses = await asyncio.gather(*(self.get_status(dataset['dataset_id']) for dataset in chunk))
+            for dataset, dataset_status in zip(chunk, statuses):
+                position += 1
+                if dataset_status == wanted:
+                    page.append(dataset)
+                    if limit is not None and len(page) >= limit:
+                        return page, (position if position < len(candidates) else None)
+        return page, None
+
+    @staticmethod
+    def _valid_datasets(datasets: List[Any]) -> List[Dict[str, Any]]:
+        return [
+            dataset for dataset in datasets
+            if isinstance(dataset, dict) and dataset.get('dataset_id')
+        ]
+
+    async def enrich(
+        self,
+        datasets: List[Any],
+        time_intervals: Optional[Dict[str, Tuple[datetime, datetime]]] = None,
+        plan: Optional["EnrichmentPlan"] = None
+    ) -> List[Record]:
+        if time_intervals is None:
+            time_intervals = self.service.get_time_intervals()
+        valid = self._valid_datasets(datasets)
+        prefetched = await self.prefetch([dataset['dataset_id'] for dataset in valid], time_intervals, plan)
+        return list(await asyncio.gather(
+            *(self.enrich_dataset(dataset, time_intervals, prefetched, plan) for dataset in valid)
+        ))
+
+    async def enrich_iter(
+        self,
+        datasets: List[Any],
+        time_intervals: Optional[Dict[str, Tuple[datetime, datetime]]] = None,
+        plan: Optional["EnrichmentPlan"] = None
+    ) -> AsyncIterator[Record]:
+        # Yields datasets in completion order. At most `max_concurrency`
+        # datasets are in flight, so memory doesn't grow with the list.
+        if time_intervals is None:
+            time_intervals = self.service.get_time_intervals()
+        valid = self._valid_datasets(datasets)
+        prefetched = await self.prefetch([dataset['dataset_id'] for dataset in valid], time_intervals, plan)
+        remaining = iter(valid)
+        pending = set()
+        try:
+            for dataset in remaining:
+                pending.add(asyncio.ensure_future(self.enrich_dataset(dataset, time_intervals, prefetched, plan)))
+                if len(pending) >= self.max_concurrency:
+                    break
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    next_dataset = next(remaining, None)
+                    if next_dataset is not None:
+                        pending.add(asyncio.ensure_future(self.enrich_dataset(next_dataset, time_intervals, prefetched, plan)))
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
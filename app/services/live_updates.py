@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple
+from app.services.deltas import DeltaTracker, encode_delta
+from app.services.snapshot import SnapshotView
+
+logger = logging.getLogger(__name__)
+
+# (version token, JSON payload)
+Update = Tuple[str, bytes]
+
+
+class Subscription:
+    def __init__(self, since: Optional[str], max_pending: int):
+        self.since = since
+        self.started = False
+        self.dropped = False
+        self._queue: "asyncio.Queue[Optional[Update]]" = asyncio.Queue(max_pending)
+
+    def offer(self, update: Update) -> bool:
+        try:
+            self._queue.put_nowait(update)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            self.close()
+            return False
+
+    def close(self) -> None:
+        # Pending updates are discarded so the end marker always fits
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Update]:
+        # None once the subscription has ended; raises TimeoutError when
+        # nothing arrived within `timeout`
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+    async def __aiter__(self) -> AsyncIterator[Update]:
+        while (update := await self.next()) is not None:
+            yield update
+
+
+class UpdateHub:
+    """Pushes dataset changes to /datasets/stream subscribers.
+
+    One polling task per process watches `source` for a new snapshot view,
+    diffs it once against the previous one and hands the same encoded
+    update to every subscriber. Subscribers whose `max_pending` buffer is
+    full are dropped rather than buffered without bound; they reconnect
+    with their last version and catch up from there.
+    """
+
+    def __init__(
+        self,
+        deltas: DeltaTracker,
+        source: Callable[[], Optional[SnapshotView]],
+        start_source: Callable[[], None],
+        stop_source: Optional[Callable[[], Awaitable[None]]] = None,
+        poll_interval: float = 1.0,
+        max_pending: int = 16
+    ):
+        self.deltas = deltas
+        self.source = source
+        self.start_source = start_source
+        self.stop_source = stop_source
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self._view: Optional[SnapshotView] = None
+        self._subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def _update(self, view: SnapshotView, delta: Optional[Tuple[Set[str], List[str]]]) -> Update:
+        # Versions are the views' generations, which the tracker may already
+        # have moved past if the list endpoint saw a newer view first
+        token = self.deltas.format(view.generation)
+        if delta is None:
+            return token, encode_delta(token, True, (view.record(position) for position in range(len(view))), [])
+        changed, removed = delta
+        positions = [position for position in range(len(view)) if view.dataset_id(position) in changed]
+        return token, encode_delta(token, False, (view.record(position) for position in positions), removed)
+
+    def _initial(self, subscription: Subscription) -> Update:
+        # The changes since the subscriber's version, or the full list
+        version = self.deltas.parse(subscription.since) if subscription.since else None
+        return self._update(self._view, self.deltas.since(version) if version is not None else None)
+
+    def _deliver(self, subscription: Subscription, update: Update) -> None:
+        subscription.started = True
+        if not subscription.offer(update):
+            self.dropped += 1
+            self._subscribers.discard(subscription)
+            logger.info("dropped slow stream subscriber", extra={"max_pending": self.max_pending})
+
+    def publish(self, view: SnapshotView) -> None:
+        previous = self._view
+        self._view = view
+        self.deltas.observe(view.entries(), view.generation)
+        update = None
+        if previous is not None:
+            delta = self.deltas.since(previous.generation)
+            if delta is not None and (delta[0] or delta[1]):
+                update = self._update(view, delta)
+                self.published += 1
+        for subscription in list(self._subscribers):
+            if not subscription.started:
+                self._deliver(subscription, self._initial(subscription))
+            elif update is not None:
+                self._deliver(subscription, update)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self._poll()
+            except Exception:
+                logger.exception("stream update failed")
+            await asyncio.sleep(self.poll_interval)
+
+    def _poll(self) -> None:
+        self.start_source()
+        view = self.source()
+        if view is not None and (self._view is None or view.generation != self._view.generation):
+            self.publish(view)
+
+    def subscribe(self, since: Optional[str] = None) -> Subscription:
+        subscription = Subscription(since, self.max_pending)
+        self._subscribers.add(subscription)
+        self._poll()
+        if self._view is not None and not subscription.started:
+            self._deliver(subscription, self._initial(subscription))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            if self.stop_source is not None:
+                asyncio.ensure_future(self._idle())
+
+    async def _idle(self) -> None:
+        # Stop refreshing unless someone subscribed again meanwhile
+        if not self._subscribers:
+            await self.stop_source()
+
+    async def aclose(self) -> None:
+        for subscription in list(self._subscribers):
+            subscription.close()
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
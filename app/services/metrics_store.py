@@ -0,0 +1,112 @@
+import asyncio
+import sqlite3
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+COLUMNS = ("processed", "failed", "last_synced_time")
+
+
+class DailyRow(NamedTuple):
+    day: date
+    processed: Optional[int]
+    failed: Optional[int]
+    last_synced_time: Optional[int]
+
+    @property
+    def complete(self) -> bool:
+        return self.processed is not None and self.failed is not None
+
+
+class MetricsStore:
+    """Finalized per-dataset daily metrics in a local SQLite database.
+
+    Columns are written independently (the processed and failed counts come
+    from different backends), so a day is only complete once both are set.
+    Queries run in a worker thread on one shared connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Several uvicorn workers may write the same file
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily_metrics ("
+                " dataset_id TEXT NOT NULL,"
+                " day TEXT NOT NULL,"
+                " processed INTEGER,"
+                " failed INTEGER,"
+                " last_synced_time INTEGER,"
+                " PRIMARY KEY (dataset_id, day)"
+                ") WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        def run() -> Any:
+            with self._lock:
+                return func(self._connect())
+        return await asyncio.to_thread(run)
+
+    @staticmethod
+    def _row(row: Tuple) -> DailyRow:
+        return DailyRow(date.fromisoformat(row[0]), row[1], row[2], row[3])
+
+    async def get_days(self, dataset_id: str, first_day: date, last_day: date) -> Dict[date, DailyRow]:
+        rows = await self._run(lambda conn: conn.execute(
+            "SELECT day, processed, failed, last_synced_time FROM daily_metrics"
+            " WHERE dataset_id = ? AND day BETWEEN ? AND ?",
+            (dataset_id, first_day.isoformat(), last_day.isoformat())
+        ).fetchall())
+        return {row.day: row for row in map(self._row, rows)}
+
+    async def get_day(self, day: date) -> Dict[str, DailyRow]:
+        rows = await self._run(lambda conn: conn.execute(
+            "SELECT dataset_id, day, processed, failed, last_synced_time FROM daily_metrics WHERE day = ?",
+            (day.isoformat(),)
+        ).fetchall())
+        return {row[0]: self._row(row[1:]) for row in rows}
+
+    async def update(self, rows: Iterable[Tuple[str, date, Dict[str, Optional[int]]]]) -> None:
+        # Upserts (dataset_id, day, {column: value}); columns left out, or
+        # given as None, keep their stored value
+        statements = []
+        for dataset_id, day, values in rows:
+            values = {column: values.get(column) for column in COLUMNS}
+            statements.append((dataset_id, day.isoformat(), *values.values()))
+        if not statements:
+            return
+
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT INTO daily_metrics (dataset_id, day, processed, failed, last_synced_time)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (dataset_id, day) DO UPDATE SET"
+                    " processed = COALESCE(excluded.processed, processed),"
+                    " failed = COALESCE(excluded.failed, failed),"
+                    " last_synced_time = COALESCE(excluded.last_synced_time, last_synced_time)",
+                    statements
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        await self._run(write)
+
+    async def aclose(self) -> None:
+        def close(conn: sqlite3.Connection) -> None:
+            conn.close()
+            self._conn = None
+        if self._conn is not None:
+            await self._run(close)
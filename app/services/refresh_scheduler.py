@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from app.services.cache import MetricsCache
+
+logger = logging.getLogger(__name__)
+
+
+class _Schedule:
+    __slots__ = ("dataset_id", "loader", "value", "interval", "due", "version", "last_read", "running")
+
+    def __init__(self, dataset_id: str, loader: Callable[[], Awaitable[Any]], value: Any, interval: float):
+        self.dataset_id = dataset_id
+        self.loader = loader
+        self.value = value
+        self.interval = interval
+        self.due = 0.0
+        self.version = 0
+        self.last_read = time.monotonic()
+        self.running = False
+
+
+class RefreshScheduler:
+    """Keeps cached per-dataset reads fresh, each key at its own pace.
+
+    A key's refresh interval drops to `min_interval` whenever its dataset
+    shows activity (a refreshed value changed, or `observe` saw one of its
+    counts move) and doubles after every refresh that changed nothing, up
+    to `max_interval`. Due keys are taken from a heap and started at most
+    `max_rate` per second so backend calls trickle out instead of arriving
+    in waves. Keys nobody has read for `forget_after` seconds are dropped
+    and their cache entries left to expire.
+    """
+
+    def __init__(
+        self,
+        cache: MetricsCache,
+        initial_interval: float = 30.0,
+        min_interval: float = 5.0,
+        max_interval: float = 600.0,
+        max_rate: float = 20.0,
+        forget_after: float = 3600.0,
+        jitter: float = 0.1
+    ):
+        self.cache = cache
+        self.initial_interval = min(max(initial_interval, min_interval), max_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.spacing = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.forget_after = forget_after
+        self.jitter = jitter
+        self._schedules: Dict[Hashable, _Schedule] = {}
+        self._by_dataset: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._signals: Dict[Tuple[str, str], Any] = {}
+        self._heap: List[Tuple[float, int, int, Hashable]] = []
+        self._counter = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: Set[asyncio.Task] = set()
+        self.refreshes = 0
+        self.changes = 0
+        self.errors = 0
+        self.forgotten = 0
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def hot(self) -> int:
+        return sum(1 for schedule in self._schedules.values() if schedule.interval <= self.min_interval)
+
+    def _store(self, key: Hashable, schedule: _Schedule) -> None:
+        # Entries outlive one missed refresh, and expire on their own once
+        # the key is forgotten
+        self.cache.set(key, schedule.value, ttl=schedule.interval * 2 + self.min_interval)
+
+    def _push(self, key: Hashable, schedule: _Schedule, delay: float) -> None:
+        schedule.version += 1
+        schedule.due = time.monotonic() + delay
+        self._counter += 1
+        if not self._heap or schedule.due < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (schedule.due, self._counter, schedule.version, key))
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def track(self, key: Hashable, dataset_id: str, loader: Callable[[], Awaitable[Any]], value: Any) -> None:
+        # Called with a freshly loaded value; the first refresh is spread
+        # over the initial interval so keys tracked together don't stay
+        # in step
+        schedule = self._schedules.get(key)
+        if schedule is not None:
+            schedule.loader = loader
+            schedule.value = value
+            schedule.last_read = time.monotonic()
+            self._store(key, schedule)
+            return
+        schedule = _Schedule(dataset_id, loader, value, self.initial_interval)
+        self._schedules[key] = schedule
+        self._by_dataset[dataset_id].add(key)
+        self._store(key, schedule)
+        self._push(key, schedule, random.uniform(0.5, 1.0) * schedule.interval)
+        self._start()
+
+    def touch(self, key: Hashable) -> bool:
+        schedule = self._schedules.get(key)
+        if schedule is None:
+            return False
+        schedule.last_read = time.monotonic()
+        return True
+
+    def observe(self, dataset_id: str, signal: str, value: Any) -> None:
+        # Feed a value that moves when the dataset is active, e.g. today's
+        # event count from a batched query
+        previous = self._signals.get((dataset_id, signal))
+        self._signals[(dataset_id, signal)] = value
+        if previous is not None and previous != value:
+            self.mark_active(dataset_id)
+
+    def mark_active(self, dataset_id: str) -> None:
+        for key in self._by_dataset.get(dataset_id, ()):
+            schedule = self._schedules[key]
+            schedule.interval = self.min_interval
+            if schedule.running:
+                continue
+            delay = self._jittered(self.min_interval)
+            if time.monotonic() + delay < schedule.due:
+                self._push(key, schedule, delay)
+
+    def _forget(self, key: Hashable, schedule: _Schedule) -> None:
+        del self._schedules[key]
+        keys = self._by_dataset[schedule.dataset_id]
+        keys.discard(key)
+        if not keys:
+            del self._by_dataset[schedule.dataset_id]
+            for signal in [signal for signal in self._signals if signal[0] == schedule.dataset_id]:
+                del self._signals[signal]
+        self.forgotten += 1
+
+    async def _refresh(self, key: Hashable, schedule: _Schedule) -> None:
+        try:
+            value = await schedule.loader()
+        except Exception as error:
+            # Keep the interval and try again when it's next due
+            self.errors += 1
+            logger.debug("scheduled refresh failed", extra={"dataset_id": schedule.dataset_id, "key": repr(key), "error": str(error)})
+        else:
+            self.refreshes += 1
+            if value != schedule.value:
+                self.changes += 1
+                schedule.value = value
+                self.mark_active(schedule.dataset_id)
+            else:
+                schedule.interval = min(schedule.interval * 2, self.max_interval)
+            self._store(key, schedule)
+        finally:
+            schedule.running = False
+            if self._schedules.get(key) is schedule:
+                self._push(key, schedule, self._jittered(schedule.interval))
+
+    async def _run(self) -> None:
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            due, _, version, key = self._heap[0]
+            schedule = self._schedules.get(key)
+            if schedule is None or version != schedule.version or schedule.running:
+                heapq.heappop(self._heap)
+                continue
+            delay = due - time.monotonic()
+            if delay > 0:
+                # A timer rather than wait_for, which can swallow a
+                # cancellation that arrives as the timeout expires
+                self._wakeup.clear()
+                timer = asyncio.get_running_loop().call_later(delay, self._wakeup.set)
+                try:
+                    await self._wakeup.wait()
+                finally:
+                    timer.cancel()
+                continue
+            heapq.heappop(self._heap)
+            if time.monotonic() - schedule.last_read > self.forget_after:
+                self._forget(key, schedule)
+                continue
+            schedule.running = True
+            task = asyncio.ensure_future(self._refresh(key, schedule))
+            self._refreshing.add(task)
+            task.add_done_callback(self._refreshing.discard)
+            if self.spacing:
+                await asyncio.sleep(self.spacing)
+
+    def _start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tracked": len(self._schedules),
+            "hot": self.hot(),
+            "refreshes": self.refreshes,
+            "changes": self.changes,
+            "errors": self.errors,
+            "forgotten": self.forgotten
+        }
+
+    async def aclose(self) -> None:
+        tasks = list(self._refreshing)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshing.clear()
@@ -0,0 +1,163 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackendUnavailableError(Exception):
+    """A backend call was not made (open circuit) or missed its deadline."""
+
+    def __init__(self, endpoint_id: str, reason: str):
+        super().__init__(f"{endpoint_id}: {reason}")
+        self.endpoint_id = endpoint_id
+        self.reason = reason
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == HALF_OPEN and not self._trial_in_flight:
+            # Let a single trial call through to probe the backend
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        # The trial call was abandoned without an outcome
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(int(len(ordered) * percentile / 100), len(ordered) - 1)
+        return ordered[index]
+
+
+class BackendPolicy:
+    """Deadline, circuit breaker and optional hedging for one backend endpoint.
+
+    A hedged call starts a second identical attempt once the first one has
+    been running longer than the observed latency percentile, and returns
+    whichever succeeds first. Only use it for idempotent reads.
+    """
+
+    def __init__(
+        self,
+        endpoint_id: str,
+        timeout: float,
+        breaker: CircuitBreaker,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        is_failure: Optional[Callable[[Any], bool]] = None
+    ):
+        self.endpoint_id = endpoint_id
+        self.timeout = timeout
+        self.breaker = breaker
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.is_failure = is_failure or (lambda result: False)
+        self.latency = LatencyTracker()
+        self.timeouts = 0
+        self.rejected = 0
+        self.hedged = 0
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    async def _attempt(self, func: Callable[[], Awaitable[Any]], hedge: bool) -> Any:
+        delay = self._hedge_delay() if hedge else None
+        first = asyncio.ensure_future(func())
+        if delay is None:
+            return await first
+        attempts = {first}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                self.hedged += 1
+                attempts.add(asyncio.ensure_future(func()))
+            error: Optional[BaseException] = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def call(self, func: Callable[[], Awaitable[Any]], hedge: bool = False) -> Any:
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise BackendUnavailableError(self.endpoint_id, "circuit open")
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._attempt(func, hedge), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.breaker.record_failure()
+            raise BackendUnavailableError(self.endpoint_id, f"no response within {self.timeout}s")
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if self.is_failure(result):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+            self.latency.observe(time.perf_counter() - started)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "hedged": self.hedged
+        }
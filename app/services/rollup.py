@@ -0,0 +1,159 @@
+import bisect
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from app.services.deltas import DeltaTracker
+from app.services.snapshot import SnapshotView
+
+GROUP_KEYS = ("type", "status")
+# Sort key for datasets that never synced: older than any timestamp
+NEVER = float("-inf")
+
+
+class _Entry(NamedTuple):
+    type: Optional[str]
+    status: Optional[str]
+    received: int
+    success: int
+    failed: int
+    synced_at: float
+    degraded: bool
+
+
+class _Cell:
+    __slots__ = ("datasets", "received", "success", "failed", "degraded", "synced_at")
+
+    def __init__(self):
+        self.datasets = 0
+        self.received = 0
+        self.success = 0
+        self.failed = 0
+        self.degraded = 0
+        # Sorted, so stale datasets are counted with one bisect
+        self.synced_at: List[float] = []
+
+    def add(self, entry: _Entry, sign: int) -> None:
+        self.datasets += sign
+        self.received += sign * entry.received
+        self.success += sign * entry.success
+        self.failed += sign * entry.failed
+        self.degraded += sign * entry.degraded
+        if sign > 0:
+            bisect.insort(self.synced_at, entry.synced_at)
+        else:
+            del self.synced_at[bisect.bisect_left(self.synced_at, entry.synced_at)]
+
+    def stale(self, cutoff: float) -> int:
+        return bisect.bisect_left(self.synced_at, cutoff)
+
+
+def _synced_at(value: Optional[str]) -> float:
+    if not value:
+        return NEVER
+    return datetime.fromisoformat(value).timestamp()
+
+
+class FleetRollup:
+    """Fleet-wide totals kept up to date from snapshot views.
+
+    Totals are kept per (type, status) cell and per dataset id. For a new
+    view only the datasets `deltas` reports as changed or removed since the
+    last one are touched: their old contribution is subtracted from their
+    cell and the new one added. Answers only sum the cells, whatever the
+    number of datasets.
+    """
+
+    def __init__(self, deltas: DeltaTracker):
+        self.deltas = deltas
+        self.generation: Optional[int] = None
+        self.generated_at: Optional[datetime] = None
+        self._entries: Dict[str, _Entry] = {}
+        self._cells: Dict[Tuple[Optional[str], Optional[str]], _Cell] = {}
+        self.applied = 0
+
+    def _apply(self, dataset_id: str, entry: Optional[_Entry]) -> None:
+        previous = self._entries.pop(dataset_id, None)
+        if previous is not None:
+            key = (previous.type, previous.status)
+            cell = self._cells[key]
+            cell.add(previous, -1)
+            if not cell.datasets:
+                del self._cells[key]
+        if entry is not None:
+            self._entries[dataset_id] = entry
+            self._cells.setdefault((entry.type, entry.status), _Cell()).add(entry, 1)
+        self.applied += 1
+
+    @staticmethod
+    def _entry(view: SnapshotView, position: int) -> _Entry:
+        record = view.parse(position)
+        metrics = record.get("metrics") or {}
+        return _Entry(
+            type=view.dataset_type(position),
+            status=record.get("status"),
+            received=metrics.get("received", 0),
+            success=metrics.get("success", 0),
+            failed=metrics.get("failed", 0),
+            synced_at=_synced_at(record.get("last_synced_time")),
+            degraded=bool(record.get("degraded"))
+        )
+
+    def update(self, view: SnapshotView) -> None:
+        if view.generation == self.generation:
+            return
+        # The tracker compares the view once for every user of its versions
+        self.deltas.observe(view.entries(), view.generation)
+        delta = None
+        if self.generation is not None and self.deltas.version == view.generation:
+            delta = self.deltas.since(self.generation)
+        if delta is None:
+            # First view, or one the tracker can't diff: start over
+            self._entries.clear()
+            self._cells.clear()
+            changed, removed = view.positions.keys(), []
+        else:
+            changed, removed = delta
+        for dataset_id in removed:
+            self._apply(dataset_id, None)
+        for dataset_id in changed:
+            position = view.positions.get(dataset_id)
+            self._apply(dataset_id, self._entry(view, position) if position is not None else None)
+        self.generation = view.generation
+        self.generated_at = view.generated_at
+
+    @staticmethod
+    def _totals(cells: Sequence[_Cell], cutoff: float) -> Dict[str, Any]:
+        received = sum(cell.received for cell in cells)
+        failed = sum(cell.failed for cell in cells)
+        return {
+            "datasets": sum(cell.datasets for cell in cells),
+            "received": received,
+            "success": sum(cell.success for cell in cells),
+            "failed": failed,
+            "failure_rate": failed / received if received else 0.0,
+            "stale": sum(cell.stale(cutoff) for cell in cells),
+            "degraded": sum(cell.degraded for cell in cells)
+        }
+
+    def summary(self, group_by: Sequence[str] = (), stale_after: float = 3600.0) -> Dict[str, Any]:
+        cutoff = time.time() - stale_after
+        statuses: Dict[str, int] = {}
+        for (_, status), cell in self._cells.items():
+            statuses[status or "unknown"] = statuses.get(status or "unknown", 0) + cell.datasets
+        summary = {
+            "generation": self.generation,
+            "generated_at": self.generated_at,
+            "stale_after_seconds": stale_after,
+            **self._totals(list(self._cells.values()), cutoff),
+            "status": statuses
+        }
+        if group_by:
+            groups: Dict[Tuple[Optional[str], ...], List[_Cell]] = {}
+            for (dataset_type, status), cell in self._cells.items():
+                values = {"type": dataset_type, "status": status}
+                groups.setdefault(tuple(values[key] for key in group_by), []).append(cell)
+            summary["groups"] = [
+                {**dict(zip(group_by, key)), **self._totals(cells, cutoff)}
+                for key, cells in sorted(groups.items(), key=lambda item: tuple(value or "" for value in item[0]))
+            ]
+        return summary
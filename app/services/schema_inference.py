@@ -0,0 +1,103 @@
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.cache import MISS, MetricsCache
+
+logger = logging.getLogger(__name__)
+
+JSON_SCHEMA_DRAFT = "https://json-schema.org/draft/2020-12/schema"
+
+# A shape is the structure of a JSON value without its data: a type name
+# for scalars, ("object", ((key, shape), ...)) in key order, or
+# ("array", (distinct element shapes, ...)) in order of first appearance.
+# Events with the same shape always infer to the same schema.
+Shape = Any
+
+
+def shape_of(value: Any) -> Shape:
+    if isinstance(value, dict):
+        return ("object", tuple((key, shape_of(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        shapes: List[Shape] = []
+        for item in value:
+            shape = shape_of(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return ("array", tuple(shapes))
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    return "string"
+
+
+def fingerprint(shape: Shape) -> str:
+    return hashlib.sha1(repr(shape).encode()).hexdigest()
+
+
+def _schema(shape: Shape) -> Dict[str, Any]:
+    # Same structure as /v2/datasets/dataschema: objects allow additional
+    # properties and list none as required, arrays take their items from
+    # the first element, and null is typed as a string
+    if isinstance(shape, tuple) and shape[0] == "object":
+        return {
+            "type": "object",
+            "properties": {key: _schema(item) for key, item in shape[1]},
+            "additionalProperties": True
+        }
+    if isinstance(shape, tuple):
+        return {"type": "array", "items": _schema(shape[1][0]) if shape[1] else {}}
+    return {"type": "string" if shape == "null" else shape}
+
+
+def infer_schema(sample_event: Dict[str, Any]) -> Dict[str, Any]:
+    return _document(shape_of(sample_event))
+
+
+def _document(shape: Shape) -> Dict[str, Any]:
+    return {"$schema": JSON_SCHEMA_DRAFT, **_schema(shape)}
+
+
+class SchemaInference:
+    """JSON schema inference for sample events, cached by event shape.
+
+    Schemas handed out are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.cache = MetricsCache(max_entries=max_entries)
+        self.verified = 0
+        self.mismatches = 0
+
+    def infer(self, sample_event: Any) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        # (fingerprint, schema); (None, None) for events that can't be
+        # inferred locally, i.e. anything but a non-empty object
+        if not isinstance(sample_event, dict) or not sample_event:
+            return None, None
+        shape = shape_of(sample_event)
+        key = fingerprint(shape)
+        state, schema = self.cache.lookup(key)
+        if state == MISS:
+            schema = _document(shape)
+            self.cache.set(key, schema, immutable=True)
+        return key, schema
+
+    def verify(self, key: str, local: Dict[str, Any], remote: Any) -> bool:
+        self.verified += 1
+        if local == remote:
+            return True
+        self.mismatches += 1
+        logger.warning("local schema differs from backend schema", extra={"fingerprint": key})
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        cache = self.cache.stats()
+        return {
+            "entries": cache["entries"],
+            "hits": cache["hits"],
+            "misses": cache["misses"],
+            "verified": self.verified,
+            "mismatches": self.mismatches
+        }
@@ -0,0 +1,188 @@
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Optional
+from app.services.snapshot import SnapshotRefresher, SnapshotView, positions
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file layout: header, the JSON index of a SnapshotView, then its
+# body, so readers can slice records out of the mapped file without
+# parsing them.
+MAGIC = b"DSSNAP04"
+HEADER = struct.Struct("<8sQddQQ")  # magic, generation, generated_at, duration, index length, body length
+GENERATION = struct.Struct("<Q")
+
+
+class SharedSnapshotWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self._control: Optional[mmap.mmap] = None
+
+    def _control_map(self) -> mmap.mmap:
+        if self._control is None:
+            fd = os.open(f"{self.path}.gen", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.fstat(fd).st_size < GENERATION.size:
+                    os.ftruncate(fd, GENERATION.size)
+                self._control = mmap.mmap(fd, GENERATION.size)
+            finally:
+                os.close(fd)
+        return self._control
+
+    def publish(self, view: SnapshotView) -> int:
+        control = self._control_map()
+        generation = GENERATION.unpack_from(control)[0] + 1
+
+        encoded_index = json.dumps(view.index, separators=(",", ":")).encode()
+        header = HEADER.pack(
+            MAGIC,
+            generation,
+            view.generated_at.timestamp(),
+            view.duration,
+            len(encoded_index),
+            len(view.body)
+        )
+
+        # Readers either see the previous file or the complete new one
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as output:
+            output.write(header)
+            output.write(encoded_index)
+            output.write(view.body)
+        os.replace(temporary, self.path)
+        GENERATION.pack_into(control, 0, generation)
+        return generation
+
+    def close(self) -> None:
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+
+class SharedSnapshotReader:
+    """Maps the snapshot file published by the leader worker.
+
+    The file is only remapped when the generation counter changes. Old
+    mappings are never closed explicitly: responses may still be sending
+    slices of them, and they are released once those are gone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._control: Optional[mmap.mmap] = None
+        self._view: Optional[SnapshotView] = None
+
+    def _load(self) -> Optional[SnapshotView]:
+        try:
+            with open(self.path, "rb") as source:
+                mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+        data = memoryview(mapped)
+        magic, generation, generated_at, duration, index_length, body_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            logger.warning("ignoring snapshot file with unknown format", extra={"path": self.path})
+            return None
+        index_end = HEADER.size + index_length
+        index = json.loads(bytes(data[HEADER.size:index_end]))
+        return SnapshotView(
+            generation=generation,
+            generated_at=datetime.fromtimestamp(generated_at, tz=timezone.utc),
+            duration=duration,
+            body=data[index_end:index_end + body_length],
+            index=index,
+            positions=positions(index)
+        )
+
+    def current(self) -> Optional[SnapshotView]:
+        if self._control is None:
+            try:
+                with open(f"{self.path}.gen", "rb") as source:
+                    self._control = mmap.mmap(source.fileno(), GENERATION.size, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return None
+        generation = GENERATION.unpack_from(self._control)[0]
+        if generation and (self._view is None or self._view.generation < generation):
+            view = self._load()
+            if view is not None:
+                self._view = view
+        return self._view
+
+    async def wait_ready(self, timeout: float, poll_interval: float = 0.05) -> Optional[SnapshotView]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        view = self.current()
+        while view is None and loop.time() < deadline:
+            await asyncio.sleep(poll_interval)
+            view = self.current()
+        return view
+
+
+class SharedSnapshot:
+    """Snapshot shared by all workers through a memory-mapped file.
+
+    Workers compete for an exclusive lock on `<path>.lock`; the holder runs
+    the snapshot refresher and publishes every refresh, the others only
+    read. The lock is released when the leader exits, and another worker
+    takes over on its next attempt.
+    """
+
+    def __init__(self, refresher: SnapshotRefresher, path: str, retry_interval: Optional[float] = None):
+        self.refresher = refresher
+        self.path = path
+        self.retry_interval = retry_interval or refresher.interval
+        self.reader = SharedSnapshotReader(path)
+        self.writer = SharedSnapshotWriter(path)
+        self._lock_fd: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        refresher.subscribe(self._publish)
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_fd is not None
+
+    def _publish(self, view: SnapshotView) -> None:
+        if self.is_leader:
+            generation = self.writer.publish(view)
+            logger.debug("published snapshot", extra={"generation": generation, "datasets": len(view)})
+
+    def _try_lock(self) -> bool:
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _run(self) -> None:
+        while not self._try_lock():
+            await asyncio.sleep(self.retry_interval)
+        logger.info("elected snapshot leader", extra={"pid": os.getpid()})
+        self.refresher.start()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.refresher.stop()
+        self.writer.close()
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from app.core.config import get_settings
+from app.core.serialization import dumps, loads
+from app.services.dataset_service import DatasetService
+from app.services.enrichment import EnrichmentEngine, Record
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def record_hash(encoded: bytes) -> str:
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+def positions(index: List[List[Any]]) -> Dict[str, int]:
+    return {entry[6]: position for position, entry in enumerate(index)}
+
+
+class SnapshotView(NamedTuple):
+    """Enriched records serialized once, as one JSON array.
+
+    `index` holds [offset, length, dataset, status, hash, type, dataset_id]
+    of every record within `body`, so records can be filtered, sliced out
+    and compared by content hash without being parsed again. `positions`
+    maps dataset ids to their position in `index`.
+    """
+
+    generation: int
+    generated_at: datetime
+    duration: float
+    body: memoryview
+    index: List[List[Any]]
+    positions: Dict[str, int]
+
+    @classmethod
+    def build(
+        cls,
+        records: Sequence[Record],
+        generation: int = 0,
+        generated_at: Optional[datetime] = None,
+        duration: float = 0.0,
+        types: Optional[Dict[str, str]] = None
+    ) -> "SnapshotView":
+        # `types` maps dataset ids to their type (event, master, ...)
+        types = types or {}
+        encoded = [dumps(record) for record in records]
+        index = []
+        offset = 1
+        for record, data in zip(records, encoded):
+            dataset_id = record["dataset_id"]
+            index.append([offset, len(data), record["dataset"], record.get("status"), record_hash(data), types.get(dataset_id), dataset_id])
+            offset += len(data) + 1
+        return cls(
+            generation=generation,
+            generated_at=generated_at or datetime.now(timezone.utc),
+            duration=duration,
+            body=memoryview(b"[" + b",".join(encoded) + b"]"),
+            index=index,
+            positions=positions(index)
+        )
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def record(self, position: int) -> memoryview:
+        offset, length = self.index[position][:2]
+        return self.body[offset:offset + length]
+
+    def dataset(self, position: int) -> str:
+        return self.index[position][2]
+
+    def status(self, position: int) -> Optional[str]:
+        return self.index[position][3]
+
+    def hash(self, position: int) -> str:
+        return self.index[position][4]
+
+    def dataset_type(self, position: int) -> Optional[str]:
+        return self.index[position][5]
+
+    def dataset_id(self, position: int) -> str:
+        return self.index[position][6]
+
+    def entries(self) -> Iterable[Tuple[str, str]]:
+        # (dataset id, hash) of every record
+        return ((entry[6], entry[4]) for entry in self.index)
+
+    def parse(self, position: int) -> Record:
+        return loads(bytes(self.record(position)))
+
+
+class SnapshotRefresher:
+    """Keeps an enriched snapshot of the live datasets in memory.
+
+    A single background task rebuilds the snapshot every `interval` seconds
+    (randomly jittered by +/- `jitter` of the interval) and swaps it in as a
+    whole; refreshes never overlap. Only the serialized view is kept.
+    """
+
+    def __init__(
+        self,
+        service: DatasetService,
+        engine: EnrichmentEngine,
+        interval: Optional[float] = None,
+        jitter: Optional[float] = None
+    ):
+        self.service = service
+        self.engine = engine
+        self.interval = interval or settings.SNAPSHOT_REFRESH_INTERVAL_SECONDS
+        self.jitter = settings.SNAPSHOT_REFRESH_JITTER if jitter is None else jitter
+        self._view: Optional[SnapshotView] = None
+        self._lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[SnapshotView], None]] = []
+        self.refresh_count = 0
+        self.refresh_errors = 0
+
+    @property
+    def view(self) -> Optional[SnapshotView]:
+        return self._view
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, listener: Callable[[SnapshotView], None]) -> None:
+        # Called with every new view, after it has been swapped in
+        self._listeners.append(listener)
+
+    async def refresh(self) -> SnapshotView:
+        async with self._lock:
+            started = time.perf_counter()
+            datasets = await self.service.get_live_datasets()
+            enriched = await self.engine.enrich(datasets)
+            view = SnapshotView.build(
+                enriched,
+                generation=self.refresh_count + 1,
+                generated_at=datetime.now(timezone.utc),
+                duration=time.perf_counter() - started,
+                types={
+                    dataset.get('dataset_id'): dataset.get('type')
+                    for dataset in datasets if isinstance(dataset, dict)
+                }
+            )
+            self._view = view
+            self.refresh_count += 1
+            self._ready.set()
+            for listener in self._listeners:
+                try:
+                    listener(view)
+                except Exception:
+                    logger.exception("snapshot listener failed")
+            return view
+
+    def _next_delay(self) -> float:
+        return max(self.interval * (1 + random.uniform(-self.jitter, self.jitter)), 0.0)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The previous view keeps being served
+                self.refresh_errors += 1
+                logger.exception("snapshot refresh failed", extra={"refresh_errors": self.refresh_errors})
+            await asyncio.sleep(self._next_delay())
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> Optional[SnapshotView]:
+        if self._view is None:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._view
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class IdleStop:
+    """Stops an on-demand refresh once nothing has needed it for a while.
+
+    `touch` records a use and stops the refresh `idle_after` seconds after
+    the last one, unless `in_use` says someone else (e.g. a stream
+    subscriber) still needs it. `stop_if_idle` is for those other users to
+    call when they go away.
+    """
+
+    def __init__(self, stop: Callable[[], Any], idle_after: float, in_use: Callable[[], bool] = lambda: False):
+        self.stop = stop
+        self.idle_after = idle_after
+        self.in_use = in_use
+        self.used_at = float("-inf")
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def idle(self) -> bool:
+        return time.monotonic() - self.used_at >= self.idle_after and not self.in_use()
+
+    def touch(self) -> None:
+        self.used_at = time.monotonic()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            remaining = self.used_at + self.idle_after - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+        await self.stop_if_idle()
+
+    async def stop_if_idle(self) -> None:
+        if self.idle:
+            await self.stop()
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
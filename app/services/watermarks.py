@@ -0,0 +1,38 @@
+from typing import Dict, Optional
+
+
+class LastSyncedWatermarks:
+    """Last known synced time per dataset, in epoch milliseconds.
+
+    Datasets that were scanned without finding any event keep the time the
+    scan covered up to instead, so their history is never scanned twice.
+    """
+
+    def __init__(self, overlap_ms: int = 0):
+        self.overlap_ms = overlap_ms
+        self._last_synced: Dict[str, int] = {}
+        self._checked_until: Dict[str, int] = {}
+
+    def __contains__(self, dataset_id: str) -> bool:
+        return dataset_id in self._last_synced or dataset_id in self._checked_until
+
+    def get(self, dataset_id: str) -> Optional[int]:
+        return self._last_synced.get(dataset_id)
+
+    def since(self, dataset_id: str) -> Optional[int]:
+        # Lower bound of the next lookup; None means nothing is known yet
+        watermark = self._last_synced.get(dataset_id, self._checked_until.get(dataset_id))
+        if watermark is None:
+            return None
+        return max(watermark - self.overlap_ms, 0)
+
+    def update(self, dataset_id: str, last_synced_time: int) -> None:
+        if not isinstance(last_synced_time, (int, float)):
+            return
+        if last_synced_time > self._last_synced.get(dataset_id, 0):
+            self._last_synced[dataset_id] = int(last_synced_time)
+            self._checked_until.pop(dataset_id, None)
+
+    def mark_checked(self, dataset_id: str, until_ms: int) -> None:
+        if dataset_id not in self._last_synced:
+            self._checked_until[dataset_id] = max(until_ms, self._checked_until.get(dataset_id, 0))
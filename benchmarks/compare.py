@@ -0,0 +1,58 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Compares two benchmark result files and exits non-zero when a latency
+# percentile regressed or throughput dropped by more than the threshold.
+
+METRICS = ("p50", "p95", "p99")
+
+
+def load(path: str) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    with open(path) as source:
+        report = json.load(source)
+    return {(result["scenario"], result["datasets"]): result for result in report["results"]}
+
+
+def change(baseline: Optional[float], current: Optional[float]) -> Optional[float]:
+    if not baseline or current is None:
+        return None
+    return (current - baseline) / baseline * 100
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> List[str]:
+    baseline = load(baseline_path)
+    current = load(current_path)
+    regressions: List[str] = []
+    for key in sorted(baseline.keys() & current.keys()):
+        scenario, datasets = key
+        before, after = baseline[key], current[key]
+        cells = []
+        for metric in METRICS:
+            delta = change(before["latency_ms"][metric], after["latency_ms"][metric])
+            cells.append(f"{metric} {before['latency_ms'][metric]} -> {after['latency_ms'][metric]}ms")
+            if delta is not None and delta > threshold:
+                regressions.append(f"{scenario}/{datasets} {metric} +{delta:.1f}%")
+        delta = change(before["throughput_rps"], after["throughput_rps"])
+        cells.append(f"rps {before['throughput_rps']} -> {after['throughput_rps']}")
+        if delta is not None and -delta > threshold:
+            regressions.append(f"{scenario}/{datasets} throughput {delta:.1f}%")
+        print(f"{scenario:>6} datasets={datasets:<5} " + "  ".join(cells))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args()
+    regressions = compare(args.baseline, args.current, args.threshold)
+    if regressions:
+        print("regressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
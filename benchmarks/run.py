@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import httpx
+
+# Load driver for the Dataset API. For every scale it starts the stub
+# backend and a fresh API process (so caches start cold), then drives
+# /datasets/list and /datasets/create with a fixed number of concurrent
+# clients and records throughput and latency percentiles.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_EVENT = {
+    "eid": "bench-event",
+    "ets": 1746266400000,
+    "device": {"id": "device-1", "os": "linux", "memory": 2048},
+    "readings": [{"sensor": "temperature", "value": 21.5}],
+    "active": True
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(target: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL
+    )
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout}s")
+            await asyncio.sleep(0.1)
+
+
+def percentile(ordered: List[float], value: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(int(round(value / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    to_ms = lambda seconds: None if seconds is None else round(seconds * 1000, 2)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "min": to_ms(ordered[0] if ordered else None),
+            "p50": to_ms(percentile(ordered, 50)),
+            "p95": to_ms(percentile(ordered, 95)),
+            "p99": to_ms(percentile(ordered, 99)),
+            "max": to_ms(ordered[-1] if ordered else None),
+            "mean": to_ms(sum(ordered) / len(ordered) if ordered else None)
+        }
+    }
+
+
+def list_request(index: int) -> Dict[str, Any]:
+    return {"method": "GET", "url": "/datasets/list"}
+
+
+def create_request(index: int) -> Dict[str, Any]:
+    return {
+        "method": "POST",
+        "url": "/datasets/create",
+        "json": {
+            "dataset_purpose": "event",
+            "sample_event": json.dumps({**SAMPLE_EVENT, "eid": f"bench-event-{index}"}),
+            "data_location": "kafka",
+            "dataset_name": f"bench create {index}",
+            "pii_fields": [{"field": "device.id", "treatment": "mask"}],
+            "dedup_key": "eid",
+            "timestamp_key": "ets",
+            "storage_option": "Apache Druid"
+        }
+    }
+
+
+SCENARIOS = {"list": list_request, "create": create_request}
+
+
+async def drive(client: httpx.AsyncClient, build, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(**build(index))
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_scale(args: argparse.Namespace, scale: int, api_env: Dict[str, str]) -> List[Dict[str, Any]]:
+    stub_port = args.stub_port or free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    api_port = free_port()
+    api_url = f"http://127.0.0.1:{api_port}"
+    stub_env = {
+        "STUB_DATASETS": str(scale),
+        "STUB_LATENCY_MS": str(args.latency_ms),
+        "STUB_JITTER_MS": str(args.jitter_ms)
+    }
+    # The API's SQLite files go to a throwaway directory so runs start
+    # cold and leave nothing in the checkout
+    state_dir = tempfile.TemporaryDirectory(prefix="dataset-api-bench-")
+    api_env = {
+        "METRICS_STORE_PATH": os.path.join(state_dir.name, "metrics.sqlite3"),
+        "CREATE_JOBS_PATH": os.path.join(state_dir.name, "create_jobs.sqlite3"),
+        **api_env
+    }
+    stub = start_server("benchmarks.stub_backend:app", stub_port, stub_env)
+    api = start_server("app.main:app", api_port, {"LOG_LEVEL": "WARNING", **api_env, "BACKEND_URL": stub_url})
+    results = []
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=api_url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client, f"{stub_url}/_stub/config")
+            await wait_ready(client, f"{api_url}/openapi.json")
+            for scenario in args.scenarios:
+                build = SCENARIOS[scenario]
+                # Cold: the first request after startup, with empty caches
+                cold = await drive(client, build, 1, 1)
+                await drive(client, build, args.warmup, min(args.concurrency, max(args.warmup, 1)))
+                await client.post(f"{stub_url}/_stub/reset")
+                result = await drive(client, build, args.requests, args.concurrency)
+                backend_calls = (await client.get(f"{stub_url}/_stub/stats")).json()["calls"]
+                result.update({
+                    "scenario": scenario,
+                    "datasets": scale,
+                    "concurrency": args.concurrency,
+                    "cold_latency_ms": cold["latency_ms"]["max"],
+                    "backend_calls": backend_calls
+                })
+                results.append(result)
+                print(
+                    f"{scenario:>6} datasets={scale:<5} rps={result['throughput_rps']} "
+                    f"p50={result['latency_ms']['p50']}ms p95={result['latency_ms']['p95']}ms "
+                    f"p99={result['latency_ms']['p99']}ms errors={result['errors']}",
+                    flush=True
+                )
+    finally:
+        stop_server(api)
+        stop_server(stub)
+        state_dir.cleanup()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Dataset API against a local stub backend")
+    parser.add_argument("--scales", default="10,100,1000", help="comma separated dataset counts")
+    parser.add_argument("--scenarios", default="list,create", help="comma separated: list, create")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario and scale")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests before each measurement")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub backend latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="uniform +/- jitter on the latency")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--stub-port", type=int, default=0, help="fixed stub backend port (default: any free port)")
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="KEY=VALUE",
+        help="extra settings for the API process, e.g. --env SNAPSHOT_MODE=true"
+    )
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the JSON results")
+    args = parser.parse_args(argv)
+    args.scales = [int(scale) for scale in args.scales.split(",") if scale]
+    args.scenarios = [scenario for scenario in args.scenarios.split(",") if scenario]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    api_env = dict(item.split("=", 1) for item in args.env)
+    started_at = datetime.now(timezone.utc).isoformat()
+    results: List[Dict[str, Any]] = []
+    for scale in args.scales:
+        results.extend(await run_scale(args, scale, api_env))
+
+    report = {
+        "meta": {
+            "started_at": started_at,
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "api_env": api_env,
+            "stub": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms},
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency
+        },
+        "results": results
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
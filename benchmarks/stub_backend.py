@@ -0,0 +1,235 @@
+import asyncio
+import os
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Stand-in for the Obsrv backend used by the benchmarks. Answers the calls
+# DatasetService makes with deterministic data for `datasets` live datasets,
+# after an injected latency of latency_ms +/- jitter_ms.
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class StubConfig(BaseModel):
+    datasets: int = int(os.getenv("STUB_DATASETS", "100"))
+    latency_ms: float = float(os.getenv("STUB_LATENCY_MS", "20"))
+    jitter_ms: float = float(os.getenv("STUB_JITTER_MS", "10"))
+    # Per endpoint overrides of latency_ms, keyed like the service's endpoint ids
+    endpoint_latency_ms: Dict[str, float] = {}
+    error_rate: float = 0.0
+
+
+config = StubConfig()
+calls: Dict[str, int] = {}
+
+app = FastAPI(title="Dataset API benchmark backend")
+
+
+def dataset_id(index: int) -> str:
+    return f"bench-dataset-{index}"
+
+
+def dataset_index(value: str) -> Optional[int]:
+    match = re.fullmatch(r"bench[-_]dataset[-_](\d+)", value)
+    if match is None or int(match.group(1)) >= config.datasets:
+        return None
+    return int(match.group(1))
+
+
+async def backend_call(endpoint: str) -> bool:
+    # Returns False when the call should fail with a 500
+    calls[endpoint] = calls.get(endpoint, 0) + 1
+    latency = config.endpoint_latency_ms.get(endpoint, config.latency_ms)
+    delay = max(0.0, latency + random.uniform(-config.jitter_ms, config.jitter_ms))
+    if delay:
+        await asyncio.sleep(delay / 1000)
+    return random.random() >= config.error_rate
+
+
+def error_response() -> JSONResponse:
+    return JSONResponse(status_code=500, content={"error": "injected failure"})
+
+
+def last_synced_time(index: int) -> int:
+    now = datetime.now(timezone.utc)
+    return int((now - timedelta(minutes=index % 600)).timestamp() * 1000)
+
+
+def events_count(index: int, day: int) -> int:
+    return (index * 37 + day * 11) % 5000
+
+
+def failed_events(index: int) -> int:
+    return index % 7
+
+
+@app.get("/_stub/config")
+async def get_config():
+    return config
+
+
+@app.put("/_stub/config")
+async def update_config(update: Dict[str, Any]):
+    global config
+    config = StubConfig(**{**config.model_dump(), **update})
+    return config
+
+
+@app.get("/_stub/stats")
+async def stats():
+    return {"calls": calls}
+
+
+@app.post("/_stub/reset")
+async def reset():
+    calls.clear()
+    return {"calls": calls}
+
+
+@app.post("/v2/datasets/list")
+async def list_datasets(request: Request):
+    if not await backend_call("list"):
+        return error_response()
+    data = [
+        {
+            "dataset_id": dataset_id(index),
+            "name": f"Bench dataset {index}",
+            "type": "master" if index % 5 == 0 else "event",
+            "status": "Live",
+            "created_date": "2025-01-01T00:00:00.000Z"
+        }
+        for index in range(config.datasets)
+    ]
+    return {"id": "api.datasets.list", "result": {"data": data, "count": len(data)}}
+
+
+def prometheus_result(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"status": "success", "data": {"resultType": "vector", "result": samples}}
+
+
+def failed_events_response(query: Dict[str, Any]) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc).timestamp()
+    index = dataset_index(query.get("dataset") or "")
+    if query.get("dataset"):
+        value = failed_events(index) if index is not None else 0
+        return prometheus_result([{"metric": {}, "value": [now, str(value)]}])
+    # Batched query: one series per dataset tagged in it, keyed by dataset_key
+    promql = query.get("params", {}).get("query", "")
+    keys = {index: dataset_id(index).replace("-", "_") for index in range(config.datasets)}
+    return prometheus_result([
+        {"metric": {"dataset_key": key}, "value": [now, str(failed_events(index))]}
+        for index, key in keys.items()
+        if failed_events(index) and f'"dataset_key", "{key}"' in promql
+    ])
+
+
+def druid_filter_values(druid_query: Dict[str, Any]) -> List[str]:
+    values: List[str] = []
+    for field in druid_query.get("filter", {}).get("fields", []):
+        if field.get("dimension") != "ctx_dataset":
+            continue
+        if field.get("type") == "in":
+            values.extend(field.get("values", []))
+        elif field.get("value"):
+            values.append(field["value"])
+    return values
+
+
+def druid_response(druid_query: Dict[str, Any]) -> Any:
+    indexes = [
+        index for index in map(dataset_index, druid_filter_values(druid_query))
+        if index is not None
+    ]
+    start = datetime.fromisoformat(druid_query["intervals"].split("/")[0][:10]).date()
+    today = datetime.now(IST).date()
+
+    if druid_query.get("dimensions") == ["ctx_dataset"]:
+        # Events summary: one row per dataset and day
+        rows = []
+        day = start
+        while day <= today:
+            offset = (today - day).days
+            for index in indexes:
+                rows.append({
+                    "timestamp": f"{day.isoformat()}T00:00:00.000+05:30",
+                    "event": {
+                        "ctx_dataset": dataset_id(index),
+                        "count": events_count(index, offset),
+                        "last_synced_time": last_synced_time(index)
+                    }
+                })
+            day += timedelta(days=1)
+        return {"result": rows}
+
+    if druid_query.get("queryType") == "groupBy":
+        if not indexes:
+            return {"result": []}
+        return {"result": [{"event": {"last_synced_time": last_synced_time(indexes[0])}}]}
+
+    offset = (today - start).days
+    count = events_count(indexes[0], offset) if indexes else 0
+    return {"result": [{"result": {"count": count}}]}
+
+
+@app.post("/v2/data/metrics")
+async def metrics(request: Request):
+    endpoint = request.query_params.get("id", "metrics")
+    body = await request.json()
+    if not await backend_call(endpoint):
+        return error_response()
+    query = body.get("query", {})
+    if query.get("url", "").startswith("/prom"):
+        return failed_events_response(query)
+    return druid_response(query.get("body", {}).get("query", {}))
+
+
+@app.post("/v2/datasets/health")
+async def health(request: Request):
+    body = await request.json()
+    if not await backend_call("health"):
+        return error_response()
+    index = dataset_index(body.get("request", {}).get("dataset_id", ""))
+    status = "Unhealthy" if index is not None and index % 10 == 9 else "Healthy"
+    return {"id": "api.datasets.health", "result": {"status": status}}
+
+
+def infer_schema(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return {
+            "type": "object",
+            "properties": {key: infer_schema(item) for key, item in value.items()},
+            "additionalProperties": True
+        }
+    if isinstance(value, list):
+        return {"type": "array", "items": infer_schema(value[0]) if value else {}}
+    if isinstance(value, bool):
+        return {"type": "boolean"}
+    if isinstance(value, (int, float)):
+        return {"type": "number"}
+    return {"type": "string"}
+
+
+@app.post("/v2/datasets/dataschema")
+async def dataschema(request: Request):
+    body = await request.json()
+    if not await backend_call("dataschema"):
+        return error_response()
+    data = body.get("request", {}).get("data") or [{}]
+    schema = {"$schema": "https://json-schema.org/draft/2020-12/schema", **infer_schema(data[0])}
+    return {"id": "api.datasets.dataschema", "result": {"schema": schema}}
+
+
+@app.post("/v2/datasets/create")
+async def create(request: Request):
+    body = await request.json()
+    if not await backend_call("create"):
+        return error_response()
+    return {
+        "id": "api.datasets.create",
+        "result": {"id": body.get("request", {}).get("dataset_id"), "version_key": "1"}
+    }
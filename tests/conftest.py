@@ -0,0 +1,6 @@
+import os
+
+# Settings are read when app modules are imported; keep the SQLite stores
+# out of the checkout
+os.environ["METRICS_STORE_PATH"] = ""
+os.environ["CREATE_JOBS_PATH"] = ""
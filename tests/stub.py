@@ -0,0 +1,30 @@
+import httpx
+from benchmarks import stub_backend
+from app.services.dataset_service import DatasetService
+
+
+def configure_stub(**config) -> None:
+    # Without injected latency unless asked for
+    stub_backend.config = stub_backend.StubConfig(**{"datasets": 10, "latency_ms": 0, "jitter_ms": 0, **config})
+    stub_backend.calls.clear()
+
+
+def stub_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_backend.app))
+
+
+def stub_service(**config) -> DatasetService:
+    # A DatasetService talking to the benchmark stub backend in process
+    configure_stub(**config)
+    service = DatasetService()
+    service.use_client(stub_client())
+    return service
+
+
+def api_client(**config) -> httpx.AsyncClient:
+    # The API app, without its lifespan, with its service talking to the stub
+    from app.main import app
+    from app.api.v1 import endpoints
+    configure_stub(**config)
+    endpoints.dataset_service.use_client(stub_client())
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
@@ -0,0 +1,147 @@
+import asyncio
+import pytest
+from app.core.admission import (
+    AIMDLimit, AdmissionController, BULK, CRITICAL, INTERACTIVE, Rejected, route_class
+)
+
+
+def controller(limit=1, max_queue=1, queue_delay_target=0.05, max_queue_delay=0.05):
+    return AdmissionController(AIMDLimit(limit, 1, limit, target=1.0), max_queue, queue_delay_target, max_queue_delay)
+
+
+def test_route_classes():
+    assert route_class("POST", "/datasets/create/batch") == BULK
+    assert route_class("POST", "/datasets/create") == CRITICAL
+    assert route_class("GET", "/datasets/list") == BULK
+    assert route_class("GET", "/datasets/summary") == INTERACTIVE
+    assert route_class("GET", "/datasets/stream") is None
+    assert route_class("GET", "/docs") is None
+
+
+def test_full_queue_is_rejected_with_429():
+    async def main():
+        admission = controller(max_queue=1, max_queue_delay=1.0)
+        await admission.acquire(BULK)
+        queued = asyncio.ensure_future(admission.acquire(BULK))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as rejected:
+            await admission.acquire(BULK)
+        assert rejected.value.status_code == 429
+        assert rejected.value.reason == "queue_full"
+        assert rejected.value.retry_after == 1
+
+        admission.release()
+        await queued
+        assert admission.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_waiting_past_max_queue_delay_is_shed_with_503():
+    async def main():
+        admission = controller(queue_delay_target=0.01, max_queue_delay=0.05)
+        await admission.acquire(BULK)
+        with pytest.raises(Rejected) as rejected:
+            await admission.acquire(BULK)
+        assert rejected.value.status_code == 503
+        assert rejected.value.reason == "queue_delay"
+
+        # The last one waited past the target, so the next is shed at once
+        with pytest.raises(Rejected) as rejected:
+            await asyncio.wait_for(admission.acquire(BULK), 0.01)
+        assert rejected.value.status_code == 503
+        assert admission.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_shedding_is_per_route_class():
+    async def main():
+        admission = controller(queue_delay_target=0.01, max_queue_delay=0.05)
+        await admission.acquire(BULK)
+        with pytest.raises(Rejected):
+            await admission.acquire(BULK)
+        critical = asyncio.ensure_future(admission.acquire(CRITICAL))
+        await asyncio.sleep(0)
+        admission.release()
+        await critical
+        assert admission.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_release_admits_higher_priority_first():
+    async def main():
+        admission = controller(max_queue=2, max_queue_delay=1.0)
+        await admission.acquire(INTERACTIVE)
+        order = []
+
+        async def wait(name):
+            await admission.acquire(name)
+            order.append(name)
+
+        bulk = asyncio.ensure_future(wait(BULK))
+        await asyncio.sleep(0)
+        critical = asyncio.ensure_future(wait(CRITICAL))
+        await asyncio.sleep(0)
+        admission.release()
+        await critical
+        assert order == [CRITICAL]
+        admission.release()
+        await bulk
+        assert order == [CRITICAL, BULK]
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_given_a_slot_releases_it():
+    async def main():
+        admission = controller(max_queue_delay=1.0)
+        await admission.acquire(BULK)
+        waiter = asyncio.ensure_future(admission.acquire(BULK))
+        await asyncio.sleep(0)
+        admission.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert admission.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_limit_grows_once_per_request_whatever_the_fan_out():
+    limit = AIMDLimit(10, 1, 100, target=1.0)
+    with limit.request():
+        for _ in range(50):
+            limit.observe(0.01, True)
+    assert limit.value == pytest.approx(10.1)
+    # Calls outside a request, e.g. background refreshes, don't grow it
+    limit.observe(0.01, True)
+    assert limit.value == pytest.approx(10.1)
+    # Nor does a request without backend calls
+    with limit.request():
+        pass
+    assert limit.value == pytest.approx(10.1)
+
+
+def test_slow_call_cuts_the_limit_once_per_target():
+    limit = AIMDLimit(10, 1, 100, target=1.0)
+    with limit.request():
+        limit.observe(0.01, True)
+        limit.observe(2.0, True)
+        limit.observe(0.01, False)
+    # One cut for the wave, and no growth for the request that saw it
+    assert limit.value == pytest.approx(9.0)
+
+
+def test_calls_in_child_tasks_count_for_the_request():
+    async def main():
+        limit = AIMDLimit(10, 1, 100, target=1.0)
+
+        async def call():
+            limit.observe(0.01, True)
+
+        with limit.request():
+            await asyncio.gather(*(call() for _ in range(5)))
+        return limit.value
+
+    assert asyncio.run(main()) == pytest.approx(10.1)
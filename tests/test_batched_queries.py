@@ -0,0 +1,67 @@
+import asyncio
+from app.services import dataset_service as dataset_service_module
+from app.services.dataset_service import EVENTS_COUNT, FAILED_EVENTS_COUNT
+from benchmarks import stub_backend
+from tests.stub import stub_service
+
+DATASET_IDS = [f"bench-dataset-{i}" for i in range(10)] + ["unknown-dataset"]
+
+
+def run(service, func):
+    async def main():
+        try:
+            return await func()
+        finally:
+            await service.aclose()
+    return asyncio.run(main())
+
+
+def test_batched_failed_counts_match_single_dataset_counts(monkeypatch):
+    monkeypatch.setattr(dataset_service_module.settings, "PROMETHEUS_BATCH_SIZE", 4)
+    service = stub_service()
+    start, end = service.get_time_intervals()["today"]
+
+    async def main():
+        batched = await service.get_failed_events_counts(DATASET_IDS, start, end)
+        assert stub_backend.calls[FAILED_EVENTS_COUNT] == 3
+        single = {dataset_id: await service._fetch_failed_events_count(dataset_id, start, end) for dataset_id in DATASET_IDS}
+        assert batched == single
+        assert batched["bench-dataset-3"] == 3 and batched["unknown-dataset"] == 0
+
+    run(service, main)
+
+
+def test_batched_failed_counts_by_interval():
+    service = stub_service()
+    intervals = service.get_time_intervals()
+
+    async def main():
+        counts = await service.get_failed_events_counts_by_interval(DATASET_IDS[:3], intervals)
+        assert set(counts) == {"today", "yesterday"}
+        assert counts["today"] == {"bench-dataset-0": 0, "bench-dataset-1": 1, "bench-dataset-2": 2}
+        # Cached: the single-dataset reads don't go to the backend again
+        calls = stub_backend.calls[FAILED_EVENTS_COUNT]
+        assert await service.get_failed_events_count("bench-dataset-2", *intervals["today"]) == 2
+        assert stub_backend.calls[FAILED_EVENTS_COUNT] == calls
+
+    run(service, main)
+
+
+def test_events_summary_matches_single_dataset_queries():
+    service = stub_service()
+    intervals = service.get_time_intervals()
+
+    async def main():
+        summary = await service.get_events_summary(DATASET_IDS, intervals)
+        assert stub_backend.calls[EVENTS_COUNT] == 1
+        for dataset_id in DATASET_IDS:
+            entry = summary[dataset_id]
+            assert entry["today"] == await service._fetch_events_count(dataset_id, *intervals["today"])
+            assert entry["yesterday"] == await service._fetch_events_count(dataset_id, *intervals["yesterday"])
+            if dataset_id == "unknown-dataset":
+                assert entry["last_synced_time"] is None
+            else:
+                # Kept as the watermark for later per-dataset lookups
+                assert entry["last_synced_time"] == service.watermarks.get(dataset_id)
+
+    run(service, main)
@@ -0,0 +1,28 @@
+import json
+from benchmarks.compare import compare
+from benchmarks.run import summarize
+
+
+def report(path, p95, throughput):
+    summary = summarize([0.01] * 94 + [p95] * 6, 0, 1.0)
+    summary["throughput_rps"] = throughput
+    path.write_text(json.dumps({"results": [{"scenario": "list", "datasets": 100, **summary}]}))
+    return str(path)
+
+
+def test_summarize():
+    summary = summarize([0.3, 0.1, 0.2], errors=1, elapsed=2.0)
+    assert summary["requests"] == 4 and summary["throughput_rps"] == 1.5
+    assert summary["latency_ms"]["p50"] == 200.0 and summary["latency_ms"]["max"] == 300.0
+    assert summarize([], 0, 0)["latency_ms"]["p99"] is None
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    baseline = report(tmp_path / "baseline.json", 0.1, 100)
+    assert compare(baseline, report(tmp_path / "same.json", 0.105, 95), threshold=10) == []
+    assert compare(baseline, report(tmp_path / "slower.json", 0.2, 80), threshold=10) == [
+        "list/100 p95 +100.0%",
+        "list/100 p99 +100.0%",
+        "list/100 throughput -20.0%"
+    ]
+    assert "p95 100.0 -> 200.0ms" in capsys.readouterr().out
@@ -0,0 +1,73 @@
+import asyncio
+from app.services import dataset_service as dataset_service_module
+from app.services.bulk_create import BulkCreator, InvalidItem
+from benchmarks import stub_backend
+from tests.stub import stub_service
+
+
+def item(name, sample_event='{"id": "1", "count": 2}'):
+    return {
+        "dataset_purpose": "event",
+        "sample_event": sample_event,
+        "data_location": "kafka",
+        "dataset_name": name,
+        "pii_fields": [],
+        "dedup_key": "id",
+        "timestamp_key": "ts",
+        "storage_option": "druid"
+    }
+
+
+def run_batch(items):
+    async def main():
+        service = stub_service()
+        names = []
+        get_data_schema = service.get_data_schema
+
+        async def recording(dataset_name, sample_event):
+            names.append(dataset_name)
+            return await get_data_schema(dataset_name, sample_event)
+
+        service.get_data_schema = recording
+        try:
+            results = [result async for result in BulkCreator(service, max_concurrency=4).create_iter(items)]
+        finally:
+            await service.aclose()
+        return sorted(results, key=lambda result: result["index"]), names, service
+
+    return asyncio.run(main())
+
+
+def test_backend_lookups_are_shared_by_name_and_shape(monkeypatch):
+    monkeypatch.setattr(dataset_service_module.settings, "SCHEMA_INFERENCE_MODE", "backend")
+    results, names, _ = run_batch([
+        item("orders"),
+        item("orders", '{"id": "2", "count": 3}'),
+        item("users"),
+        item("users", '{"id": "1", "count": "2"}')
+    ])
+    assert all(result["ok"] for result in results)
+    # Each schema was asked for under the name of the items using it
+    assert sorted(names) == ["orders", "users", "users"]
+    assert stub_backend.calls["dataschema"] == 3
+    assert stub_backend.calls["create"] == 4
+
+
+def test_local_inference_is_shared_by_shape(monkeypatch):
+    monkeypatch.setattr(dataset_service_module.settings, "SCHEMA_INFERENCE_MODE", "local")
+    results, _, service = run_batch([item(f"dataset-{i}") for i in range(5)])
+    assert all(result["ok"] for result in results)
+    assert "dataschema" not in stub_backend.calls
+    assert service.schemas.stats()["misses"] == 1
+
+
+def test_failed_items_are_reported_in_place():
+    results, _, _ = run_batch([
+        item("orders"),
+        InvalidItem("Invalid JSON on NDJSON line"),
+        item("users", "not json"),
+        {"dataset_name": "incomplete"}
+    ])
+    assert [result["ok"] for result in results] == [True, False, False, False]
+    assert [result["status_code"] for result in results] == [200, 400, 400, 422]
+    assert results[0]["dataset_id"] == "orders"
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from app.services import cache as cache_module
+from app.services.cache import FRESH, MISS, STALE, MetricsCache
+from benchmarks import stub_backend
+from tests.stub import stub_service
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_go_stale_then_expire(clock):
+    cache = MetricsCache(ttl=10, stale_ttl=5)
+    cache.set("a", 1)
+    assert cache.lookup("a") == (FRESH, 1)
+    clock.now += 12
+    assert cache.lookup("a") == (STALE, 1)
+    clock.now += 5
+    assert cache.lookup("a") == (MISS, None)
+    assert len(cache) == 0
+
+
+def test_immutable_entries_never_expire(clock):
+    cache = MetricsCache(ttl=10, stale_ttl=5)
+    cache.set("yesterday", 7, immutable=True)
+    clock.now += 10 ** 6
+    assert cache.lookup("yesterday") == (FRESH, 7)
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = MetricsCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.lookup("a")
+    cache.set("c", 3)
+    assert cache.lookup("b") == (MISS, None)
+    assert cache.lookup("a") == (FRESH, 1)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = MetricsCache(max_entries=0)
+    cache.set("a", 1)
+    assert cache.lookup("a") == (MISS, None)
+
+
+def test_stale_values_are_served_while_one_refresh_runs(clock):
+    cache = MetricsCache(ttl=10, stale_ttl=60)
+    loads = []
+
+    async def loader():
+        loads.append(len(loads))
+        await asyncio.sleep(0)
+        return len(loads)
+
+    async def main():
+        assert await cache.get_or_load("a", loader) == 1
+        clock.now += 20
+        # Both readers get the stale value; only one refresh is started
+        assert await asyncio.gather(cache.get_or_load("a", loader), cache.get_or_load("a", loader)) == [1, 1]
+        await asyncio.gather(*cache._refreshing.values())
+        assert cache.lookup("a") == (FRESH, 2)
+        await cache.aclose()
+
+    asyncio.run(main())
+    assert len(loads) == 2
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_failed_refresh_keeps_the_stale_value(clock):
+    cache = MetricsCache(ttl=10, stale_ttl=60)
+
+    async def failing():
+        raise RuntimeError("backend down")
+
+    async def main():
+        cache.set("a", 1)
+        clock.now += 20
+        assert await cache.get_or_load("a", failing) == 1
+        await asyncio.gather(*cache._refreshing.values())
+        assert cache.lookup("a") == (STALE, 1)
+
+    asyncio.run(main())
+    assert cache.stats()["refresh_errors"] == 1
+
+
+def test_failed_backend_queries_are_not_cached():
+    service = stub_service(error_rate=1.0)
+    start, end = service.get_time_intervals()["today"]
+
+    async def main():
+        try:
+            with pytest.raises(Exception):
+                await service.get_failed_events_counts(["bench-dataset-1"], start, end)
+            assert len(service.cache) == 0
+            stub_backend.config.error_rate = 0.0
+            assert await service.get_failed_events_counts(["bench-dataset-1"], start, end) == {"bench-dataset-1": 1}
+        finally:
+            await service.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+import asyncio
+from app.services.coalescing import SingleFlight, request_key
+
+
+def test_concurrent_callers_share_one_call():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(flight.do("key", load) for _ in range(5)))
+        assert results == ["value"] * 5
+        assert calls == 1
+        assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_leaves_call_running_for_others():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "value"
+
+        first = asyncio.ensure_future(flight.do("key", load))
+        second = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == "value"
+        assert first.cancelled()
+
+    asyncio.run(main())
+
+
+def test_last_waiter_cancelled_cancels_call():
+    async def main():
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def load():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.ensure_future(flight.do("key", load)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        assert len(flight) == 0
+
+        # The next caller starts a fresh call
+        async def reload():
+            return "fresh"
+
+        assert await flight.do("key", reload) == "fresh"
+        assert flight.calls == 2
+
+    asyncio.run(main())
+
+
+def test_caller_after_last_waiter_cancelled_starts_new_call():
+    async def main():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def load():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # Still winding down when the next caller arrives
+                await asyncio.sleep(0.05)
+                raise
+
+        caller = asyncio.ensure_future(flight.do("key", load))
+        await started.wait()
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        assert len(flight) == 0
+
+        async def reload():
+            return "fresh"
+
+        assert await flight.do("key", reload) == "fresh"
+
+    asyncio.run(main())
+
+
+def test_failure_reaches_every_caller():
+    async def main():
+        flight = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do("key", load) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(flight) == 0
+
+    asyncio.run(main())
+
+
+def test_request_key_ignores_envelope_fields():
+    first = request_key("/v2/datasets/list", {"id": "api.datasets.list", "ts": 1, "params": {"msgid": "a"}, "request": {}})
+    second = request_key("/v2/datasets/list", {"id": "api.datasets.list", "ts": 2, "params": {"msgid": "b"}, "request": {}})
+    assert first == second
+    assert first != request_key("/v2/datasets/read", {"id": "api.datasets.list", "request": {}})
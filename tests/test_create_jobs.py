@@ -0,0 +1,259 @@
+import asyncio
+import httpx
+import pytest
+from app.services.create_jobs import (
+    FAILED, QUEUED, RUNNING, SUCCEEDED, CreateJobQueue, CreateJobStore, JobConflictError, QueueFullError
+)
+
+REQUEST = {"dataset_name": "orders", "sample_event": "{}"}
+CREATE_REQUEST = {
+    "dataset_purpose": "event",
+    "sample_event": '{"id": "1"}',
+    "data_location": "kafka",
+    "dataset_name": "orders",
+    "pii_fields": [],
+    "dedup_key": "id",
+    "timestamp_key": "ts",
+    "storage_option": "druid"
+}
+
+
+class FakeService:
+    """Backend whose first create commits the dataset and then times out."""
+
+    def __init__(self, existing=()):
+        self.created = set(existing)
+        self.creates = 0
+
+    async def get_data_schema(self, dataset_name, sample_event):
+        return {"result": {"schema": {"type": "object"}}}
+
+    async def create_dataset(self, request, schema_body):
+        self.creates += 1
+        backend_request = httpx.Request("POST", "http://backend/v2/datasets/create")
+        if request.dataset_name in self.created:
+            return httpx.Response(409, json={"error": "dataset already exists"}, request=backend_request)
+        self.created.add(request.dataset_name)
+        if self.creates == 1:
+            raise httpx.ReadTimeout("timed out", request=backend_request)
+        return httpx.Response(200, json={"result": {"id": request.dataset_name}}, request=backend_request)
+
+
+def run(store, func):
+    async def main():
+        try:
+            return await func()
+        finally:
+            await store.aclose()
+    return asyncio.run(main())
+
+
+def test_resubmitting_returns_existing_job(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        job, created = await store.submit("orders", REQUEST)
+        again, created_again = await store.submit("orders", dict(REQUEST))
+        assert created and not created_again
+        assert again.id == job.id and again.status == QUEUED
+
+    run(store, main)
+
+
+def test_different_request_conflicts(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        job, _ = await store.submit("orders", REQUEST)
+        with pytest.raises(JobConflictError) as conflict:
+            await store.submit("orders", {**REQUEST, "sample_event": '{"id": 1}'})
+        assert conflict.value.job.id == job.id
+
+    run(store, main)
+
+
+def test_failed_job_is_queued_again_with_new_request(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        job, _ = await store.submit("orders", REQUEST)
+        await store.claim(60)
+        await store.finish(job.id, FAILED, 400, error="Failed to create dataset")
+        retry = {**REQUEST, "sample_event": '{"id": 1}'}
+        again, created = await store.submit("orders", retry)
+        assert created
+        assert again.id == job.id
+        assert (again.status, again.attempts, again.request, again.error) == (QUEUED, 0, retry, None)
+
+    run(store, main)
+
+
+def test_pending_cap(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        await store.submit("a", REQUEST, max_pending=2)
+        job, _ = await store.submit("b", REQUEST, max_pending=2)
+        with pytest.raises(QueueFullError):
+            await store.submit("c", REQUEST, max_pending=2)
+        # Existing jobs are still returned when the queue is full
+        assert (await store.submit("a", REQUEST, max_pending=2))[1] is False
+        await store.claim(60)
+        await store.claim(60)
+        await store.finish(job.id, SUCCEEDED, 200, {"ok": True})
+        assert (await store.submit("c", REQUEST, max_pending=2))[1] is True
+
+    run(store, main)
+
+
+def test_pending_cap_holds_under_concurrent_submits(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        results = await asyncio.gather(
+            *(store.submit(f"dataset-{i}", REQUEST, max_pending=3) for i in range(10)),
+            return_exceptions=True
+        )
+        assert sum(1 for result in results if not isinstance(result, Exception)) == 3
+        assert all(isinstance(result, QueueFullError) for result in results if isinstance(result, Exception))
+
+    run(store, main)
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        job, _ = await store.submit("orders", REQUEST)
+        claimed = await store.claim(0.05)
+        assert (claimed.id, claimed.status, claimed.attempts) == (job.id, RUNNING, 1)
+        assert await store.claim(0.05) is None
+        await asyncio.sleep(0.1)
+        taken = await store.claim(60)
+        assert (taken.id, taken.status, taken.attempts) == (job.id, RUNNING, 2)
+
+    run(store, main)
+
+
+def test_job_out_of_attempts_is_failed_instead_of_leased(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        job, _ = await store.submit("orders", REQUEST)
+        assert (await store.claim(0.01, max_attempts=2)).attempts == 1
+        await asyncio.sleep(0.05)
+        assert (await store.claim(0.01, max_attempts=2)).attempts == 2
+        await asyncio.sleep(0.05)
+        assert await store.claim(60, max_attempts=2) is None
+        failed = await store.get(job.id)
+        assert (failed.status, failed.attempts, failed.error) == (FAILED, 2, "Gave up after 2 attempts")
+
+    run(store, main)
+
+
+def test_lease_survives_a_new_store(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first = CreateJobStore(path)
+
+    async def submit():
+        await first.submit("orders", REQUEST)
+        return await first.claim(0.05)
+
+    job = run(first, submit)
+    second = CreateJobStore(path)
+
+    async def takeover():
+        await asyncio.sleep(0.1)
+        return await second.claim(60)
+
+    assert run(second, takeover).id == job.id
+
+
+def test_worker_survives_processing_error(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+
+    async def main():
+        queue = CreateJobQueue(None, store, workers=1, lease=0.05, poll_interval=0.01)
+        processed = []
+        done = asyncio.Event()
+
+        async def process(job):
+            processed.append(job.attempts)
+            if len(processed) == 1:
+                raise RuntimeError("database is locked")
+            await store.finish(job.id, SUCCEEDED, 200, {"ok": True})
+            done.set()
+
+        queue._process = process
+        job, _ = await store.submit("orders", REQUEST)
+        queue.start()
+        try:
+            await asyncio.wait_for(done.wait(), 2)
+        finally:
+            tasks, queue._tasks = queue._tasks, []
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        assert processed == [1, 2]
+        assert (await store.get(job.id)).status == SUCCEEDED
+
+    run(store, main)
+
+
+async def run_job(service, store):
+    queue = CreateJobQueue(service, store, workers=1, retry_delay=0.01, poll_interval=0.01)
+    job, _ = await store.submit("orders", CREATE_REQUEST)
+    queue.start()
+    try:
+        for _ in range(200):
+            job = await store.get(job.id)
+            if job.status in (SUCCEEDED, FAILED):
+                return job
+            await asyncio.sleep(0.01)
+        raise AssertionError("job did not finish")
+    finally:
+        await queue.stop()
+
+
+def test_retry_after_committed_timeout_succeeds(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+    service = FakeService()
+    job = asyncio.run(run_job(service, store))
+    assert (job.status, job.attempts, job.status_code, job.error) == (SUCCEEDED, 2, 409, None)
+    assert service.creates == 2
+
+
+def test_conflict_on_first_attempt_fails(tmp_path):
+    store = CreateJobStore(str(tmp_path / "jobs.sqlite3"))
+    job = asyncio.run(run_job(FakeService(existing={"orders"}), store))
+    assert (job.status, job.attempts, job.status_code) == (FAILED, 1, 409)
+
+
+class IdleStore:
+    async def claim(self, lease, max_attempts=None):
+        return None
+
+    async def purge(self, retention):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+def test_stop_is_not_lost_to_a_wakeup():
+    async def main():
+        queue = CreateJobQueue(None, IdleStore(), workers=1, poll_interval=60)
+        queue.start()
+        worker, = queue._tasks
+        for _ in range(5):
+            await asyncio.sleep(0)
+        # A submit waking the idle worker just as it's stopped
+        queue._wakeup.set()
+        worker.cancel()
+        await asyncio.wait((worker,), timeout=0.5)
+        try:
+            assert worker.done()
+        finally:
+            worker.cancel()
+
+    asyncio.run(main())
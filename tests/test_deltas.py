@@ -0,0 +1,68 @@
+import asyncio
+import json
+from app.services.deltas import DeltaTracker, compute_etag, encode_delta, etag_matches
+from benchmarks import stub_backend
+from tests.stub import api_client
+
+
+def test_changes_and_removals_are_tracked_by_id():
+    deltas = DeltaTracker("t")
+    first = deltas.observe([("orders-1", "a"), ("orders-2", "b"), ("users", "c")])
+    second = deltas.observe([("orders-1", "a"), ("users", "d")])
+    assert deltas.since(first) == ({"users"}, ["orders-2"])
+    assert deltas.since(second) == (set(), [])
+    # Back again: no longer removed, changed instead
+    deltas.observe([("orders-1", "a"), ("orders-2", "b"), ("users", "d")])
+    assert deltas.since(first) == ({"users", "orders-2"}, [])
+
+
+def test_unknown_versions_get_the_full_list():
+    deltas = DeltaTracker("t", max_removed=1)
+    assert deltas.parse("other.1") is None
+    assert deltas.parse("t.x") is None
+    first = deltas.observe([("a", "1"), ("b", "1"), ("c", "1")])
+    deltas.observe([("c", "1")])
+    # Two tombstones, one kept: versions before it can't be answered
+    assert deltas.since(first) is None
+    assert deltas.since(deltas.version + 1) is None
+
+
+def test_generations_are_observed_once():
+    deltas = DeltaTracker("s")
+    assert deltas.observe([("a", "1")], generation=5) == 5
+    assert deltas.observe([("a", "2")], generation=5) == 5
+    assert deltas.since(5) == (set(), [])
+    assert deltas.token == "s.5"
+
+
+def test_etags():
+    etag = compute_etag("plan", hashes=["a", "b"])
+    assert etag != compute_etag("plan", hashes=["a", "c"])
+    assert etag_matches(f'W/{etag}, "other"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+
+
+def test_encode_delta():
+    body = encode_delta("s.2", False, [b'{"dataset_id":"a"}'], ["b"])
+    assert json.loads(body) == {"version": "s.2", "full": False, "changed": [{"dataset_id": "a"}], "removed": ["b"]}
+
+
+def test_list_since_reports_removed_ids():
+    async def main():
+        async with api_client() as client:
+            response = await client.get("/datasets/list")
+            assert response.status_code == 200
+            assert all(record["dataset_id"].startswith("bench-dataset-") for record in response.json())
+            unchanged = await client.get("/datasets/list", headers={"If-None-Match": response.headers["ETag"]})
+            assert unchanged.status_code == 304
+
+            stub_backend.config.datasets = 9
+            delta = await client.get("/datasets/list", params={"since": response.headers["X-Version"]})
+            assert delta.status_code == 200
+            body = delta.json()
+            assert body["full"] is False
+            assert body["removed"] == ["bench-dataset-9"]
+            assert body["version"] == delta.headers["X-Version"]
+
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import asyncio
+from app.services import enrichment as enrichment_module
+from app.services.enrichment import EnrichmentEngine
+from app.services.dataset_service import DatasetService, EVENTS_COUNT, HEALTH
+
+
+class FakeService:
+    """Backend that records how many calls to each endpoint overlap."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.active = {}
+        self.peak = {}
+        self.peak_total = 0
+
+    async def _call(self, endpoint_id, dataset_id, value):
+        self.active[endpoint_id] = self.active.get(endpoint_id, 0) + 1
+        self.peak[endpoint_id] = max(self.peak.get(endpoint_id, 0), self.active[endpoint_id])
+        self.peak_total = max(self.peak_total, sum(self.active.values()))
+        try:
+            await asyncio.sleep(0.001)
+            if (endpoint_id, dataset_id) in self.failing:
+                raise RuntimeError("backend failed")
+            return value
+        finally:
+            self.active[endpoint_id] -= 1
+
+    def get_time_intervals(self):
+        return DatasetService.get_time_intervals()
+
+    async def get_events_count(self, dataset_id, start_time, end_time):
+        return await self._call(EVENTS_COUNT, dataset_id, 10)
+
+    async def get_failed_events_count(self, dataset_id, start_time, end_time):
+        return await self._call("failed", dataset_id, 1)
+
+    async def get_last_synced_time(self, dataset_id):
+        return await self._call("synced", dataset_id, 0)
+
+    async def get_dataset_health(self, dataset_id):
+        return await self._call(HEALTH, dataset_id, "Healthy")
+
+
+DATASETS = [{"dataset_id": f"dataset-{i}", "name": f"Dataset {i}"} for i in range(20)]
+
+
+def enrich(engine, datasets=DATASETS):
+    return asyncio.run(engine.enrich(datasets))
+
+
+def test_fan_out_is_bounded_globally_and_per_endpoint(monkeypatch):
+    monkeypatch.setattr(enrichment_module.settings, "ENRICHMENT_BATCH_QUERIES", False)
+    service = FakeService()
+    engine = EnrichmentEngine(service, max_concurrency=6, max_concurrency_per_endpoint=3, endpoint_concurrency={HEALTH: 1})
+    records = enrich(engine)
+    assert len(records) == len(DATASETS)
+    assert service.peak_total <= 6
+    assert service.peak[HEALTH] == 1
+    assert service.peak[EVENTS_COUNT] == 3
+
+
+def test_failed_calls_fall_back_for_that_dataset_only(monkeypatch):
+    monkeypatch.setattr(enrichment_module.settings, "ENRICHMENT_BATCH_QUERIES", False)
+    service = FakeService(failing={(HEALTH, "dataset-1"), (EVENTS_COUNT, "dataset-2")})
+    records = {record["dataset_id"]: record for record in enrich(EnrichmentEngine(service))}
+    assert records["dataset-0"]["status"] == "healthy"
+    assert records["dataset-0"]["metrics"]["received"] == 11
+    assert records["dataset-1"]["status"] == "unknown"
+    assert records["dataset-1"]["degraded"] == ["status"]
+    assert records["dataset-2"]["metrics"]["success"] == 0
+    assert records["dataset-2"]["metrics"]["yesterday"]["success"] == 0
+    assert records["dataset-2"]["status"] == "healthy"
+
+
+def test_invalid_datasets_are_skipped(monkeypatch):
+    monkeypatch.setattr(enrichment_module.settings, "ENRICHMENT_BATCH_QUERIES", False)
+    records = enrich(EnrichmentEngine(FakeService()), [{"name": "no id"}, "bad", DATASETS[0]])
+    assert [record["dataset"] for record in records] == ["Dataset 0"]
@@ -0,0 +1,62 @@
+import asyncio
+import httpx
+from app.core.config import Settings
+from app.core.http_client import HostLimitedTransport, create_http_client
+from app.services.dataset_service import DatasetService
+
+
+def test_requests_are_capped_per_host():
+    active = {}
+    peak = {}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] = active.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), active[host])
+        await asyncio.sleep(0.001)
+        active[host] -= 1
+        return httpx.Response(200, json={"host": host})
+
+    async def main():
+        transport = HostLimitedTransport(httpx.MockTransport(handler), max_connections_per_host=2)
+        async with httpx.AsyncClient(transport=transport) as client:
+            responses = await asyncio.gather(*(
+                client.get(f"http://{host}/") for host in ["a"] * 6 + ["b"] * 3
+            ))
+            # Slots are released once the responses are read
+            assert all(response.status_code == 200 for response in responses)
+            assert (await client.get("http://a/")).json() == {"host": "a"}
+
+    asyncio.run(main())
+    assert peak == {"a": 2, "b": 2}
+
+
+def test_create_http_client_applies_settings():
+    async def main():
+        client = create_http_client(Settings(HTTP_MAX_CONNECTIONS_PER_HOST=4, HTTP_READ_TIMEOUT=3.0))
+        try:
+            assert isinstance(client._transport, HostLimitedTransport)
+            assert client.timeout.read == 3.0
+        finally:
+            await client.aclose()
+        client = create_http_client(Settings(HTTP_MAX_CONNECTIONS_PER_HOST=0))
+        assert isinstance(client._transport, httpx.AsyncHTTPTransport)
+        await client.aclose()
+
+    asyncio.run(main())
+
+
+def test_service_reuses_its_client():
+    async def main():
+        service = DatasetService()
+        shared = httpx.AsyncClient()
+        service.use_client(shared)
+        assert service.client is shared and service.client is shared
+        await service.aclose()
+        assert shared.is_closed
+        # Outside the lifespan a client is created on first use
+        fallback = service.client
+        assert fallback is not shared and service.client is fallback
+        await service.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+import asyncio
+import json
+from tests.stub import api_client
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def by_id(records):
+    return sorted(records, key=lambda record: record["dataset_id"])
+
+
+def test_list_streams_ndjson():
+    async def main():
+        async with api_client() as client:
+            listed = (await client.get("/datasets/list")).json()
+            response = await client.get("/datasets/list", headers={"Accept": "application/x-ndjson"})
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            # Written in completion order
+            assert by_id(ndjson(response)) == by_id(listed)
+
+            response = await client.get("/datasets/list", params={"stream": "true", "name": "dataset 1"})
+            records = ndjson(response)
+            assert [record["dataset_id"] for record in records] == ["bench-dataset-1"]
+            assert records[0]["metrics"] == listed[1]["metrics"]
+
+    asyncio.run(main())
+
+
+def test_list_fields_filters_and_cursor():
+    async def main():
+        async with api_client() as client:
+            response = await client.get("/datasets/list", params={"fields": "status"})
+            assert response.json()[0] == {"dataset": "Bench dataset 0", "dataset_id": "bench-dataset-0", "status": "healthy"}
+            assert (await client.get("/datasets/list", params={"fields": "owner"})).status_code == 400
+
+            response = await client.get("/datasets/list", params={"status": "unhealthy"})
+            assert [record["dataset_id"] for record in response.json()] == ["bench-dataset-9"]
+
+            seen = []
+            params = {"limit": 4, "fields": "metrics.today"}
+            while True:
+                response = await client.get("/datasets/list", params=params)
+                page = response.json()
+                assert len(page) <= 4 and all(set(record["metrics"]) == {"received", "success", "failed"} for record in page)
+                seen.extend(record["dataset_id"] for record in page)
+                if "X-Next-Cursor" not in response.headers:
+                    break
+                params["cursor"] = response.headers["X-Next-Cursor"]
+            assert seen == [f"bench-dataset-{i}" for i in range(10)]
+            assert (await client.get("/datasets/list", params={"cursor": "bad"})).status_code == 400
+
+    asyncio.run(main())
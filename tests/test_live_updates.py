@@ -0,0 +1,89 @@
+import asyncio
+import json
+from app.services.deltas import DeltaTracker
+from app.services.live_updates import UpdateHub
+from app.services.snapshot import SnapshotView
+
+
+def view(generation, statuses):
+    records = [
+        {"dataset": dataset_id, "dataset_id": dataset_id, "status": status}
+        for dataset_id, status in statuses.items()
+    ]
+    return SnapshotView.build(records, generation=generation)
+
+
+class Source:
+    def __init__(self, view=None):
+        self.view = view
+        self.starts = 0
+        self.stops = 0
+
+    def __call__(self):
+        return self.view
+
+    def start(self):
+        self.starts += 1
+
+    async def stop(self):
+        self.stops += 1
+
+
+def advance(hub, source, new_view):
+    # What the polling task does once the source has a new view
+    source.view = new_view
+    hub.publish(new_view)
+
+
+def hub_for(source, max_pending=16):
+    return UpdateHub(DeltaTracker("s"), source, source.start, source.stop, poll_interval=60, max_pending=max_pending)
+
+
+async def payload(subscription):
+    token, body = await subscription.next(1)
+    return token, json.loads(body)
+
+
+def test_subscribers_get_the_list_then_changes():
+    async def main():
+        source = Source(view(1, {"a": "healthy", "b": "healthy"}))
+        hub = hub_for(source)
+        subscription = hub.subscribe()
+        token, body = await payload(subscription)
+        assert token == "s.1" and body["full"] is True
+        assert [record["dataset_id"] for record in body["changed"]] == ["a", "b"]
+
+        advance(hub, source, view(2, {"a": "healthy", "b": "healthy"}))
+        advance(hub, source, view(3, {"a": "unhealthy"}))
+        token, body = await payload(subscription)
+        # Unchanged views aren't sent
+        assert token == "s.3" and body["full"] is False
+        assert body["changed"] == [{"dataset": "a", "dataset_id": "a", "status": "unhealthy"}]
+        assert body["removed"] == ["b"]
+
+        # Resuming from a version only gets what changed since
+        resumed = hub.subscribe("s.1")
+        token, body = await payload(resumed)
+        assert token == "s.3" and [record["dataset_id"] for record in body["changed"]] == ["a"]
+        assert body["removed"] == ["b"]
+
+        hub.unsubscribe(subscription)
+        hub.unsubscribe(resumed)
+        await asyncio.sleep(0)
+        assert source.starts >= 1 and source.stops == 1
+        await hub.aclose()
+
+    asyncio.run(main())
+
+
+def test_slow_subscribers_are_dropped():
+    async def main():
+        source = Source(view(1, {"a": "healthy"}))
+        hub = hub_for(source, max_pending=1)
+        subscription = hub.subscribe()
+        advance(hub, source, view(2, {"a": "unhealthy"}))
+        assert subscription.dropped and len(hub) == 0 and hub.dropped == 1
+        assert await subscription.next(1) is None
+        await hub.aclose()
+
+    asyncio.run(main())
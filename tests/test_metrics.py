@@ -0,0 +1,64 @@
+import asyncio
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from app.core.instrumentation import InstrumentationMiddleware, timed
+from app.core.metrics import Registry
+from tests.stub import api_client
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("path",))
+    requests.inc(path='/a"b')
+    requests.inc(2, path='/a"b')
+    registry.gauge("in_flight", "In flight").set(3)
+    registry.histogram("duration_seconds", "Duration", buckets=(0.1, 1)).observe(0.5)
+    registry.collect("entries", "Entries", lambda: [({"cache": "metrics"}, 7)])
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a\\"b"} 3',
+        "# HELP in_flight In flight",
+        "# TYPE in_flight gauge",
+        "in_flight 3",
+        "# HELP duration_seconds Duration",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{le="0.1"} 0',
+        'duration_seconds_bucket{le="1"} 1',
+        'duration_seconds_bucket{le="+Inf"} 1',
+        "duration_seconds_sum 0.5",
+        "duration_seconds_count 1",
+        "# HELP entries Entries",
+        "# TYPE entries gauge",
+        'entries{cache="metrics"} 7'
+    ]
+
+
+def test_server_timing_reports_timed_sections():
+    async def work(request):
+        with timed("work"):
+            await asyncio.sleep(0)
+        return PlainTextResponse("ok")
+
+    app = InstrumentationMiddleware(Starlette(routes=[Route("/work", work)]), server_timing=True)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/work")
+
+    entries = [entry.split(";")[0] for entry in asyncio.run(main()).headers["server-timing"].split(", ")]
+    assert entries == ["work", "total"]
+
+
+def test_metrics_endpoint_reports_backend_calls():
+    async def main():
+        async with api_client() as client:
+            assert (await client.get("/datasets/list")).status_code == 200
+            return await client.get("/metrics")
+
+    response = asyncio.run(main())
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'dataset_api_backend_request_duration_seconds_count{endpoint="list",outcome="2xx"}' in response.text
+    assert 'route="/datasets/list"' in response.text
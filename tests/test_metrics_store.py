@@ -0,0 +1,61 @@
+import asyncio
+from datetime import date, timedelta
+from app.services.metrics_store import DailyRow, MetricsStore
+from tests.stub import stub_service
+
+DAY = date(2025, 5, 1)
+
+
+def test_columns_are_written_independently(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.sqlite3"))
+
+    async def main():
+        try:
+            await store.update([("orders", DAY, {"processed": 10, "last_synced_time": 5})])
+            row = (await store.get_days("orders", DAY, DAY))[DAY]
+            assert row == DailyRow(DAY, 10, None, 5) and not row.complete
+            await store.update([("orders", DAY, {"failed": 2})])
+            row = (await store.get_days("orders", DAY, DAY))[DAY]
+            assert row == DailyRow(DAY, 10, 2, 5) and row.complete
+            assert set(await store.get_day(DAY)) == {"orders"}
+        finally:
+            await store.aclose()
+
+    asyncio.run(main())
+
+
+def test_history_stores_only_days_prometheus_returned(tmp_path):
+    path = str(tmp_path / "metrics.sqlite3")
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+
+    async def main():
+        service = stub_service()
+        service.store = MetricsStore(path)
+        failed_calls = []
+
+        async def daily_failed(dataset_id, first_day, last_day):
+            failed_calls.append(first_day)
+            # Only yesterday is within retention
+            return {yesterday: 3}
+
+        service._fetch_daily_failed = daily_failed
+        try:
+            history = await service.get_history("bench-dataset-1", 3)
+            await asyncio.gather(*service._writes)
+            stored = await service.store.get_days("bench-dataset-1", today - timedelta(days=2), yesterday)
+            again = await service.get_history("bench-dataset-1", 3)
+        finally:
+            await service.aclose()
+        return history, stored, again, failed_calls
+
+    history, stored, again, failed_calls = asyncio.run(main())
+    assert [day["failed"] for day in history] == [0, 3, 0]
+    assert [day["final"] for day in history] == [True, True, False]
+    assert stored[yesterday].failed == 3 and stored[yesterday].complete
+    # Served as 0 but not stored as final, so it's asked for again
+    assert stored[today - timedelta(days=2)].failed is None
+    assert failed_calls == [today - timedelta(days=2)] * 2
+    assert [(day["date"], day["received"], day["failed"]) for day in again] == [
+        (day["date"], day["received"], day["failed"]) for day in history
+    ]
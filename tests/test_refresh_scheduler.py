@@ -0,0 +1,81 @@
+import asyncio
+from app.services.cache import FRESH, MetricsCache
+from app.services.refresh_scheduler import RefreshScheduler
+
+
+def scheduler(**options):
+    return RefreshScheduler(MetricsCache(), **{
+        "initial_interval": 0.01, "min_interval": 0.01, "max_interval": 0.04, "max_rate": 0, "jitter": 0, **options
+    })
+
+
+def run(refresh, func):
+    async def main():
+        try:
+            await func()
+        finally:
+            await refresh.aclose()
+    asyncio.run(main())
+
+
+def test_idle_keys_back_off_and_active_ones_speed_up():
+    refresh = scheduler()
+    values = {"health": "healthy"}
+
+    async def load():
+        return values["health"]
+
+    async def main():
+        refresh.track("key", "dataset-1", load, "healthy")
+        await asyncio.sleep(0.2)
+        assert refresh._schedules["key"].interval == 0.04 and refresh.hot() == 0
+        values["health"] = "unhealthy"
+        await asyncio.sleep(0.1)
+        assert refresh.cache.lookup("key") == (FRESH, "unhealthy")
+        assert refresh.stats()["changes"] == 1
+
+        # A moving count marks the dataset active again
+        refresh.observe("dataset-1", "events", 10)
+        refresh.observe("dataset-1", "events", 10)
+        assert refresh._schedules["key"].interval == 0.04
+        refresh.observe("dataset-1", "events", 11)
+        assert refresh._schedules["key"].interval == 0.01
+
+    run(refresh, main)
+
+
+def test_failed_refreshes_keep_the_last_value():
+    refresh = scheduler()
+
+    async def failing():
+        raise RuntimeError("backend down")
+
+    async def main():
+        refresh.track("key", "dataset-1", failing, 5)
+        await asyncio.sleep(0.05)
+        assert refresh.stats()["errors"] >= 1 and refresh.stats()["refreshes"] == 0
+        # Still served, stale once its TTL has passed
+        assert refresh.cache.lookup("key")[1] == 5
+        assert refresh._schedules["key"].interval == 0.01
+
+    run(refresh, main)
+
+
+def test_unread_keys_are_forgotten():
+    refresh = scheduler(forget_after=0.03)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return 1
+
+    async def main():
+        refresh.track("key", "dataset-1", load, 1)
+        await asyncio.sleep(0.15)
+        assert len(refresh) == 0 and refresh.stats()["forgotten"] == 1
+        assert not refresh.touch("key")
+        forgotten_after = len(loads)
+        await asyncio.sleep(0.05)
+        assert len(loads) == forgotten_after
+
+    run(refresh, main)
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.services import resilience as resilience_module
+from app.services.enrichment import EnrichmentEngine
+from app.services.resilience import CLOSED, HALF_OPEN, OPEN, BackendPolicy, BackendUnavailableError, CircuitBreaker
+from tests.stub import stub_service
+
+
+def test_breaker_opens_and_probes_with_one_trial(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(resilience_module.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    now[0] = 10.0
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_missed_deadlines_and_open_circuits_raise():
+    policy = BackendPolicy("slow", timeout=0.01, breaker=CircuitBreaker(failure_threshold=1))
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def main():
+        with pytest.raises(BackendUnavailableError, match="no response"):
+            await policy.call(slow)
+        with pytest.raises(BackendUnavailableError, match="circuit open"):
+            await policy.call(slow)
+
+    asyncio.run(main())
+    assert policy.stats() == {"state": OPEN, "failures": 1, "timeouts": 1, "rejected": 1, "hedged": 0}
+
+
+def test_error_results_count_as_failures():
+    policy = BackendPolicy("health", timeout=1, breaker=CircuitBreaker(failure_threshold=2), is_failure=lambda status: status >= 500)
+
+    async def error():
+        return 503
+
+    assert asyncio.run(policy.call(error)) == 503
+    assert policy.breaker.failures == 1 and len(policy.latency) == 0
+
+
+def test_slow_reads_are_hedged():
+    policy = BackendPolicy("health", timeout=1, breaker=CircuitBreaker(), hedge_percentile=50, hedge_min_samples=1)
+    policy.latency.observe(0.005)
+    attempts = []
+
+    async def read():
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            await asyncio.sleep(0.05)
+            return "first"
+        return "hedge"
+
+    async def main():
+        assert await policy.call(read, hedge=True) == "hedge"
+        # Not hedged unless asked for
+        attempts.clear()
+        assert await policy.call(read, hedge=False) == "first"
+
+    asyncio.run(main())
+    assert policy.hedged == 1
+
+
+def test_backend_errors_degrade_the_affected_fields():
+    service = stub_service(error_rate=1.0)
+    engine = EnrichmentEngine(service)
+
+    async def main():
+        try:
+            return await engine.enrich([{"dataset_id": "bench-dataset-1", "name": "Bench dataset 1"}])
+        finally:
+            await service.aclose()
+
+    record, = asyncio.run(main())
+    assert record["status"] == "unknown"
+    assert record["degraded"] == ["last_synced_time", "metrics.today", "metrics.yesterday", "status"]
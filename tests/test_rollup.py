@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime, timezone
+from app.services.deltas import DeltaTracker
+from app.services.rollup import FleetRollup
+from app.services.snapshot import SnapshotView
+from tests.stub import api_client
+
+RECENT = datetime.now(timezone.utc).isoformat()
+
+
+def record(dataset_id, name, received=10, failed=1, status="healthy", synced=RECENT):
+    return {
+        "dataset": name,
+        "dataset_id": dataset_id,
+        "status": status,
+        "last_synced_time": synced,
+        "metrics": {"received": received, "success": received - failed, "failed": failed}
+    }
+
+
+def view(generation, *records):
+    return SnapshotView.build(
+        records,
+        generation=generation,
+        types={item["dataset_id"]: "master" if item["dataset_id"].startswith("m") else "event" for item in records}
+    )
+
+
+def test_datasets_sharing_a_name_are_counted_apart():
+    rollup = FleetRollup(DeltaTracker("s"))
+    rollup.update(view(1, record("e-1", "orders", received=10), record("e-2", "orders", received=20)))
+    summary = rollup.summary()
+    assert (summary["datasets"], summary["received"]) == (2, 30)
+
+
+def test_only_changed_datasets_are_applied():
+    rollup = FleetRollup(DeltaTracker("s"))
+    records = [record(f"e-{i}", f"dataset {i}") for i in range(100)]
+    rollup.update(view(1, *records))
+    assert rollup.applied == 100
+
+    records[5] = record("e-5", "dataset 5", received=110, failed=11, status="unhealthy")
+    rollup.update(view(2, *records[:-1]))
+    # One changed, one removed
+    assert rollup.applied == 102
+    summary = rollup.summary()
+    assert summary["datasets"] == 99
+    assert summary["received"] == 98 * 10 + 110
+    assert summary["failed"] == 98 + 11
+    assert summary["status"] == {"healthy": 98, "unhealthy": 1}
+
+    # The same generation again is a no-op
+    rollup.update(view(2, *records[:-1]))
+    assert rollup.applied == 102
+
+
+def test_starts_over_when_the_tracker_cant_diff():
+    deltas = DeltaTracker("s", max_removed=1)
+    rollup = FleetRollup(deltas)
+    rollup.update(view(1, record("e-1", "a"), record("e-2", "b"), record("e-3", "c")))
+    # Too many removals for the tracker to keep, so the rollup rebuilds
+    rollup.update(view(2, record("e-3", "c")))
+    summary = rollup.summary()
+    assert summary["datasets"] == 1
+    assert summary["generation"] == 2
+
+
+def test_groups_and_stale_datasets():
+    rollup = FleetRollup(DeltaTracker("s"))
+    rollup.update(view(
+        1,
+        record("e-1", "a"),
+        record("e-2", "b", synced="2020-01-01T00:00:00+00:00"),
+        record("m-1", "c", synced=None, status="unhealthy")
+    ))
+    summary = rollup.summary(["type"], stale_after=3600)
+    assert summary["stale"] == 2
+    groups = {group["type"]: group for group in summary["groups"]}
+    assert (groups["event"]["datasets"], groups["event"]["stale"]) == (2, 1)
+    assert (groups["master"]["datasets"], groups["master"]["stale"]) == (1, 1)
+
+
+def test_summary_endpoint():
+    async def main():
+        async with api_client(datasets=20) as client:
+            response = await client.get("/datasets/summary", params={"group_by": "type"})
+            assert response.status_code == 200
+            return response.json()
+
+    summary = asyncio.run(main())
+    assert summary["datasets"] == 20
+    assert {group["type"]: group["datasets"] for group in summary["groups"]} == {"event": 16, "master": 4}
+    assert summary["status"] == {"healthy": 18, "unhealthy": 2}
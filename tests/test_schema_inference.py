@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from app.services import dataset_service as dataset_service_module
+from app.services.schema_inference import JSON_SCHEMA_DRAFT, SchemaInference, infer_schema
+from benchmarks import stub_backend
+from tests.stub import stub_service
+
+EVENTS = [
+    {"id": "1", "count": 3, "ratio": 0.5, "active": True, "note": None},
+    {"device": {"id": "d-1", "memory": 2048, "tags": ["a", "b"]}, "ets": 1746266400000},
+    {"readings": [{"sensor": "t", "value": 21.5}, {"sensor": "h"}], "empty": [], "nested": {"deeper": {"x": [1, 2.5]}}},
+    {"matrix": [[1, 2], [3]], "mixed": [1, "a", None]}
+]
+
+
+@pytest.mark.parametrize("event", EVENTS)
+def test_matches_stub_backend_schema(event):
+    assert infer_schema(event) == {"$schema": JSON_SCHEMA_DRAFT, **stub_backend.infer_schema(event)}
+
+
+def test_same_shape_is_cached():
+    schemas = SchemaInference()
+    key, schema = schemas.infer({"id": "1", "count": 3})
+    again, cached = schemas.infer({"id": "2", "count": 4.5})
+    assert again == key and cached is schema
+    assert schemas.infer({"id": "1", "count": "3"})[0] != key
+    assert schemas.stats()["hits"] == 1
+
+
+def test_non_objects_are_left_to_the_backend():
+    schemas = SchemaInference()
+    assert schemas.infer([{"id": "1"}]) == (None, None)
+    assert schemas.infer({}) == (None, None)
+
+
+def test_verify_mode_finds_no_mismatches(monkeypatch):
+    monkeypatch.setattr(dataset_service_module.settings, "SCHEMA_INFERENCE_MODE", "verify")
+
+    async def main():
+        service = stub_service()
+        try:
+            for event in EVENTS:
+                await service.get_data_schema("orders", event)
+        finally:
+            await service.aclose()
+        return service.schemas.stats()
+
+    stats = asyncio.run(main())
+    assert stats["verified"] == len(EVENTS)
+    assert stats["mismatches"] == 0
+
+
+def test_local_mode_skips_the_backend(monkeypatch):
+    monkeypatch.setattr(dataset_service_module.settings, "SCHEMA_INFERENCE_MODE", "local")
+
+    async def main():
+        service = stub_service()
+        try:
+            return await service.get_data_schema("orders", EVENTS[0])
+        finally:
+            await service.aclose()
+
+    body = asyncio.run(main())
+    assert body["result"]["schema"] == infer_schema(EVENTS[0])
+    assert "dataschema" not in stub_backend.calls
@@ -0,0 +1,42 @@
+import json
+from datetime import datetime, timezone
+import pytest
+from app.core import serialization
+from app.core.serialization import dumps, format_timestamp, loads
+from app.schemas.dataset import DatasetResponse
+
+TIMESTAMPS = [
+    None,
+    0,
+    1_700_000_000,
+    1_792_194_034_039,
+    -5,
+    "2025-01-01T10:00:00Z",
+    "2025-01-01T10:00:00+05:30",
+    datetime(2025, 1, 1, 10, 0, 0, 123000, tzinfo=timezone.utc)
+]
+
+
+@pytest.mark.parametrize("value", TIMESTAMPS)
+def test_timestamps_match_pydantic(value):
+    expected = DatasetResponse(dataset="d", dataset_id="d", last_synced_time=value).model_dump(mode="json")["last_synced_time"]
+    assert format_timestamp(value) == expected
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_records_match_the_pydantic_encoding(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    record = {
+        "dataset": "Daten über März \U0001F4CA",
+        "dataset_id": "daten",
+        "status": "healthy",
+        "last_synced_time": format_timestamp(1_792_194_034_039),
+        "metrics": {"received": 3, "success": 2, "failed": 1, "yesterday": {"received": 0, "success": 0, "failed": 0}},
+        "degraded": ["status"]
+    }
+    encoded = dumps(record)
+    assert encoded == DatasetResponse(**record).model_dump_json(exclude_unset=True).encode()
+    assert loads(encoded) == json.loads(encoded)
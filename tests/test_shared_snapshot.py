@@ -0,0 +1,61 @@
+import asyncio
+from app.services.enrichment import EnrichmentEngine
+from app.services.shared_snapshot import SharedSnapshot, SharedSnapshotReader, SharedSnapshotWriter
+from app.services.snapshot import SnapshotRefresher, SnapshotView
+from tests.stub import stub_service
+
+
+def records(count, status="healthy"):
+    return [{"dataset": f"Dataset {i}", "dataset_id": f"dataset-{i}", "status": status} for i in range(count)]
+
+
+def test_readers_see_each_published_view(tmp_path):
+    path = str(tmp_path / "snapshot")
+    reader = SharedSnapshotReader(path)
+    assert reader.current() is None
+    writer = SharedSnapshotWriter(path)
+    view = SnapshotView.build(records(3), types={"dataset-0": "master"})
+    assert writer.publish(view) == 1
+
+    shared = reader.current()
+    assert shared.generation == 1
+    assert bytes(shared.body) == bytes(view.body)
+    assert shared.index == view.index and shared.positions == {"dataset-0": 0, "dataset-1": 1, "dataset-2": 2}
+    assert shared.parse(2) == records(3)[2] and shared.dataset_type(0) == "master"
+    assert reader.current() is shared
+
+    writer.publish(SnapshotView.build(records(2, "unhealthy")))
+    assert reader.current().generation == 2
+    assert [reader.current().status(position) for position in range(2)] == ["unhealthy", "unhealthy"]
+    writer.close()
+
+
+def test_one_worker_leads_and_another_takes_over(tmp_path):
+    path = str(tmp_path / "snapshot")
+
+    async def main():
+        service = stub_service(datasets=4)
+        workers = [
+            SharedSnapshot(SnapshotRefresher(service, EnrichmentEngine(service), interval=60), path, retry_interval=0.01)
+            for _ in range(2)
+        ]
+        try:
+            for worker in workers:
+                worker.start()
+            view = await workers[1].reader.wait_ready(5)
+            assert len(view) == 4 and view.generation == 1
+            assert [worker.is_leader for worker in workers] == [True, False]
+
+            await workers[0].stop()
+            await asyncio.sleep(0.05)
+            assert workers[1].is_leader
+            assert (await workers[1].refresher.wait_ready(5)).generation == 1
+            # File generations keep counting across leaders
+            await asyncio.sleep(0.01)
+            assert workers[0].reader.current().generation == 2
+        finally:
+            for worker in workers:
+                await worker.stop()
+            await service.aclose()
+
+    asyncio.run(main())
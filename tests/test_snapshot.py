@@ -0,0 +1,87 @@
+import asyncio
+from app.services.enrichment import EnrichmentEngine
+from app.services.snapshot import IdleStop, SnapshotRefresher
+from benchmarks import stub_backend
+from tests.stub import stub_service
+
+
+class Stoppable:
+    def __init__(self):
+        self.stops = 0
+
+    async def stop(self):
+        self.stops += 1
+
+
+def test_idle_stop_stops_after_last_use():
+    async def main():
+        target = Stoppable()
+        idle = IdleStop(target.stop, 0.05)
+        idle.touch()
+        await asyncio.sleep(0.03)
+        idle.touch()
+        await asyncio.sleep(0.03)
+        assert target.stops == 0
+        await asyncio.sleep(0.05)
+        assert target.stops == 1
+        await idle.aclose()
+
+    asyncio.run(main())
+
+
+def test_idle_stop_waits_while_in_use():
+    async def main():
+        target = Stoppable()
+        subscribers = 1
+        idle = IdleStop(target.stop, 0.01, in_use=lambda: subscribers > 0)
+        idle.touch()
+        await asyncio.sleep(0.05)
+        assert target.stops == 0
+        # The last subscriber leaving stops it
+        subscribers = 0
+        await idle.stop_if_idle()
+        assert target.stops == 1
+        await idle.aclose()
+
+    asyncio.run(main())
+
+
+def test_refresher_serves_the_last_view_and_logs_failures(caplog):
+    async def main():
+        service = stub_service(datasets=5)
+        refresher = SnapshotRefresher(service, EnrichmentEngine(service), interval=0.01, jitter=0)
+        try:
+            view = await refresher.refresh()
+            assert len(view) == 5 and refresher.view is view
+            assert [view.dataset_id(position) for position in range(5)] == [f"bench-dataset-{i}" for i in range(5)]
+            assert view.parse(0)["dataset"] == "Bench dataset 0"
+            assert view.dataset_type(0) == "master" and view.dataset_type(1) == "event"
+
+            stub_backend.config.error_rate = 1.0
+            refresher.start()
+            await asyncio.sleep(0.05)
+            assert refresher.refresh_errors >= 1
+            assert refresher.view is view
+        finally:
+            await refresher.stop()
+            await service.aclose()
+
+    asyncio.run(main())
+    assert any(record.getMessage() == "snapshot refresh failed" for record in caplog.records)
+
+
+def test_listeners_get_each_new_view():
+    async def main():
+        service = stub_service(datasets=3)
+        refresher = SnapshotRefresher(service, EnrichmentEngine(service))
+        views = []
+        refresher.subscribe(views.append)
+        try:
+            first = await refresher.refresh()
+            second = await refresher.refresh()
+        finally:
+            await service.aclose()
+        assert views == [first, second]
+        assert (first.generation, second.generation) == (1, 2)
+
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+import asyncio
+from app.services import dataset_service as dataset_service_module
+from app.services.dataset_service import LAST_SYNCED_TIME
+from app.services.watermarks import LastSyncedWatermarks
+from benchmarks import stub_backend
+from tests.stub import stub_service
+
+
+def test_watermarks_only_move_forward():
+    watermarks = LastSyncedWatermarks(overlap_ms=100)
+    assert watermarks.since("a") is None and "a" not in watermarks
+    watermarks.mark_checked("a", 5000)
+    assert watermarks.since("a") == 4900 and watermarks.get("a") is None
+    watermarks.update("a", 3000)
+    watermarks.update("a", 2000)
+    assert watermarks.get("a") == 3000 and watermarks.since("a") == 2900
+    # A scan without events doesn't hide a known synced time
+    watermarks.mark_checked("a", 9000)
+    assert watermarks.since("a") == 2900
+
+
+def test_lookups_start_from_the_watermark(monkeypatch):
+    monkeypatch.setattr(dataset_service_module.settings, "LAST_SYNCED_LOOKBACK_DAYS", [1, 7])
+    service = stub_service()
+
+    async def main():
+        try:
+            synced = await service._fetch_last_synced_time("bench-dataset-1")
+            assert synced > 0 and stub_backend.calls[LAST_SYNCED_TIME] == 1
+            assert await service._fetch_last_synced_time("bench-dataset-1") >= synced
+            assert stub_backend.calls[LAST_SYNCED_TIME] == 2
+
+            # No event at all: both windows and the full history once, then
+            # only the time since the last scan
+            assert await service._fetch_last_synced_time("unknown-dataset") == 0
+            assert stub_backend.calls[LAST_SYNCED_TIME] == 5
+            assert "unknown-dataset" in service.watermarks
+            assert await service._fetch_last_synced_time("unknown-dataset") == 0
+            assert stub_backend.calls[LAST_SYNCED_TIME] == 6
+        finally:
+            await service.aclose()
+
+    asyncio.run(main())